@@ -18,7 +18,6 @@
 __version__ = '0.1.0'
 
 import logging
-import os
 
 from flask import Flask, request
 from flasgger import Swagger
@@ -75,7 +74,9 @@ def log_request_info():
 cors = CORS(app)
 swagger = Swagger(app=app,config=swagger_config,merge=True)
 
-listen_port = os.environ.get("LISTEN_PORT", "5000")
+# parse and validate the configuration at boot, shared by all the requests
+from openserverless.config.settings import get_settings
+listen_port = get_settings().listen_port
 
 import openserverless.rest.api
 import openserverless.rest.auth
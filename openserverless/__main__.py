@@ -15,10 +15,19 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+import logging
+
 from . import app
-import os
 
 if __name__ == "__main__":
     from waitress import serve
-    listen_port = os.environ.get("LISTEN_PORT", "5000")
-    serve(app, host="0.0.0.0", port=listen_port)
+    from openserverless.config.settings import get_settings
+    settings = get_settings()
+    if settings.sso_warm_pool_size > 0 and settings.sso_autoprovision_on_login:
+        from openserverless.impl.auth.auth_service import AuthService
+        # start filling the warm namespace pool before the first login
+        try:
+            AuthService().warm_pool()
+        except Exception as ex:
+            logging.error(f"warm namespace pool not started: {ex}")
+    serve(app, host="0.0.0.0", port=settings.listen_port, threads=settings.listen_threads)
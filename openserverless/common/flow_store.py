@@ -0,0 +1,202 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import heapq
+import json
+import math
+import threading
+import time
+
+import redis
+from cryptography.fernet import Fernet, InvalidToken
+
+from openserverless.config.settings import resolve_settings
+
+DEVICE_FLOW_PREFIX = "openserverless:oidc:device-flow:"
+PROVISIONING_TICKET_PREFIX = "openserverless:oidc:provisioning:"
+BUILD_RECORD_PREFIX = "openserverless:build:"
+# a completed flow is kept only until its client reads the outcome
+COMPLETED_FLOW_SECONDS = 60
+
+_SHARED_STORES = {}
+_SHARED_STORES_LOCK = threading.Lock()
+_SHARED_CIPHER = None
+_SHARED_CIPHER_LOCK = threading.Lock()
+
+
+class InMemoryFlowStore:
+    """
+    Thread safe, process local flow store.
+    Every flow must carry an `expires_at` epoch timestamp: expirations are kept
+    in a min-heap so cleanup only touches the flows that actually expired.
+    """
+
+    def __init__(self, flows=None):
+        self._flows = flows if flows is not None else {}
+        self._lock = threading.Lock()
+        self._expirations = [
+            (flow["expires_at"], flow_id) for flow_id, flow in self._flows.items()
+        ]
+        heapq.heapify(self._expirations)
+
+    def put(self, flow_id, flow):
+        with self._lock:
+            self._flows[flow_id] = flow
+            heapq.heappush(self._expirations, (flow["expires_at"], flow_id))
+
+    def replace(self, flow_id, flow):
+        """
+        Update a flow only if it is still stored, return True when updated.
+        """
+        with self._lock:
+            previous = self._flows.get(flow_id)
+            if previous is None:
+                return False
+            self._flows[flow_id] = flow
+            if flow["expires_at"] != previous["expires_at"]:
+                heapq.heappush(self._expirations, (flow["expires_at"], flow_id))
+            return True
+
+    def get(self, flow_id):
+        with self._lock:
+            return self._flows.get(flow_id)
+
+    def pop(self, flow_id):
+        with self._lock:
+            return self._flows.pop(flow_id, None)
+
+    def cleanup_expired(self, now):
+        with self._lock:
+            while self._expirations and self._expirations[0][0] <= now:
+                expires_at, flow_id = heapq.heappop(self._expirations)
+                flow = self._flows.get(flow_id)
+                # stale heap entries belong to flows already consumed or re-stored
+                if flow is not None and flow["expires_at"] == expires_at:
+                    del self._flows[flow_id]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._flows)
+
+
+class RedisFlowStore:
+    """
+    Flow store shared by all admin-api replicas.
+    Expiration is delegated to redis native key TTLs; a small grace period keeps
+    expired flows readable long enough to report them as expired rather than unknown.
+    """
+
+    def __init__(self, client, prefix=DEVICE_FLOW_PREFIX, grace_seconds=60, now=None):
+        self._client = client
+        self._prefix = prefix
+        self._grace_seconds = grace_seconds
+        self._now = now if now is not None else time.time
+
+    def _key(self, flow_id):
+        return f"{self._prefix}{flow_id}"
+
+    def _ttl(self, flow):
+        return max(1, math.ceil(flow["expires_at"] - self._now() + self._grace_seconds))
+
+    def put(self, flow_id, flow):
+        self._client.set(self._key(flow_id), json.dumps(flow), ex=self._ttl(flow))
+
+    def replace(self, flow_id, flow):
+        """
+        Update a flow only if it is still stored, return True when updated.
+        """
+        return bool(
+            self._client.set(self._key(flow_id), json.dumps(flow), ex=self._ttl(flow), xx=True)
+        )
+
+    def get(self, flow_id):
+        value = self._client.get(self._key(flow_id))
+        if value is None:
+            return None
+        return json.loads(value)
+
+    def pop(self, flow_id):
+        # GETDEL is atomic, so a flow is consumed by one replica only
+        value = self._client.getdel(self._key(flow_id))
+        if value is None:
+            return None
+        return json.loads(value)
+
+    def cleanup_expired(self, now):
+        # redis expires keys on its own
+        pass
+
+
+class FlowCipher:
+    """
+    Seals the credentials kept in a flow between its completion and its
+    consumption, so the store never holds them in clear.
+    Without a key the seals can be opened by this process only.
+    """
+
+    def __init__(self, key=None):
+        self._fernet = Fernet(key if key else Fernet.generate_key())
+
+    def seal(self, value):
+        return self._fernet.encrypt(value.encode()).decode()
+
+    def unseal(self, sealed):
+        """
+        Return the sealed value, None when it was sealed with another key.
+        """
+        try:
+            return self._fernet.decrypt(sealed.encode()).decode()
+        except (InvalidToken, AttributeError):
+            return None
+
+
+def shared_flow_cipher(environ):
+    """
+    Return the process wide flow cipher, keyed by OIDC_FLOW_STORE_KEY.
+    """
+    global _SHARED_CIPHER
+    with _SHARED_CIPHER_LOCK:
+        if _SHARED_CIPHER is None:
+            _SHARED_CIPHER = FlowCipher(resolve_settings(environ).oidc_flow_store_key)
+        return _SHARED_CIPHER
+
+
+def build_flow_store(environ, prefix=DEVICE_FLOW_PREFIX):
+    """
+    Build the flow store configured by OIDC_FLOW_STORE (memory or redis).
+    The redis backend requires OIDC_FLOW_STORE_REDIS_URL, a missing URL or an
+    unknown backend are reported by the settings with a ConfigException.
+    """
+    settings = resolve_settings(environ)
+    if settings.oidc_flow_store == "redis":
+        return RedisFlowStore(
+            redis.Redis.from_url(settings.oidc_flow_store_redis_url),
+            prefix=prefix,
+        )
+    return InMemoryFlowStore()
+
+
+def shared_flow_store(environ, prefix=DEVICE_FLOW_PREFIX):
+    """
+    Return the process wide flow store for the given key prefix, creating it on first use.
+    """
+    with _SHARED_STORES_LOCK:
+        store = _SHARED_STORES.get(prefix)
+        if store is None:
+            store = build_flow_store(environ, prefix=prefix)
+            _SHARED_STORES[prefix] = store
+        return store
@@ -0,0 +1,49 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+
+
+class IdentityMap:
+    """
+    Request scoped map of the entities already loaded, keyed by kind and name.
+    Each entity is loaded at most once, a missing entity (None) is remembered too.
+    It is not thread safe: create one per request.
+
+    >>> im = IdentityMap()
+    >>> im.get_or_load("user", "devel", lambda: {"name": "devel"})
+    {'name': 'devel'}
+    >>> im.get_or_load("user", "devel", lambda: {"name": "reloaded"})
+    {'name': 'devel'}
+    >>> im.evict("user", "devel")
+    >>> im.get_or_load("user", "devel", lambda: None) is None
+    True
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def get_or_load(self, kind, name, loader):
+        key = (kind, name)
+        if key not in self._entries:
+            self._entries[key] = loader()
+        return self._entries[key]
+
+    def put(self, kind, name, value):
+        self._entries[(kind, name)] = value
+
+    def evict(self, kind, name):
+        self._entries.pop((kind, name), None)
@@ -0,0 +1,112 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import logging
+import os
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from openserverless.config.settings import resolve_settings
+
+_SHARED_CLIENT = None
+_SHARED_CLIENT_LOCK = threading.Lock()
+
+
+class IdpHttpClient:
+    """
+    Keep-alive HTTP client for the identity provider (device authorization, token
+    and JWKS endpoints). Connections, and so TLS sessions, are pooled and reused
+    across requests; every call gets a default timeout and is timed per endpoint.
+    The session is shared by every user, so it never keeps the IdP cookies.
+    It exposes the requests module post/get signature, so it can replace it.
+    """
+
+    def __init__(self, pool_maxsize=10, timeout=10, session=None):
+        self._timeout = timeout
+        self._session = session if session is not None else requests.Session()
+        self._session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+        self._metrics = {}
+        self._metrics_lock = threading.Lock()
+
+    def post(self, url, **kwargs):
+        return self._request("POST", url, **kwargs)
+
+    def get(self, url, **kwargs):
+        return self._request("GET", url, **kwargs)
+
+    def metrics(self):
+        """
+        Return a snapshot of the per-endpoint call counters and latencies (seconds).
+        """
+        with self._metrics_lock:
+            snapshot = {}
+            for endpoint, values in self._metrics.items():
+                snapshot[endpoint] = dict(values)
+                snapshot[endpoint]["avg_seconds"] = values["total_seconds"] / values["count"]
+            return snapshot
+
+    def _request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self._timeout
+
+        endpoint = f"{method} {urlparse(url).path}"
+        started = time.monotonic()
+        failed = True
+        try:
+            response = self._session.request(method, url, **kwargs)
+            failed = False
+            return response
+        finally:
+            elapsed = time.monotonic() - started
+            self._record(endpoint, elapsed, failed)
+            logging.debug(f"IdP {endpoint} took {elapsed * 1000:.1f}ms")
+
+    def _record(self, endpoint, elapsed, failed):
+        with self._metrics_lock:
+            values = self._metrics.setdefault(
+                endpoint,
+                {"count": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0},
+            )
+            values["count"] += 1
+            values["total_seconds"] += elapsed
+            values["max_seconds"] = max(values["max_seconds"], elapsed)
+            if failed:
+                values["errors"] += 1
+
+
+def shared_idp_http_client(environ=os.environ):
+    """
+    Return the process wide IdP HTTP client, creating it on first use.
+    Pool size and timeout are read from OIDC_HTTP_POOL_SIZE and OIDC_HTTP_TIMEOUT_SECONDS.
+    """
+    global _SHARED_CLIENT
+    with _SHARED_CLIENT_LOCK:
+        if _SHARED_CLIENT is None:
+            settings = resolve_settings(environ)
+            _SHARED_CLIENT = IdpHttpClient(
+                pool_maxsize=settings.oidc_http_pool_size,
+                timeout=settings.oidc_http_timeout_seconds,
+            )
+        return _SHARED_CLIENT
@@ -0,0 +1,218 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import copy
+import logging
+import threading
+
+_SHARED_INFORMERS = {}
+_SHARED_INFORMERS_LOCK = threading.Lock()
+
+
+def parse_selector(selector):
+    """
+    Parse an equality based label selector into (key, operator, value) terms.
+    Set based selectors are not supported and raise ValueError.
+
+    >>> parse_selector("app=build,user!=devel")
+    [('app', '=', 'build'), ('user', '!=', 'devel')]
+    >>> parse_selector("")
+    []
+    >>> parse_selector("env in (prod)")
+    Traceback (most recent call last):
+    ...
+    ValueError: unsupported selector term: env in (prod)
+    """
+    terms = []
+    for term in (selector or "").split(","):
+        term = term.strip()
+        if not term:
+            continue
+        if "!=" in term:
+            key, value = term.split("!=", 1)
+            terms.append((key.strip(), "!=", value.strip()))
+        elif "==" in term:
+            key, value = term.split("==", 1)
+            terms.append((key.strip(), "=", value.strip()))
+        elif "=" in term:
+            key, value = term.split("=", 1)
+            terms.append((key.strip(), "=", value.strip()))
+        else:
+            raise ValueError(f"unsupported selector term: {term}")
+    return terms
+
+
+class Informer:
+    """
+    Local cache of a Kubernetes collection kept up to date by list and watch.
+    Objects are indexed by name and by label, reads never reach the API server.
+    The collection is listed again every resync_seconds, which also repairs
+    any event missed while the watch was reconnecting. The watch must end when
+    its resource version expires (410 Gone): the relist then replaces the
+    cache, dropping the objects deleted in the meantime.
+    """
+
+    def __init__(self, name, list_func, watch_func, resync_seconds=300, retry_seconds=5):
+        """
+        param: list_func callable returning the list response (items and
+               metadata.resourceVersion), None on error
+        param: watch_func callable taking a resource version and a timeout and
+               returning a generator of (event type, object) tuples, ending
+               when the resource version expires
+        """
+        self._name = name
+        self._list = list_func
+        self._watch = watch_func
+        self._resync_seconds = resync_seconds
+        self._retry_seconds = retry_seconds
+        self._lock = threading.Lock()
+        self._objects = {}
+        self._labels = {}
+        self._handlers = []
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name=f"informer-{self._name}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def has_synced(self):
+        return self._synced.is_set()
+
+    def wait_for_sync(self, timeout):
+        return self._synced.wait(timeout)
+
+    def add_handler(self, handler):
+        """
+        Register a callable receiving (event type, object) for every change.
+        """
+        with self._lock:
+            self._handlers.append(handler)
+
+    def get(self, name):
+        """
+        Return a copy of the cached object with the given name, None otherwise.
+        """
+        with self._lock:
+            return copy.deepcopy(self._objects.get(name))
+
+    def list(self, label_selector=None):
+        """
+        Return copies of the cached objects matching an equality based label selector.
+        """
+        terms = parse_selector(label_selector)
+        with self._lock:
+            names = None
+            for key, operator, value in terms:
+                if operator == "=":
+                    matching = self._labels.get((key, value), set())
+                    names = matching if names is None else names & matching
+            if names is None:
+                names = set(self._objects)
+
+            result = []
+            for name in sorted(names):
+                obj = self._objects[name]
+                labels = obj.get("metadata", {}).get("labels") or {}
+                if all(labels.get(key) != value for key, operator, value in terms if operator == "!="):
+                    result.append(copy.deepcopy(obj))
+            return result
+
+    def replace(self, items):
+        with self._lock:
+            self._objects = {}
+            self._labels = {}
+            for obj in items:
+                self._store(obj)
+        self._synced.set()
+
+    def apply(self, event_type, obj):
+        with self._lock:
+            name = obj.get("metadata", {}).get("name")
+            self._remove(name)
+            if event_type != "DELETED":
+                self._store(obj)
+            handlers = list(self._handlers)
+
+        for handler in handlers:
+            try:
+                handler(event_type, obj)
+            except Exception as ex:
+                logging.warning(f"informer {self._name} handler failed: {ex}")
+
+    def _store(self, obj):
+        name = obj["metadata"]["name"]
+        self._objects[name] = obj
+        for key, value in (obj["metadata"].get("labels") or {}).items():
+            self._labels.setdefault((key, value), set()).add(name)
+
+    def _remove(self, name):
+        obj = self._objects.pop(name, None)
+        if obj is None:
+            return
+        for key, value in (obj["metadata"].get("labels") or {}).items():
+            names = self._labels.get((key, value))
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._labels[(key, value)]
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                response = self._list()
+            except Exception as ex:
+                logging.warning(f"informer {self._name} list failed: {ex}")
+                response = None
+
+            if response is None:
+                self._stopped.wait(self._retry_seconds)
+                continue
+
+            self.replace(response.get("items", []))
+            resource_version = response.get("metadata", {}).get("resourceVersion")
+            logging.debug(f"informer {self._name} synced at {resource_version}")
+
+            try:
+                events = self._watch(resource_version, self._resync_seconds)
+                for event_type, obj in events:
+                    self.apply(event_type, obj)
+                    if self._stopped.is_set():
+                        events.close()
+                        return
+            except Exception as ex:
+                logging.warning(f"informer {self._name} watch failed: {ex}")
+
+
+def shared_informer(key, factory):
+    """
+    Return the process wide informer for the given key, creating it with
+    factory and starting it on first use.
+    """
+    with _SHARED_INFORMERS_LOCK:
+        informer = _SHARED_INFORMERS.get(key)
+        if informer is None:
+            informer = factory()
+            informer.start()
+            _SHARED_INFORMERS[key] = informer
+        return informer
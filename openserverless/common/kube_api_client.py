@@ -20,17 +20,90 @@ import requests as req
 import json
 import os
 import logging
+import threading
+
+from requests.adapters import HTTPAdapter
 
 from base64 import b64decode, b64encode
 
+from openserverless.common.informer import Informer, parse_selector, shared_informer
+from openserverless.common.pod_status import pod_failure_reason
+from openserverless.common.rate_limiter import background_requests, shared_rate_limiter
+from openserverless.common.ttl_cache import shared_ttl_cache
 from openserverless.common.utils import join_host_port
 from openserverless.config.app_config import AppConfig
+from openserverless.config.settings import resolve_settings
+from openserverless.error.api_error import ApiError
 from openserverless.error.config_exception import ConfigException
 
 SERVICE_HOST_ENV_NAME = "KUBERNETES_SERVICE_HOST"
 SERVICE_PORT_ENV_NAME = "KUBERNETES_SERVICE_PORT"
 SERVICE_TOKEN_FILENAME = "/var/run/secrets/kubernetes.io/serviceaccount/token"
 SERVICE_CERT_FILENAME = "/var/run/secrets/kubernetes.io/serviceaccount/ca.crt"
+READ_VERBS = ["GET", "HEAD"]
+WATCH_SERVER_TIMEOUT_SECONDS = 60
+WATCH_RETRY_SECONDS = 1
+
+BUILD_COMPONENT_LABEL = "app.kubernetes.io/component"
+BUILD_COMPONENT = "build"
+# status.completionTime of a successful build Job, copied by the build status
+# watcher so the housekeeping can list the jobs as metadata only
+BUILD_COMPLETED_AT_ANNOTATION = "openserverless.apache.org/build-completed-at"
+# cluster configuration read on every build, kept in the informer cache when
+# enabled, for KUBE_CONFIG_CACHE_SECONDS otherwise
+CACHED_CONFIG_MAPS = ["config", "nuvolaris-buildkitd-conf"]
+CACHED_SECRETS = ["registry-pull-secret"]
+
+# server side projection of a list to the object metadata; servers not
+# supporting it fall back to the plain list, so the consumers must accept both
+ACCEPT_PARTIAL_METADATA = "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,application/json"
+
+_SHARED_SESSIONS = {}
+_SHARED_SESSIONS_LOCK = threading.Lock()
+
+
+def _job_status_from_metadata(item):
+    """
+    Shape a Job read as metadata only like a Job with the status fields the
+    housekeeping reads, from the BUILD_COMPLETED_AT_ANNOTATION annotation.
+    A full Job, sent by a server without the projection, keeps its status.
+
+    >>> item = {"metadata": {"name": "b", "annotations": {BUILD_COMPLETED_AT_ANNOTATION: "2026-01-01T10:02:30Z"}}}
+    >>> _job_status_from_metadata(item)["status"]["completionTime"]
+    '2026-01-01T10:02:30Z'
+    >>> _job_status_from_metadata({"metadata": {"name": "b"}})["status"]
+    {'conditions': [], 'completionTime': None}
+    """
+    metadata = item.get("metadata", {})
+    if "status" in item:
+        return {"metadata": metadata, "status": item["status"] or {}}
+
+    completed_at = (metadata.get("annotations") or {}).get(BUILD_COMPLETED_AT_ANNOTATION)
+    status = {"conditions": [], "completionTime": completed_at}
+    if completed_at:
+        status["conditions"].append({"type": "Complete", "status": "True"})
+    return {"metadata": metadata, "status": status}
+
+
+def shared_kube_session(host, ca_cert, pool_maxsize=10):
+    """
+    Return the process wide keep-alive session for the given API server and CA,
+    creating it on first use. The CA bundle is loaded once and TLS connections
+    are pooled, so the API calls do not pay a handshake each.
+    """
+    key = (host, ca_cert)
+    with _SHARED_SESSIONS_LOCK:
+        session = _SHARED_SESSIONS.get(key)
+        if session is None:
+            session = req.Session()
+            session.verify = ca_cert
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SHARED_SESSIONS[key] = session
+        return session
+
+
 class KubeApiClient:
 
     @staticmethod
@@ -56,12 +129,114 @@ class KubeApiClient:
         }
         return _json.dumps(dockerconfig)
 
-    def __init__(self, environ=os.environ):
+    def __init__(self, environ=os.environ, session=None):
         self._environ = environ
         self.SERVICE_TOKEN_FILENAME = self._environ.get("KUBERNETES_TOKEN_FILENAME") or SERVICE_TOKEN_FILENAME
         self.SERVICE_CERT_FILENAME = self._environ.get("KUBERNETES_CERT_FILENAME") or SERVICE_CERT_FILENAME
         self._load_incluster_config()
 
+        settings = resolve_settings(environ)
+        self._connect_timeout = settings.kube_connect_timeout_seconds
+        self._read_timeout = settings.kube_read_timeout_seconds
+        self._write_timeout = settings.kube_write_timeout_seconds
+        self._use_informers = settings.kube_informers
+        self._list_page_size = settings.kube_list_page_size
+        self._informer_resync_seconds = settings.kube_informer_resync_seconds
+        self._session = session if session is not None else shared_kube_session(
+            self.host,
+            self.ssl_ca_cert,
+            pool_maxsize=settings.kube_http_pool_size,
+        )
+        # budgets shared by all the clients of the process
+        self._read_limiter = shared_rate_limiter(
+            (self.host, "read"),
+            settings.kube_read_qps,
+            settings.kube_read_burst,
+            reserve=settings.kube_priority_reserve,
+        )
+        self._write_limiter = shared_rate_limiter(
+            (self.host, "write"),
+            settings.kube_write_qps,
+            settings.kube_write_burst,
+            reserve=settings.kube_priority_reserve,
+        )
+        self._config_cache = shared_ttl_cache(self.host, settings.kube_config_cache_seconds)
+
+    def _request(self, method, url, **kwargs):
+        """
+        Send a request to the API server on the pooled session.
+        Reads and writes get their own default (connect, read) timeout and
+        their own rate limit; calls made within background_requests() wait
+        for the tokens left after the priority reserve.
+        """
+        limiter = self._read_limiter if method in READ_VERBS else self._write_limiter
+        waited = limiter.acquire()
+        if waited > 0:
+            logging.debug(f"{method} {url} throttled for {waited:.2f}s")
+
+        if kwargs.get("timeout") is None:
+            read_timeout = self._read_timeout if method in READ_VERBS else self._write_timeout
+            kwargs["timeout"] = (self._connect_timeout, read_timeout)
+        return self._session.request(method, url, **kwargs)
+
+    def _informer(self, key, url, label_selector=None, field_selector=None):
+        """
+        Return the shared informer caching the given collection, when informers
+        are enabled (KUBE_INFORMERS) and the cache has been filled, None otherwise.
+        Callers fall back to a live request on None.
+        """
+        if not self._use_informers:
+            return None
+
+        def factory():
+            # a new client per list and watch picks up the rotated service account token
+            def fresh_client():
+                return KubeApiClient(self._environ, session=self._session)
+
+            def list_func():
+                with background_requests():
+                    return fresh_client().list_collection(url, label_selector, field_selector, resource_version="0")
+
+            return Informer(
+                key,
+                list_func,
+                lambda resource_version, timeout_seconds: fresh_client().watch(
+                    url,
+                    label_selector=label_selector,
+                    field_selector=field_selector,
+                    resource_version=resource_version,
+                    timeout_seconds=timeout_seconds,
+                    restart_on_expired=False,
+                ),
+                resync_seconds=self._informer_resync_seconds,
+            )
+
+        informer = shared_informer(key, factory)
+        if informer.has_synced():
+            return informer
+        return None
+
+    def _cached_object(self, resource, name, namespace, loader):
+        """
+        Return a copy of a cluster configuration object, from the informer
+        when enabled, from the TTL cache otherwise, calling loader on a miss.
+        """
+        informer = self._informer(
+            f"{resource}/{namespace}/{name}",
+            f"{self.host}/api/v1/namespaces/{namespace}/{resource}",
+            field_selector=f"metadata.name={name}",
+        )
+        if informer is not None:
+            return informer.get(name)
+        return self._config_cache.get((resource, namespace, name), loader)
+
+    def _invalidate(self, resource, name, namespace):
+        self._config_cache.invalidate((resource, namespace, name))
+
+    def _whisk_users_informer(self, namespace):
+        url = f"{self.host}/apis/nuvolaris.org/v1/namespaces/{namespace}/whisksusers"
+        return self._informer(f"whisksusers/{namespace}", url)
+
     def _parse_b64(self, encoded_str):
         try:
             return b64decode(encoded_str).decode()
@@ -114,11 +289,11 @@ class KubeApiClient:
         try:
             logging.info("POST request to %s", url)
             response = None
-            response = req.post(
+            response = self._request(
+                "POST",
                 url,
                 headers=headers,
                 data=json.dumps(whisk_user_dict),
-                verify=self.ssl_ca_cert,
             )
 
             if response.status_code in [200, 201, 202]:
@@ -154,7 +329,7 @@ class KubeApiClient:
         try:
             logging.info(f"DELETE request to {url}")
             response = None
-            response = req.delete(url, headers=headers, verify=self.ssl_ca_cert)
+            response = self._request("DELETE", url, headers=headers)
 
             if response.status_code in [200, 202]:
                 logging.debug(
@@ -170,20 +345,25 @@ class KubeApiClient:
             logging.error(f"delete_whisk_user {ex}")
             return False
 
-    def get_whisk_user(self, username: str, namespace="nuvolaris"):
+    def get_whisk_user(self, username: str, namespace="nuvolaris", cached=True):
         """ "
         Get a whisk user using a GET operation
         param: username of the whisksusers resource to delete
         param: namespace default to nuvolaris
+        param: cached False to skip the informer cache and read the API server
         return: a dictionary representing the existing user, None otherwise
         """
+        informer = self._whisk_users_informer(namespace) if cached else None
+        if informer is not None:
+            return informer.get(username)
+
         url = f"{self.host}/apis/nuvolaris.org/v1/namespaces/{namespace}/whisksusers/{username}"
         headers = {"Authorization": self.token}
 
         try:
             logging.info(f"GET request to {url}")
             response = None
-            response = req.get(url, headers=headers, verify=self.ssl_ca_cert)
+            response = self._request("GET", url, headers=headers)
 
             if response.status_code in [200, 202]:
                 logging.debug(
@@ -199,6 +379,20 @@ class KubeApiClient:
             logging.error(f"get_whisk_user {ex}")
             return None
 
+    def list_whisk_users(self, label_selector: str | None = None, namespace="nuvolaris"):
+        """
+        List the whisk users, optionally filtered by a label selector
+        param: label_selector a kubernetes label selector (e.g. "key=value,other=value")
+        param: namespace default to nuvolaris
+        return: an iterator over the matching users, None on error
+        """
+        informer = self._whisk_users_informer(namespace)
+        if informer is not None:
+            return iter(informer.list(label_selector))
+
+        url = f"{self.host}/apis/nuvolaris.org/v1/namespaces/{namespace}/whisksusers"
+        return self._list(url, label_selector, None, None, "list_whisk_users")
+
     def update_whisk_user(self, whisk_user_dict, namespace="nuvolaris"):
         """ "
         Updates a whisk user using a PUT operation
@@ -210,13 +404,13 @@ class KubeApiClient:
         headers = {"Authorization": self.token}
 
         try:
-            logging.error(f"PUT request to {url}")
+            logging.info("PUT request to %s", url)
             response = None
-            response = req.put(
+            response = self._request(
+                "PUT",
                 url,
                 headers=headers,
                 data=json.dumps(whisk_user_dict),
-                verify=self.ssl_ca_cert,
             )
 
             if response.status_code in [200, 201, 202]:
@@ -240,12 +434,22 @@ class KubeApiClient:
         :param namespace: Namespace where the ConfigMap is located.
         :return: The ConfigMap data or None if not found.
         """
+        if cm_name in CACHED_CONFIG_MAPS:
+            return self._cached_object(
+                "configmaps",
+                cm_name,
+                namespace,
+                lambda: self._get_config_map(cm_name, namespace),
+            )
+        return self._get_config_map(cm_name, namespace)
+
+    def _get_config_map(self, cm_name, namespace):
         url = f"{self.host}/api/v1/namespaces/{namespace}/configmaps/{cm_name}"
         headers = {"Authorization": self.token}
 
         try:
             logging.info(f"GET request to {url}")
-            response = req.get(url, headers=headers, verify=self.ssl_ca_cert)
+            response = self._request("GET", url, headers=headers)
 
             if response.status_code == 200:
                 logging.debug(
@@ -298,7 +502,8 @@ class KubeApiClient:
         try:
             logging.info(f"POST request to {url}")
             response = None
-            response = req.post(url, data=json.dumps(configmap_manifest), headers=headers, verify=self.ssl_ca_cert)
+            response = self._request("POST", url, data=json.dumps(configmap_manifest), headers=headers)
+            self._invalidate("configmaps", cm_name, namespace)
 
             if response.status_code in [200, 201, 202]:
                 logging.debug(
@@ -327,7 +532,8 @@ class KubeApiClient:
         try:
             logging.info(f"DELETE request to {url}")
             response = None
-            response = req.delete(url, headers=headers, verify=self.ssl_ca_cert)
+            response = self._request("DELETE", url, headers=headers)
+            self._invalidate("configmaps", cm_name, namespace)
 
             if response.status_code in [200, 202]:
                 logging.debug(
@@ -343,6 +549,34 @@ class KubeApiClient:
             logging.error(f"delete_config_map {ex}")
             return False
      
+    def set_owner_reference(self, resource: str, name: str, owner: dict, namespace="nuvolaris"):
+        """
+        Make a core resource owned by another object, so that the garbage
+        collector deletes it together with its owner.
+        :param resource: The resource collection, e.g. "configmaps" or "secrets".
+        :param owner: The owner reference (apiVersion, kind, name and uid).
+        :return: True if the resource was patched, False otherwise.
+        """
+        url = f"{self.host}/api/v1/namespaces/{namespace}/{resource}/{name}"
+        headers = {"Authorization": self.token, "Content-Type": "application/merge-patch+json"}
+        patch = {"metadata": {"ownerReferences": [owner]}}
+
+        try:
+            logging.info(f"PATCH request to {url}")
+            response = self._request("PATCH", url, headers=headers, data=json.dumps(patch))
+
+            if response.status_code in [200, 201]:
+                logging.debug(f"PATCH to {url} succeeded with {response.status_code}.")
+                return True
+
+            logging.error(
+                f"PATCH to {url} failed with {response.status_code}. Body {response.text}"
+            )
+            return False
+        except Exception as ex:
+            logging.error(f"set_owner_reference {ex}")
+            return False
+
     def get_secret(self, secret_name: str, namespace="nuvolaris"):
         """
         Get a Kubernetes secret by name.
@@ -350,12 +584,22 @@ class KubeApiClient:
         :param namespace: Namespace where the secret is located.
         :return: The secret data or None if not found.
         """
+        if secret_name in CACHED_SECRETS:
+            return self._cached_object(
+                "secrets",
+                secret_name,
+                namespace,
+                lambda: self._get_secret(secret_name, namespace),
+            )
+        return self._get_secret(secret_name, namespace)
+
+    def _get_secret(self, secret_name, namespace):
         url = f"{self.host}/api/v1/namespaces/{namespace}/secrets/{secret_name}"
         headers = {"Authorization": self.token}
 
         try:
             logging.info(f"GET request to {url}")
-            response = req.get(url, headers=headers, verify=self.ssl_ca_cert)
+            response = self._request("GET", url, headers=headers)
 
             if response.status_code == 200:
                 logging.debug(
@@ -408,7 +652,8 @@ class KubeApiClient:
 
         try:
             logging.info(f"POST request to {url}")
-            response = req.post(url, headers=headers, json=secret_manifest, verify=self.ssl_ca_cert)
+            response = self._request("POST", url, headers=headers, json=secret_manifest)
+            self._invalidate("secrets", secret_name, namespace)
 
             if response.status_code in [200, 201]:
                 logging.debug(
@@ -436,7 +681,8 @@ class KubeApiClient:
 
         try:
             logging.info(f"DELETE request to {url}")
-            response = req.delete(url, headers=headers, verify=self.ssl_ca_cert)
+            response = self._request("DELETE", url, headers=headers)
+            self._invalidate("secrets", secret_name, namespace)
 
             if response.status_code in [200, 202]:
                 logging.debug(
@@ -452,52 +698,221 @@ class KubeApiClient:
             logging.error(f"delete_secret {ex}")
             return False
         
-    def get_jobs(self, name_filter: str | None = None, namespace="nuvolaris"):
+    def get_jobs(
+        self,
+        name_filter: str | None = None,
+        namespace="nuvolaris",
+        label_selector: str | None = None,
+        field_selector: str | None = None,
+        resource_version: str | None = None,
+    ):
         """
-        Get all Kubernetes jobs in a specific namespace.
+        Get the Kubernetes jobs in a specific namespace.
         :param name_filter: Optional filter to match job names.
         :param namespace: Namespace to list jobs from.
-        :return: List of jobs or None if failed.
+        :param label_selector: Optional label selector, applied by the API server.
+        :param field_selector: Optional field selector, applied by the API server.
+        :param resource_version: "0" lets the API server answer from its watch cache.
+        :return: An iterator over the jobs or None if failed.
         """
         url = f"{self.host}/apis/batch/v1/namespaces/{namespace}/jobs"
+        informer = None
+        if self._is_build_jobs_selector(label_selector) and field_selector is None:
+            informer = self._informer(
+                f"jobs/{namespace}/{BUILD_COMPONENT}",
+                url,
+                label_selector=f"{BUILD_COMPONENT_LABEL}={BUILD_COMPONENT}",
+            )
+
+        if informer is not None:
+            jobs = iter(informer.list(label_selector))
+        else:
+            jobs = self._list(url, label_selector, field_selector, resource_version, "get_jobs")
+        if jobs is not None and name_filter:
+            return (job for job in jobs if name_filter in job["metadata"]["name"])
+        return jobs
+
+    def get_job_status(self, namespace="nuvolaris", label_selector: str | None = None):
+        """
+        List the jobs of a namespace as PartialObjectMetadata: the API server
+        sends only the metadata, without the specs and their pod templates.
+        The completion of the successful build Jobs is read from the
+        status.completionTime the status watcher copies into an annotation.
+        :return: An iterator over objects shaped like jobs or None if failed.
+        """
+        url = f"{self.host}/apis/batch/v1/namespaces/{namespace}/jobs"
+        if self._is_build_jobs_selector(label_selector):
+            informer = self._informer(
+                f"jobs/{namespace}/{BUILD_COMPONENT}",
+                url,
+                label_selector=f"{BUILD_COMPONENT_LABEL}={BUILD_COMPONENT}",
+            )
+            if informer is not None:
+                return iter(informer.list(label_selector))
+
+        items = self._list(url, label_selector, None, None, "get_job_status", accept=ACCEPT_PARTIAL_METADATA)
+        if items is None:
+            return None
+        return (_job_status_from_metadata(item) for item in items)
+
+    def list_pods(
+        self,
+        namespace="nuvolaris",
+        label_selector: str | None = None,
+        field_selector: str | None = None,
+        resource_version: str | None = None,
+    ):
+        """
+        List the pods of a namespace, filtered by the API server.
+        :param namespace: Namespace to list pods from.
+        :param label_selector: Optional label selector (e.g. "job-name=build-abc").
+        :param field_selector: Optional field selector (e.g. "status.phase=Running").
+        :param resource_version: "0" lets the API server answer from its watch cache.
+        :return: An iterator over the pods or None if failed.
+        """
+        url = f"{self.host}/api/v1/namespaces/{namespace}/pods"
+        return self._list(url, label_selector, field_selector, resource_version, "list_pods")
+
+    def list_collection(
+        self,
+        url,
+        label_selector=None,
+        field_selector=None,
+        resource_version=None,
+        limit=None,
+        continue_token=None,
+        accept=None,
+    ):
+        """
+        List a collection, returning the whole list response (items and
+        metadata.resourceVersion to start a watch from), None if failed.
+        With limit, the response holds a single page and metadata.continue
+        is the token to request the next one.
+        With accept, e.g. ACCEPT_PARTIAL_METADATA, the API server is asked
+        for a projection of the list.
+        """
         headers = {"Authorization": self.token}
+        params = self._list_params(label_selector, field_selector, resource_version)
+        if limit:
+            params["limit"] = limit
+        if continue_token:
+            params["continue"] = continue_token
+        if accept:
+            headers["Accept"] = accept
+        logging.info(f"GET request to {url} with {params}")
+        response = self._request("GET", url, headers=headers, params=params)
+
+        if response.status_code in [200, 202]:
+            logging.debug(f"GET to {url} succeeded with {response.status_code}.")
+            return json.loads(response.text)
+
+        logging.error(
+            f"GET to {url} failed with {response.status_code}. Body {response.text}"
+        )
+        return None
+
+    def _list(self, url, label_selector, field_selector, resource_version, operation, accept=None):
+        """
+        Page through a collection with limit/continue, KUBE_LIST_PAGE_SIZE items
+        at a time. The first page is requested eagerly, so that a failure is
+        reported as None. The following pages are requested while the returned
+        iterator is consumed: a failure there raises ApiError.
+        """
         try:
-            logging.info(f"GET request to {url}")
-            response = req.get(url, headers=headers, verify=self.ssl_ca_cert)
+            page = self.list_collection(
+                url,
+                label_selector,
+                field_selector,
+                resource_version,
+                limit=self._list_page_size,
+                accept=accept,
+            )
+            if page is None:
+                return None
+            return self._iter_pages(url, label_selector, field_selector, page, operation, accept)
+        except Exception as ex:
+            logging.error(f"{operation} {ex}")
+            return None
 
-            if response.status_code in [200, 202]:
-                logging.debug(
-                    f"GET to {url} succeeded with {response.status_code}. Body {response.text}"
-                )
+    def _iter_pages(self, url, label_selector, field_selector, page, operation, accept=None):
+        while True:
+            yield from page.get("items") or []
 
-                if name_filter:
-                    jobs = json.loads(response.text)["items"]
-                    filtered_jobs = [job for job in jobs if name_filter in job["metadata"]["name"]]
-                    return filtered_jobs
+            continue_token = page.get("metadata", {}).get("continue")
+            if not continue_token:
+                return
 
-                return json.loads(response.text)["items"]
+            # only the current page is kept in memory
+            page = self.list_collection(
+                url,
+                label_selector,
+                field_selector,
+                limit=self._list_page_size,
+                continue_token=continue_token,
+                accept=accept,
+            )
+            if page is None:
+                raise ApiError(f"{operation} failed reading the next page of {url}")
+
+    def _is_build_jobs_selector(self, label_selector):
+        try:
+            terms = parse_selector(label_selector)
+        except ValueError:
+            return False
+        return (BUILD_COMPONENT_LABEL, "=", BUILD_COMPONENT) in terms
+
+    def _list_params(self, label_selector=None, field_selector=None, resource_version=None):
+        params = {}
+        if label_selector:
+            params["labelSelector"] = label_selector
+        if field_selector:
+            params["fieldSelector"] = field_selector
+        if resource_version is not None:
+            params["resourceVersion"] = resource_version
+        return params
+
+    def label_job(self, name: str, labels: dict, annotations: dict | None = None, namespace="nuvolaris"):
+        """
+        Merge labels, and optionally annotations, into the metadata of a job.
+        :return: True if the job was patched, False otherwise.
+        """
+        url = f"{self.host}/apis/batch/v1/namespaces/{namespace}/jobs/{name}"
+        headers = {"Authorization": self.token, "Content-Type": "application/merge-patch+json"}
+        patch = {"metadata": {"labels": labels}}
+        if annotations:
+            patch["metadata"]["annotations"] = annotations
+
+        try:
+            logging.info(f"PATCH request to {url}")
+            response = self._request("PATCH", url, headers=headers, data=json.dumps(patch))
+
+            if response.status_code in [200, 201]:
+                logging.debug(f"PATCH to {url} succeeded with {response.status_code}.")
+                return True
 
             logging.error(
-                f"GET to {url} failed with {response.status_code}. Body {response.text}"
+                f"PATCH to {url} failed with {response.status_code}. Body {response.text}"
             )
-            return None
+            return False
         except Exception as ex:
-            logging.error(f"get_jobs {ex}")
-            return None
-        
-    def delete_job(self, job_name: str, namespace="nuvolaris"):
+            logging.error(f"label_job {ex}")
+            return False
+
+    def delete_job(self, job_name: str, namespace="nuvolaris", propagation_policy="Background"):
         """
         Delete a Kubernetes job by name.
         :param job_name: Name of the job to delete.
         :param namespace: Namespace where the job is located.
+        :param propagation_policy: Background lets the garbage collector remove the job pods.
         :return: True if deletion was successful, False otherwise.
         """
         url = f"{self.host}/apis/batch/v1/namespaces/{namespace}/jobs/{job_name}"
         headers = {"Authorization": self.token}
+        params = {"propagationPolicy": propagation_policy}
 
         try:
             logging.info(f"DELETE request to {url}")
-            response = req.delete(url, headers=headers, verify=self.ssl_ca_cert)
+            response = self._request("DELETE", url, headers=headers, params=params)
 
             if response.status_code in [200, 202]:
                 logging.debug(
@@ -513,6 +928,42 @@ class KubeApiClient:
             logging.error(f"delete_job {ex}")
             return False
 
+    def delete_jobs(
+        self,
+        namespace="nuvolaris",
+        label_selector: str | None = None,
+        field_selector: str | None = None,
+        propagation_policy="Background",
+    ):
+        """
+        Delete all the jobs matching the selectors with a single deletecollection call.
+        :param label_selector: Label selector of the jobs to delete.
+        :param field_selector: Optional field selector (e.g. "status.successful=1").
+        :param propagation_policy: Background lets the garbage collector remove the job pods.
+        :return: The number of deleted jobs, None if failed.
+        """
+        url = f"{self.host}/apis/batch/v1/namespaces/{namespace}/jobs"
+        # the deleted jobs are returned, ask for their metadata only
+        headers = {"Authorization": self.token, "Accept": ACCEPT_PARTIAL_METADATA}
+        params = self._list_params(label_selector, field_selector)
+        params["propagationPolicy"] = propagation_policy
+
+        try:
+            logging.info(f"DELETE request to {url} with {params}")
+            response = self._request("DELETE", url, headers=headers, params=params)
+
+            if response.status_code in [200, 202]:
+                logging.debug(f"DELETE to {url} succeeded with {response.status_code}.")
+                return len(json.loads(response.text).get("items") or [])
+
+            logging.error(
+                f"DELETE to {url} failed with {response.status_code}. Body {response.text}"
+            )
+            return None
+        except Exception as ex:
+            logging.error(f"delete_jobs {ex}")
+            return None
+
     def post_job(self, job_manifest: dict, namespace="nuvolaris"):
         """
         Create a Kubernetes job.
@@ -525,7 +976,7 @@ class KubeApiClient:
         try:
             logging.info(f"POST request to {url}")
             response = None
-            response = req.post(url, headers=headers, json=job_manifest, verify=self.ssl_ca_cert)
+            response = self._request("POST", url, headers=headers, json=job_manifest)
             if response.status_code in [200, 201, 202]:
                 logging.debug(
                     f"POST to {url} succeeded with {response.status_code}. Body {response.text}"
@@ -539,36 +990,140 @@ class KubeApiClient:
             logging.error(f"post_job {ex}")
             return None
 
-    def get_pod_by_job_name(self, job_name: str, namespace="nuvolaris"):
+    def watch(
+        self,
+        url,
+        label_selector: str | None = None,
+        field_selector: str | None = None,
+        resource_version: str | None = None,
+        timeout_seconds=300,
+        restart_on_expired=True,
+    ):
+        """
+        Watch the collection at the given url, yielding (event type, object)
+        tuples for the ADDED, MODIFIED and DELETED events until timeout_seconds
+        expires. Without resource_version the current objects are replayed as
+        ADDED first. The watch resumes from the last seen resourceVersion (kept
+        up to date by bookmarks) when the connection drops, and starts over from
+        the current state when the version is too old (410 Gone).
+        With restart_on_expired False the watch ends on 410 Gone instead: the
+        replay does not report the objects deleted meanwhile, so a cache must
+        list the collection again and replace its content.
+        Close the generator to stop watching.
+        """
+        headers = {"Authorization": self.token}
+        deadline = time.monotonic() + timeout_seconds
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+
+            server_timeout = max(1, int(min(remaining, WATCH_SERVER_TIMEOUT_SECONDS)))
+            params = self._list_params(label_selector, field_selector, resource_version)
+            params["watch"] = "true"
+            params["allowWatchBookmarks"] = "true"
+            params["timeoutSeconds"] = server_timeout
+
+            try:
+                with self._request(
+                    "GET",
+                    url,
+                    headers=headers,
+                    params=params,
+                    stream=True,
+                    timeout=(self._connect_timeout, server_timeout + self._connect_timeout),
+                ) as response:
+                    if response.status_code == 410:
+                        if not restart_on_expired:
+                            logging.info(f"watch of {url} expired")
+                            return
+                        logging.info(f"watch of {url} expired, restarting from the current state")
+                        resource_version = None
+                        continue
+
+                    if response.status_code != 200:
+                        logging.error(f"watch of {url} failed with {response.status_code}. Body {response.text}")
+                        time.sleep(min(WATCH_RETRY_SECONDS, max(0, deadline - time.monotonic())))
+                        continue
+
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        event = json.loads(line)
+                        event_type = event.get("type")
+                        obj = event.get("object") or {}
+
+                        if event_type == "ERROR":
+                            if obj.get("code") == 410:
+                                if not restart_on_expired:
+                                    logging.info(f"watch of {url} expired")
+                                    return
+                                logging.info(f"watch of {url} expired, restarting from the current state")
+                                resource_version = None
+                            else:
+                                logging.error(f"watch of {url} error {obj.get('message')}")
+                            break
+
+                        resource_version = obj.get("metadata", {}).get("resourceVersion", resource_version)
+                        if event_type == "BOOKMARK":
+                            continue
+
+                        yield event_type, obj
+
+                        if time.monotonic() >= deadline:
+                            return
+            except Exception as ex:
+                logging.warning(f"watch of {url} interrupted: {ex}")
+                time.sleep(min(WATCH_RETRY_SECONDS, max(0, deadline - time.monotonic())))
+
+    def watch_pods(self, namespace="nuvolaris", label_selector=None, field_selector=None, timeout_seconds=300):
+        """
+        Watch the pods of a namespace, see watch.
+        """
+        url = f"{self.host}/api/v1/namespaces/{namespace}/pods"
+        return self.watch(
+            url,
+            label_selector=label_selector,
+            field_selector=field_selector,
+            timeout_seconds=timeout_seconds,
+        )
+
+    def watch_events(self, namespace="nuvolaris", field_selector=None, timeout_seconds=300):
+        """
+        Watch the Events of a namespace, see watch.
+        :param field_selector: e.g. "involvedObject.name=build-abc,type=Warning".
+        """
+        url = f"{self.host}/api/v1/namespaces/{namespace}/events"
+        return self.watch(url, field_selector=field_selector, timeout_seconds=timeout_seconds)
+
+    def get_pod_by_job_name(self, job_name: str, namespace="nuvolaris", timeout_seconds=120):
         """
-        Get the pod name associated with a job by its name.
+        Get the pod name associated with a job by its name, waiting for the job
+        controller to create it.
         :param job_name: Name of the job.
         :param namespace: Namespace where the job is located.
+        :param timeout_seconds: Maximum time to wait for the pod.
         :return: The pod name if found, None otherwise.
         """
-        url = f"{self.host}/api/v1/namespaces/{namespace}/pods"
-        headers = {"Authorization": self.token}
+        # the job controller labels its pods with job-name
+        events = self.watch_pods(
+            namespace=namespace,
+            label_selector=f"job-name={job_name}",
+            timeout_seconds=timeout_seconds,
+        )
         try:
-            while True:
-                resp = req.get(url, headers=headers, verify=self.ssl_ca_cert)
-                if not resp.status_code in [200, 202]:
-                    logging.error(
-                        f"POST to {url} failed with {resp.status_code}. Body {resp.text}"
-                    )
-                    return None
-                logging.debug(
-                    f"POST to {url} succeeded with {resp.status_code}. Body {resp.text}"
-                )
-                pods = resp.json()["items"]
-                for pod in pods:
-                    labels = pod["metadata"].get("labels", {})
-                    if labels.get("job-name") == job_name:
-                        return pod["metadata"]["name"]
-                time.sleep(1)
-                
+            for event_type, pod in events:
+                if event_type in ["ADDED", "MODIFIED"]:
+                    return pod["metadata"]["name"]
         except Exception as ex:
             logging.error(f"get_pod_by_job_name {ex}")
             return None
+        finally:
+            events.close()
+
+        logging.error(f"Timeout waiting for pod of job '{job_name}'")
+        return None
 
     def stream_pod_logs(self, pod_name: str, namespace="nuvolaris"):
         """
@@ -578,7 +1133,8 @@ class KubeApiClient:
         """
         url = f"{self.host}/api/v1/namespaces/{namespace}/pods/{pod_name}/log?follow=true"
         headers = {"Authorization": self.token}
-        with req.get(url, headers=headers, verify=self.ssl_ca_cert, stream=True) as r:
+        # logs are followed for the whole build: only the connection has a timeout
+        with self._request("GET", url, headers=headers, stream=True, timeout=(self._connect_timeout, None)) as r:
             for line in r.iter_lines():
                 if line:
                     print(line.decode())
@@ -593,7 +1149,7 @@ class KubeApiClient:
         url = f"{self.host}/apis/batch/v1/namespaces/{namespace}/jobs/{job_name}"
         headers = {"Authorization": self.token}
         try:
-            resp = req.get(url, headers=headers, verify=self.ssl_ca_cert)
+            resp = self._request("GET", url, headers=headers)
             resp.raise_for_status()
             status = resp.json()["status"]
             if status.get("succeeded", 0) > 0:
@@ -616,7 +1172,7 @@ class KubeApiClient:
 
         try:
             logging.info(f"GET request to {url}")
-            response = req.get(url, headers=headers, verify=self.ssl_ca_cert)
+            response = self._request("GET", url, headers=headers)
 
             if response.status_code == 200:
                 logging.debug(
@@ -641,39 +1197,28 @@ class KubeApiClient:
         :param timeout_seconds: Maximum time to wait in seconds (default: 300 = 5 minutes).
         :return: True if init container completed (success or error), False if timeout or other failure.
         """
-        import time
-
-        start_time = time.time()
-        pod_name = None
-
         logging.info(f"Waiting for init container '{init_container_name}' in job '{job_name}' to complete")
 
-        # First, wait for the pod to be created
-        while time.time() - start_time < timeout_seconds:
-            pod_name = self.get_pod_by_job_name(job_name, namespace)
-            if pod_name:
-                logging.info(f"Found pod '{pod_name}' for job '{job_name}'")
-                break
-            logging.debug(f"Pod for job '{job_name}' not yet created, waiting...")
-            time.sleep(2)
-
-        if not pod_name:
-            logging.error(f"Timeout waiting for pod to be created for job '{job_name}'")
-            return False
-
-        # Now wait for the init container to complete
-        while time.time() - start_time < timeout_seconds:
-            pod = self.get_pod(pod_name, namespace)
+        # pod creation and every status change are pushed by the API server
+        events = self.watch_pods(
+            namespace=namespace,
+            label_selector=f"job-name={job_name}",
+            timeout_seconds=timeout_seconds,
+        )
+        try:
+            for event_type, pod in events:
+                pod_name = pod.get("metadata", {}).get("name")
+                if event_type == "DELETED":
+                    logging.error(f"Pod '{pod_name}' deleted before init container '{init_container_name}' completed")
+                    return False
 
-            if not pod:
-                logging.error(f"Failed to get pod '{pod_name}'")
-                return False
+                # Check init container status
+                init_container_statuses = pod.get("status", {}).get("initContainerStatuses", [])
 
-            # Check init container status
-            init_container_statuses = pod.get("status", {}).get("initContainerStatuses", [])
+                for status in init_container_statuses:
+                    if status.get("name") != init_container_name:
+                        continue
 
-            for status in init_container_statuses:
-                if status.get("name") == init_container_name:
                     state = status.get("state", {})
 
                     # Check if terminated (completed or failed)
@@ -689,17 +1234,22 @@ class KubeApiClient:
 
                         return True
 
-                    # Check if still running
-                    if "running" in state:
-                        logging.debug(f"Init container '{init_container_name}' is still running")
-
-                    # Check if waiting
                     if "waiting" in state:
-                        waiting = state["waiting"]
-                        reason = waiting.get("reason", "Unknown")
+                        reason = state["waiting"].get("reason", "Unknown")
                         logging.debug(f"Init container '{init_container_name}' is waiting, reason: {reason}")
+                    else:
+                        logging.debug(f"Init container '{init_container_name}' is still running")
 
-            time.sleep(2)
+                # an image pull error or an unschedulable pod never gets to the init container
+                failure = pod_failure_reason(pod)
+                if failure:
+                    logging.error(f"Pod '{pod_name}' cannot run init container '{init_container_name}': {failure}")
+                    return False
+        except Exception as ex:
+            logging.error(f"wait_for_init_container_completion {ex}")
+            return False
+        finally:
+            events.close()
 
         logging.error(f"Timeout waiting for init container '{init_container_name}' to complete")
-        return False
\ No newline at end of file
+        return False
@@ -19,10 +19,12 @@ import base64
 import json
 import time
 
-import requests
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding, rsa
 
+from openserverless.common.idp_http_client import shared_idp_http_client
+from openserverless.config.settings import resolve_settings
+
 
 class OidcValidationError(Exception):
     pass
@@ -47,13 +49,13 @@ def _int_b64url_decode(value):
 
 class OidcTokenValidator:
 
-    def __init__(self, environ, jwks=None, now=None):
-        self._environ = environ
+    def __init__(self, environ, jwks=None, now=None, http_client=None):
+        self._settings = resolve_settings(environ)
         self._jwks = jwks
         self._now = now
+        self._http_client = http_client if http_client is not None else shared_idp_http_client(self._settings)
 
-    def _get_required(self, key):
-        value = self._environ.get(key)
+    def _get_required(self, key, value):
         if not value:
             raise OidcValidationError(f"missing OIDC configuration: {key}")
         return value
@@ -62,8 +64,8 @@ class OidcTokenValidator:
         if self._jwks is not None:
             return self._jwks
 
-        jwks_url = self._get_required("OIDC_JWKS_URL")
-        response = requests.get(jwks_url, timeout=10)
+        jwks_url = self._get_required("OIDC_JWKS_URL", self._settings.oidc_jwks_url)
+        response = self._http_client.get(jwks_url)
         response.raise_for_status()
         self._jwks = response.json()
         return self._jwks
@@ -103,7 +105,7 @@ class OidcTokenValidator:
 
     def _validate_time_claims(self, claims):
         now = self._now if self._now is not None else int(time.time())
-        leeway = int(self._environ.get("OIDC_CLOCK_LEEWAY_SECONDS", "30"))
+        leeway = self._settings.oidc_clock_leeway_seconds
 
         exp = claims.get("exp")
         if exp is None or int(exp) < now - leeway:
@@ -114,12 +116,12 @@ class OidcTokenValidator:
             raise OidcValidationError("token is not valid yet")
 
     def _validate_issuer(self, claims):
-        expected = self._get_required("OIDC_ISSUER_URL")
+        expected = self._get_required("OIDC_ISSUER_URL", self._settings.oidc_issuer_url)
         if claims.get("iss") != expected:
             raise OidcValidationError("invalid issuer")
 
     def _validate_audience(self, claims):
-        expected = self._get_required("OIDC_AUDIENCE")
+        expected = self._get_required("OIDC_AUDIENCE", self._settings.oidc_audience)
         audience = claims.get("aud")
         if isinstance(audience, list) and expected in audience:
             return
@@ -128,11 +130,11 @@ class OidcTokenValidator:
         raise OidcValidationError("invalid audience")
 
     def _validate_required_group(self, claims):
-        required_group = self._environ.get("OIDC_REQUIRED_GROUP")
+        required_group = self._settings.oidc_required_group
         if not required_group:
             return
 
-        groups_claim = self._environ.get("OIDC_GROUPS_CLAIM", "groups")
+        groups_claim = self._settings.oidc_groups_claim
         groups = claims.get(groups_claim, [])
         if isinstance(groups, str):
             groups = [groups]
@@ -160,7 +162,7 @@ class OidcTokenValidator:
         self._validate_time_claims(claims)
         self._validate_required_group(claims)
 
-        username_claim = self._environ.get("OIDC_USERNAME_CLAIM", "preferred_username")
+        username_claim = self._settings.oidc_username_claim
         if not claims.get(username_claim):
             raise OidcValidationError(f"missing username claim: {username_claim}")
 
@@ -0,0 +1,137 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import time
+from datetime import datetime, timezone
+
+# container waiting reasons that do not resolve without a change to the pod
+FATAL_WAITING_REASONS = [
+    "ErrImagePull",
+    "ImagePullBackOff",
+    "ErrImageNeverPull",
+    "InvalidImageName",
+    "CreateContainerConfigError",
+    "CreateContainerError",
+]
+
+# warning events reporting that the pod will not start
+FATAL_EVENT_REASONS = ["InspectFailed", "Failed"]
+# scheduling and pod creation are retried, e.g. while the cluster scales up:
+# their failures are final only when they last this long
+RETRIED_EVENT_REASONS = ["FailedScheduling", "FailedCreate"]
+PERSISTENT_FAILURE_SECONDS = 60
+
+
+def _kube_timestamp(value):
+    """
+    Parse a Kubernetes timestamp, with or without microseconds, into epoch seconds.
+
+    >>> _kube_timestamp("2026-01-01T10:00:00Z")
+    1767261600.0
+    >>> _kube_timestamp("2026-01-01T10:00:00.500000Z")
+    1767261600.5
+    >>> _kube_timestamp(None) is None
+    True
+    """
+    if not value:
+        return None
+    for time_format in ("%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%dT%H:%M:%S.%fZ"):
+        try:
+            return datetime.strptime(value, time_format).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def pod_failure_reason(pod, now=None):
+    """
+    Return why the pod cannot run to completion, None while it still can.
+    A pod is unschedulable once it has been so for PERSISTENT_FAILURE_SECONDS.
+
+    >>> pod_failure_reason({"status": {"phase": "Pending"}}) is None
+    True
+    >>> pod_failure_reason({"status": {"containerStatuses": [
+    ...     {"name": "build", "state": {"waiting": {"reason": "ImagePullBackOff", "message": "not found"}}}]}})
+    'build: ImagePullBackOff: not found'
+    >>> unschedulable = {"status": {"conditions": [{"type": "PodScheduled", "status": "False",
+    ...     "reason": "Unschedulable", "message": "0/3 nodes", "lastTransitionTime": "2026-01-01T10:00:00Z"}]}}
+    >>> pod_failure_reason(unschedulable, now=1767261600.0 + 10) is None
+    True
+    >>> pod_failure_reason(unschedulable, now=1767261600.0 + 60)
+    'Unschedulable: 0/3 nodes'
+    """
+    status = pod.get("status") or {}
+
+    if status.get("phase") == "Failed":
+        return f"{status.get('reason') or 'Failed'}: {status.get('message', '')}".rstrip(": ")
+
+    for condition in status.get("conditions") or []:
+        if (
+            condition.get("type") == "PodScheduled"
+            and condition.get("status") == "False"
+            and condition.get("reason") == "Unschedulable"
+        ):
+            since = _kube_timestamp(condition.get("lastTransitionTime"))
+            now = time.time() if now is None else now
+            if since is not None and now - since >= PERSISTENT_FAILURE_SECONDS:
+                return f"Unschedulable: {condition.get('message', '')}".rstrip(": ")
+
+    statuses = (status.get("initContainerStatuses") or []) + (status.get("containerStatuses") or [])
+    for container in statuses:
+        waiting = (container.get("state") or {}).get("waiting") or {}
+        if waiting.get("reason") in FATAL_WAITING_REASONS:
+            return f"{container.get('name')}: {waiting['reason']}: {waiting.get('message', '')}".rstrip(": ")
+
+    return None
+
+
+def event_failure_reason(event):
+    """
+    Return the failure reported by a Kubernetes warning Event, None when the
+    event does not mean the pod will not start. A retried failure is final
+    once the event has repeated for PERSISTENT_FAILURE_SECONDS.
+
+    >>> event_failure_reason({"type": "Warning", "reason": "FailedMount",
+    ...     "message": 'secret "registry" not found'})
+    'FailedMount: secret "registry" not found'
+    >>> event_failure_reason({"type": "Warning", "reason": "FailedMount", "message": "timed out"}) is None
+    True
+    >>> event_failure_reason({"type": "Normal", "reason": "Pulled", "message": "ok"}) is None
+    True
+    >>> scheduling = {"type": "Warning", "reason": "FailedScheduling", "message": "0/3 nodes", "count": 2,
+    ...     "firstTimestamp": "2026-01-01T10:00:00Z", "lastTimestamp": "2026-01-01T10:00:05Z"}
+    >>> event_failure_reason(scheduling) is None
+    True
+    >>> event_failure_reason(dict(scheduling, count=5, lastTimestamp="2026-01-01T10:01:00Z"))
+    'FailedScheduling: 0/3 nodes'
+    """
+    if event.get("type") != "Warning":
+        return None
+
+    reason = event.get("reason")
+    message = event.get("message") or ""
+    # mounts are retried: only a missing secret or config map is final
+    if reason == "FailedMount" and "not found" in message:
+        return f"{reason}: {message}"
+    if reason in FATAL_EVENT_REASONS:
+        return f"{reason}: {message}"
+    if reason in RETRIED_EVENT_REASONS:
+        first = _kube_timestamp(event.get("firstTimestamp") or event.get("eventTime"))
+        last = _kube_timestamp(event.get("lastTimestamp") or (event.get("series") or {}).get("lastObservedTime"))
+        if first is not None and last is not None and last - first >= PERSISTENT_FAILURE_SECONDS:
+            return f"{reason}: {message}"
+    return None
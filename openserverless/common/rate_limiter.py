@@ -0,0 +1,104 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import contextlib
+import threading
+import time
+
+_SHARED_LIMITERS = {}
+_SHARED_LIMITERS_LOCK = threading.Lock()
+
+_PRIORITY = threading.local()
+
+
+@contextlib.contextmanager
+def background_requests():
+    """
+    Mark the calls made by the current thread as background work: they only
+    take tokens above the reserve kept for the interactive requests.
+    """
+    previous = getattr(_PRIORITY, "background", False)
+    _PRIORITY.background = True
+    try:
+        yield
+    finally:
+        _PRIORITY.background = previous
+
+
+def is_background():
+    return getattr(_PRIORITY, "background", False)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter: holds up to burst tokens, refilled at qps tokens
+    per second, and every call takes one token, waiting when none is left.
+    Background calls leave a reserve of tokens to the other calls, so that a
+    housekeeping scan cannot starve a login. A qps of 0 disables the limiter.
+    """
+
+    def __init__(self, qps, burst, reserve=0.0, clock=time.monotonic, sleep=time.sleep):
+        """
+        param: qps tokens added per second
+        param: burst size of the bucket
+        param: reserve fraction of the bucket background calls cannot use
+        """
+        self._qps = qps
+        self._burst = max(burst, 1)
+        self._reserve = min(reserve, 1.0) * (self._burst - 1)
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self._burst)
+        self._updated = clock()
+
+    def acquire(self, background=None):
+        """
+        Take a token, waiting for it as needed.
+        Return the number of seconds waited.
+        """
+        if self._qps <= 0:
+            return 0.0
+
+        if background is None:
+            background = is_background()
+        needed = 1 + self._reserve if background else 1
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._qps)
+                self._updated = now
+                if self._tokens >= needed:
+                    self._tokens -= 1
+                    return waited
+                delay = (needed - self._tokens) / self._qps
+            self._sleep(delay)
+            waited += delay
+
+
+def shared_rate_limiter(key, qps, burst, reserve=0.0):
+    """
+    Return the process wide limiter for the given key, creating it on first use.
+    """
+    with _SHARED_LIMITERS_LOCK:
+        limiter = _SHARED_LIMITERS.get(key)
+        if limiter is None:
+            limiter = TokenBucket(qps, burst, reserve=reserve)
+            _SHARED_LIMITERS[key] = limiter
+        return limiter
@@ -0,0 +1,181 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import base64
+import json
+import logging
+
+import requests
+
+# the manifest types pushed by buildkit, accepted when reading a manifest
+MANIFEST_TYPES = [
+    "application/vnd.oci.image.index.v1+json",
+    "application/vnd.oci.image.manifest.v1+json",
+    "application/vnd.docker.distribution.manifest.list.v2+json",
+    "application/vnd.docker.distribution.manifest.v2+json",
+]
+
+
+def split_image_name(image_name):
+    """
+    Split an image name, without the registry host, into repository and tag.
+
+    >>> split_image_name("devel:custom-tag")
+    ('devel', 'custom-tag')
+    >>> split_image_name("team/devel")
+    ('team/devel', 'latest')
+    """
+    repository, separator, tag = image_name.rpartition(":")
+    if not separator or "/" in tag:
+        return image_name, "latest"
+    return repository, tag
+
+
+def registry_credentials(secret, host):
+    """
+    Return the (username, password) of host in a kubernetes.io/dockerconfigjson
+    Secret, None when the Secret has no credentials for it.
+
+    >>> config = {"auths": {"http://registry:5000": {"auth": base64.b64encode(b"user:pw").decode()}}}
+    >>> data = base64.b64encode(json.dumps(config).encode()).decode()
+    >>> registry_credentials({"data": {".dockerconfigjson": data}}, "registry:5000")
+    ('user', 'pw')
+    >>> registry_credentials({"data": {".dockerconfigjson": data}}, "other:5000") is None
+    True
+    """
+    try:
+        data = (secret or {}).get("data", {}).get(".dockerconfigjson")
+        auths = json.loads(base64.b64decode(data)).get("auths", {}) if data else {}
+    except ValueError:
+        return None
+
+    for server, entry in auths.items():
+        if server.split("://")[-1].rstrip("/") != host:
+            continue
+        if entry.get("username"):
+            return entry["username"], entry.get("password", "")
+        if entry.get("auth"):
+            username, _, password = base64.b64decode(entry["auth"]).decode().partition(":")
+            return username, password
+    return None
+
+
+class RegistryClient:
+    """
+    Minimal client of the Docker Registry HTTP API v2, enough to look up,
+    add and delete tags without pulling the images.
+    Errors are logged and reported as a missing result: the callers fall back
+    to building the image.
+    """
+
+    def __init__(self, host, credentials=None, scheme="http", timeout=10, session=None):
+        self._base_url = f"{scheme}://{host}/v2"
+        self._auth = credentials
+        self._timeout = timeout
+        self._session = session if session is not None else requests.Session()
+
+    def _url(self, repository, reference):
+        return f"{self._base_url}/{repository}/manifests/{reference}"
+
+    def manifest_digest(self, repository, reference):
+        """
+        Return the digest of repository:reference, None when it does not exist.
+        """
+        url = self._url(repository, reference)
+        try:
+            response = self._session.head(
+                url,
+                headers={"Accept": ", ".join(MANIFEST_TYPES)},
+                auth=self._auth,
+                timeout=self._timeout,
+            )
+        except requests.RequestException as ex:
+            logging.warning(f"HEAD {url} failed: {ex}")
+            return None
+
+        if response.status_code == 200:
+            return response.headers.get("Docker-Content-Digest")
+        if response.status_code != 404:
+            logging.warning(f"HEAD {url} failed with {response.status_code}")
+        return None
+
+    def tag_manifest(self, repository, reference, tag):
+        """
+        Push the manifest of repository:reference as repository:tag too.
+        Return True on success.
+        """
+        url = self._url(repository, reference)
+        try:
+            response = self._session.get(
+                url,
+                headers={"Accept": ", ".join(MANIFEST_TYPES)},
+                auth=self._auth,
+                timeout=self._timeout,
+            )
+            if response.status_code != 200:
+                logging.warning(f"GET {url} failed with {response.status_code}")
+                return False
+
+            tagged = self._session.put(
+                self._url(repository, tag),
+                data=response.content,
+                headers={"Content-Type": response.headers.get("Content-Type", MANIFEST_TYPES[0])},
+                auth=self._auth,
+                timeout=self._timeout,
+            )
+            if tagged.status_code not in (200, 201):
+                logging.warning(f"PUT {self._url(repository, tag)} failed with {tagged.status_code}")
+                return False
+            return True
+        except requests.RequestException as ex:
+            logging.warning(f"tagging {repository}:{reference} as {tag} failed: {ex}")
+            return False
+
+    def list_tags(self, repository):
+        """
+        Return the tags of repository, an empty list when it does not exist.
+        """
+        url = f"{self._base_url}/{repository}/tags/list"
+        try:
+            response = self._session.get(url, auth=self._auth, timeout=self._timeout)
+        except requests.RequestException as ex:
+            logging.warning(f"GET {url} failed: {ex}")
+            return []
+
+        if response.status_code != 200:
+            if response.status_code != 404:
+                logging.warning(f"GET {url} failed with {response.status_code}")
+            return []
+        return response.json().get("tags") or []
+
+    def delete_manifest(self, repository, digest):
+        """
+        Delete the manifest with digest, with every tag pointing to it.
+        The registry must allow deletes; the blobs are freed by its own
+        garbage collection. Return True on success.
+        """
+        url = self._url(repository, digest)
+        try:
+            response = self._session.delete(url, auth=self._auth, timeout=self._timeout)
+        except requests.RequestException as ex:
+            logging.warning(f"DELETE {url} failed: {ex}")
+            return False
+
+        if response.status_code not in (200, 202, 404):
+            logging.warning(f"DELETE {url} failed with {response.status_code}")
+            return False
+        return True
@@ -19,24 +19,24 @@ import hashlib
 import re
 
 import openserverless.common.validation as validation
+from openserverless.config.settings import resolve_settings
 
 
 class SsoNamespaceMapper:
 
     def __init__(self, environ):
-        self._environ = environ
+        self._settings = resolve_settings(environ)
 
     def namespace_for(self, claims):
-        username_claim = self._environ.get("OIDC_USERNAME_CLAIM", "preferred_username")
-        external_username = claims[username_claim]
+        external_username = claims[self._settings.oidc_username_claim]
 
-        namespace_claim = self._environ.get("OIDC_NAMESPACE_CLAIM")
+        namespace_claim = self._settings.oidc_namespace_claim
         if namespace_claim and claims.get(namespace_claim):
             namespace = claims[namespace_claim]
             if validation.is_valid_username(namespace):
                 return namespace
 
-        if self._preserve_valid() and validation.is_valid_username(external_username):
+        if self._settings.sso_namespace_preserve_valid and validation.is_valid_username(external_username):
             return external_username
 
         return self._normalized_namespace(external_username, claims)
@@ -47,7 +47,7 @@ class SsoNamespaceMapper:
             base = f"{base}user"
 
         suffix = self._suffix(external_username, claims)
-        max_len = self._max_len()
+        max_len = self._settings.sso_namespace_max_length
         prefix_len = max_len - len(suffix)
         namespace = f"{base[:prefix_len]}{suffix}"
 
@@ -62,7 +62,7 @@ class SsoNamespaceMapper:
         raise ValueError("Unable to derive a valid namespace from SSO claims")
 
     def _suffix(self, external_username, claims):
-        suffix_len = self._suffix_len()
+        suffix_len = self._settings.sso_namespace_hash_length
         source = "|".join(
             [
                 claims.get("iss", ""),
@@ -71,21 +71,3 @@ class SsoNamespaceMapper:
             ]
         )
         return hashlib.sha256(source.encode("utf-8")).hexdigest()[:suffix_len]
-
-    def _preserve_valid(self):
-        value = self._environ.get("SSO_NAMESPACE_PRESERVE_VALID", "true")
-        return str(value).lower() in ["1", "true", "yes", "on"]
-
-    def _suffix_len(self):
-        try:
-            value = int(self._environ.get("SSO_NAMESPACE_HASH_LENGTH", 8))
-        except (TypeError, ValueError):
-            value = 8
-        return min(max(value, 6), 16)
-
-    def _max_len(self):
-        try:
-            value = int(self._environ.get("SSO_NAMESPACE_MAX_LENGTH", 61))
-        except (TypeError, ValueError):
-            value = 61
-        return min(max(value, 13), 61)
@@ -0,0 +1,75 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import copy
+import threading
+import time
+
+_SHARED_CACHES = {}
+_SHARED_CACHES_LOCK = threading.Lock()
+
+
+class TTLCache:
+    """
+    Cache of values loaded on demand and kept for ttl_seconds. Missing values
+    (None) are not cached, so that an object created later is found at once.
+    Reads return copies. A ttl of 0 disables the cache.
+    """
+
+    def __init__(self, ttl_seconds, clock=time.monotonic):
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key, loader):
+        """
+        Return the value cached for key, calling loader when it is missing or expired.
+        """
+        if self._ttl_seconds <= 0:
+            return loader()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self._clock():
+                return copy.deepcopy(entry[1])
+
+        value = loader()
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (self._clock() + self._ttl_seconds, value)
+        return copy.deepcopy(value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+
+
+def shared_ttl_cache(key, ttl_seconds):
+    """
+    Return the process wide cache for the given key, creating it on first use.
+    """
+    with _SHARED_CACHES_LOCK:
+        cache = _SHARED_CACHES.get(key)
+        if cache is None:
+            cache = TTLCache(ttl_seconds)
+            _SHARED_CACHES[key] = cache
+        return cache
@@ -0,0 +1,318 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import os
+import threading
+from dataclasses import dataclass
+
+from cryptography.fernet import Fernet
+
+from openserverless.error.config_exception import ConfigException
+
+TRUE_VALUES = ["1", "true", "yes", "on"]
+FALSE_VALUES = ["0", "false", "no", "off"]
+FLOW_STORE_BACKENDS = ["memory", "redis"]
+BUILD_CACHE_MODES = ["off", "min", "max"]
+
+_SETTINGS = None
+_SETTINGS_LOCK = threading.Lock()
+
+
+def _str(environ, name, default=None):
+    value = environ.get(name)
+    if value is None or str(value).strip() == "":
+        return default
+    return str(value).strip()
+
+
+def _bool(environ, name, default=False):
+    value = _str(environ, name)
+    if value is None:
+        return default
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ConfigException(f"invalid boolean for {name}: {value}")
+
+
+def _int(environ, name, default, minimum=None, maximum=None):
+    value = _str(environ, name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ConfigException(f"invalid integer for {name}: {value}")
+    if minimum is not None:
+        number = max(number, minimum)
+    if maximum is not None:
+        number = min(number, maximum)
+    return number
+
+
+def _list(environ, name):
+    value = _str(environ, name)
+    if value is None:
+        return ()
+    return tuple(item.strip() for item in value.split(",") if item.strip())
+
+
+def _float(environ, name, default):
+    value = _str(environ, name)
+    if value is None:
+        return default
+    try:
+        number = float(value)
+    except ValueError:
+        raise ConfigException(f"invalid number for {name}: {value}")
+    if number < 0:
+        raise ConfigException(f"{name} cannot be negative: {value}")
+    return number
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    The admin api configuration, parsed and validated once from the environment.
+    Invalid values raise a ConfigException when the settings are built, so a
+    misconfigured deployment fails at boot instead of on the first request.
+    """
+
+    listen_port: int = 5000
+    # waitress worker threads; SSO device login long-polls hold up to a quarter of them
+    listen_threads: int = 16
+    api_replicas: int = 1
+    strict_user_check: bool = True
+    registry_host: str | None = None
+    registry_scheme: str = "http"
+    build_cleanup_concurrency: int = 8
+    build_job_ttl_seconds: int = 86400
+    build_monitor_seconds: int = 120
+    build_workers: int = 4
+    build_record_ttl_seconds: int = 86400
+    # the build limits are enforced per process: each admin-api replica runs
+    # up to build_max_running builds, build_max_running_per_user per user
+    build_max_running: int = 10
+    build_max_running_per_user: int = 2
+    build_max_queued: int = 100
+    build_dedup: bool = True
+    build_cache_mode: str = "min"
+    build_cache_repository: str = "buildcache"
+    build_cache_max_age_seconds: int = 604800
+    buildkit_pool_addresses: tuple = ()
+    # per process: each admin-api replica sends up to this many builds to a daemon
+    buildkit_pool_max_builds: int = 4
+    buildkit_pool_health_seconds: float = 10
+    build_cpu_limit: str | None = None
+    build_memory_limit: str | None = None
+
+    kube_connect_timeout_seconds: float = 5
+    kube_read_timeout_seconds: float = 30
+    kube_write_timeout_seconds: float = 60
+    kube_http_pool_size: int = 10
+    kube_read_qps: float = 20
+    kube_read_burst: int = 40
+    kube_write_qps: float = 10
+    kube_write_burst: int = 20
+    kube_priority_reserve: float = 0.25
+    kube_list_page_size: int = 500
+    kube_config_cache_seconds: float = 30
+    kube_informers: bool = False
+    kube_informer_resync_seconds: float = 300
+
+    oidc_issuer_url: str | None = None
+    oidc_audience: str | None = None
+    oidc_jwks_url: str | None = None
+    oidc_username_claim: str = "preferred_username"
+    oidc_namespace_claim: str | None = None
+    oidc_groups_claim: str = "groups"
+    oidc_required_group: str | None = None
+    oidc_clock_leeway_seconds: int = 30
+    oidc_provider: str = "keycloak"
+    oidc_client_id: str | None = None
+    oidc_client_secret: str = ""
+    oidc_device_scope: str = "openid email profile"
+    oidc_password_scope: str = "openid email profile"
+    oidc_device_authorization_url: str | None = None
+    oidc_token_url: str | None = None
+    oidc_device_background_poll: bool = False
+    oidc_device_wait_max_seconds: float = 10
+    oidc_http_pool_size: int = 10
+    oidc_http_timeout_seconds: float = 10
+    oidc_flow_store: str = "memory"
+    oidc_flow_store_redis_url: str | None = None
+    oidc_flow_store_key: str | None = None
+
+    sso_namespace_preserve_valid: bool = True
+    sso_namespace_hash_length: int = 8
+    sso_namespace_max_length: int = 61
+
+    sso_autoprovision_on_login: bool = False
+    sso_autoprovision_async: bool = False
+    sso_autoprovision_timeout_seconds: int = 120
+    sso_autoprovision_poll_seconds: float = 2
+    sso_autoprovision_recheck_seconds: float = 15
+    sso_autoprovision_ticket_ttl_seconds: int = 600
+    sso_autoprovision_default_services: str = "all"
+    sso_autoprovision_storage_quota: str = "auto"
+    sso_warm_pool_size: int = 0
+    sso_warm_pool_prefix: str = "ws"
+    sso_warm_pool_email_domain: str = "pool.invalid"
+    sso_warm_pool_refill_seconds: float = 30
+
+    @classmethod
+    def from_environ(cls, environ):
+        issuer_url = _str(environ, "OIDC_ISSUER_URL")
+        issuer_base = issuer_url.rstrip("/") if issuer_url else None
+
+        flow_store = (_str(environ, "OIDC_FLOW_STORE") or "memory").lower()
+        if flow_store not in FLOW_STORE_BACKENDS:
+            raise ConfigException(f"Unsupported OIDC_FLOW_STORE backend: {flow_store}")
+        flow_store_redis_url = _str(environ, "OIDC_FLOW_STORE_REDIS_URL")
+        if flow_store == "redis" and not flow_store_redis_url:
+            raise ConfigException("missing OIDC_FLOW_STORE_REDIS_URL")
+        # flows, provisioning tickets and build records live in the process
+        # with the memory store: another replica would not find them
+        api_replicas = _int(environ, "API_REPLICAS", 1, minimum=1)
+        if api_replicas > 1 and flow_store == "memory":
+            raise ConfigException(f"API_REPLICAS={api_replicas} requires OIDC_FLOW_STORE=redis")
+        # the key sealing the tokens of the completed flows, shared by the replicas
+        flow_store_key = _str(environ, "OIDC_FLOW_STORE_KEY")
+        if flow_store_key:
+            try:
+                Fernet(flow_store_key)
+            except (ValueError, TypeError):
+                raise ConfigException("invalid OIDC_FLOW_STORE_KEY, expected a Fernet key")
+        elif api_replicas > 1:
+            raise ConfigException(f"API_REPLICAS={api_replicas} requires OIDC_FLOW_STORE_KEY")
+
+        registry_scheme = (_str(environ, "REGISTRY_SCHEME") or "http").lower()
+        if registry_scheme not in ("http", "https"):
+            raise ConfigException(f"Unsupported REGISTRY_SCHEME: {registry_scheme}")
+
+        build_cache_mode = (_str(environ, "BUILD_CACHE_MODE") or "min").lower()
+        if build_cache_mode not in BUILD_CACHE_MODES:
+            raise ConfigException(f"Unsupported BUILD_CACHE_MODE: {build_cache_mode}")
+
+        buildkit_pool_addresses = _list(environ, "BUILDKIT_POOL_ADDRESSES")
+        for address in buildkit_pool_addresses:
+            if not address.startswith("tcp://") or ":" not in address[len("tcp://"):]:
+                raise ConfigException(f"invalid BUILDKIT_POOL_ADDRESSES entry, expected tcp://host:port: {address}")
+
+        return cls(
+            listen_port=_int(environ, "LISTEN_PORT", 5000),
+            listen_threads=_int(environ, "LISTEN_THREADS", 16, minimum=1),
+            api_replicas=api_replicas,
+            strict_user_check=_bool(environ, "STRICT_USER_CHECK", True),
+            registry_host=_str(environ, "REGISTRY_HOST"),
+            registry_scheme=registry_scheme,
+            build_cleanup_concurrency=_int(environ, "BUILD_CLEANUP_CONCURRENCY", 8, minimum=1),
+            build_job_ttl_seconds=_int(environ, "BUILD_JOB_TTL_SECONDS", 86400, minimum=0),
+            build_monitor_seconds=_int(environ, "BUILD_MONITOR_SECONDS", 120, minimum=0),
+            build_workers=_int(environ, "BUILD_WORKERS", 4, minimum=1),
+            build_record_ttl_seconds=_int(environ, "BUILD_RECORD_TTL_SECONDS", 86400, minimum=1),
+            build_max_running=_int(environ, "BUILD_MAX_RUNNING", 10, minimum=1),
+            build_max_running_per_user=_int(environ, "BUILD_MAX_RUNNING_PER_USER", 2, minimum=1),
+            build_max_queued=_int(environ, "BUILD_MAX_QUEUED", 100, minimum=0),
+            build_dedup=_bool(environ, "BUILD_DEDUP", True),
+            build_cache_mode=build_cache_mode,
+            build_cache_repository=_str(environ, "BUILD_CACHE_REPOSITORY", "buildcache"),
+            build_cache_max_age_seconds=_int(environ, "BUILD_CACHE_MAX_AGE_SECONDS", 604800, minimum=0),
+            buildkit_pool_addresses=buildkit_pool_addresses,
+            buildkit_pool_max_builds=_int(environ, "BUILDKIT_POOL_MAX_BUILDS", 4, minimum=1),
+            buildkit_pool_health_seconds=_float(environ, "BUILDKIT_POOL_HEALTH_SECONDS", 10),
+            build_cpu_limit=_str(environ, "BUILD_CPU_LIMIT"),
+            build_memory_limit=_str(environ, "BUILD_MEMORY_LIMIT"),
+            kube_connect_timeout_seconds=_float(environ, "KUBE_CONNECT_TIMEOUT_SECONDS", 5),
+            kube_read_timeout_seconds=_float(environ, "KUBE_READ_TIMEOUT_SECONDS", 30),
+            kube_write_timeout_seconds=_float(environ, "KUBE_WRITE_TIMEOUT_SECONDS", 60),
+            kube_http_pool_size=_int(environ, "KUBE_HTTP_POOL_SIZE", 10, minimum=1),
+            kube_read_qps=_float(environ, "KUBE_READ_QPS", 20),
+            kube_read_burst=_int(environ, "KUBE_READ_BURST", 40, minimum=1),
+            kube_write_qps=_float(environ, "KUBE_WRITE_QPS", 10),
+            kube_write_burst=_int(environ, "KUBE_WRITE_BURST", 20, minimum=1),
+            kube_priority_reserve=_float(environ, "KUBE_PRIORITY_RESERVE", 0.25),
+            kube_list_page_size=_int(environ, "KUBE_LIST_PAGE_SIZE", 500, minimum=1),
+            kube_config_cache_seconds=_float(environ, "KUBE_CONFIG_CACHE_SECONDS", 30),
+            kube_informers=_bool(environ, "KUBE_INFORMERS"),
+            kube_informer_resync_seconds=_float(environ, "KUBE_INFORMER_RESYNC_SECONDS", 300),
+            oidc_issuer_url=issuer_url,
+            oidc_audience=_str(environ, "OIDC_AUDIENCE"),
+            oidc_jwks_url=_str(environ, "OIDC_JWKS_URL"),
+            oidc_username_claim=_str(environ, "OIDC_USERNAME_CLAIM", "preferred_username"),
+            oidc_namespace_claim=_str(environ, "OIDC_NAMESPACE_CLAIM"),
+            oidc_groups_claim=_str(environ, "OIDC_GROUPS_CLAIM", "groups"),
+            oidc_required_group=_str(environ, "OIDC_REQUIRED_GROUP"),
+            oidc_clock_leeway_seconds=_int(environ, "OIDC_CLOCK_LEEWAY_SECONDS", 30, minimum=0),
+            oidc_provider=_str(environ, "OIDC_PROVIDER", "keycloak"),
+            oidc_client_id=_str(environ, "OIDC_CLIENT_ID") or _str(environ, "OIDC_AUDIENCE"),
+            oidc_client_secret=_str(environ, "OIDC_CLIENT_SECRET", ""),
+            oidc_device_scope=_str(environ, "OIDC_DEVICE_SCOPE", "openid email profile"),
+            oidc_password_scope=_str(environ, "OIDC_PASSWORD_SCOPE", "openid email profile"),
+            oidc_device_authorization_url=_str(environ, "OIDC_DEVICE_AUTHORIZATION_URL")
+            or (issuer_base and f"{issuer_base}/protocol/openid-connect/auth/device"),
+            oidc_token_url=_str(environ, "OIDC_TOKEN_URL")
+            or (issuer_base and f"{issuer_base}/protocol/openid-connect/token"),
+            oidc_device_background_poll=_bool(environ, "OIDC_DEVICE_BACKGROUND_POLL"),
+            oidc_device_wait_max_seconds=_float(environ, "OIDC_DEVICE_WAIT_MAX_SECONDS", 10),
+            oidc_http_pool_size=_int(environ, "OIDC_HTTP_POOL_SIZE", 10, minimum=1),
+            oidc_http_timeout_seconds=_float(environ, "OIDC_HTTP_TIMEOUT_SECONDS", 10),
+            oidc_flow_store=flow_store,
+            oidc_flow_store_redis_url=flow_store_redis_url,
+            oidc_flow_store_key=flow_store_key,
+            sso_namespace_preserve_valid=_bool(environ, "SSO_NAMESPACE_PRESERVE_VALID", True),
+            sso_namespace_hash_length=_int(environ, "SSO_NAMESPACE_HASH_LENGTH", 8, minimum=6, maximum=16),
+            sso_namespace_max_length=_int(environ, "SSO_NAMESPACE_MAX_LENGTH", 61, minimum=13, maximum=61),
+            sso_autoprovision_on_login=_bool(environ, "SSO_AUTOPROVISION_ON_LOGIN"),
+            sso_autoprovision_async=_bool(environ, "SSO_AUTOPROVISION_ASYNC"),
+            sso_autoprovision_timeout_seconds=_int(environ, "SSO_AUTOPROVISION_TIMEOUT_SECONDS", 120, minimum=0),
+            sso_autoprovision_poll_seconds=_float(environ, "SSO_AUTOPROVISION_POLL_SECONDS", 2),
+            sso_autoprovision_recheck_seconds=_float(environ, "SSO_AUTOPROVISION_RECHECK_SECONDS", 15),
+            sso_autoprovision_ticket_ttl_seconds=_int(
+                environ, "SSO_AUTOPROVISION_TICKET_TTL_SECONDS", 600, minimum=1
+            ),
+            sso_autoprovision_default_services=_str(environ, "SSO_AUTOPROVISION_DEFAULT_SERVICES", "all"),
+            sso_autoprovision_storage_quota=_str(environ, "SSO_AUTOPROVISION_STORAGE_QUOTA", "auto"),
+            sso_warm_pool_size=_int(environ, "SSO_WARM_POOL_SIZE", 0, minimum=0),
+            sso_warm_pool_prefix=_str(environ, "SSO_WARM_POOL_PREFIX", "ws"),
+            sso_warm_pool_email_domain=_str(environ, "SSO_WARM_POOL_EMAIL_DOMAIN", "pool.invalid"),
+            sso_warm_pool_refill_seconds=_float(environ, "SSO_WARM_POOL_REFILL_SECONDS", 30),
+        )
+
+
+def get_settings():
+    """
+    Return the process wide settings, parsed from os.environ on first use.
+    """
+    global _SETTINGS
+    with _SETTINGS_LOCK:
+        if _SETTINGS is None:
+            _SETTINGS = Settings.from_environ(os.environ)
+        return _SETTINGS
+
+
+def resolve_settings(environ):
+    """
+    Return the settings for the given environment: the shared settings for
+    os.environ, a new parse for any other mapping (e.g. in tests).
+    """
+    if isinstance(environ, Settings):
+        return environ
+    if environ is os.environ:
+        return get_settings()
+    return Settings.from_environ(environ)
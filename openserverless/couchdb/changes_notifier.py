@@ -0,0 +1,122 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import logging
+import threading
+
+_SHARED_NOTIFIERS = {}
+_SHARED_NOTIFIERS_LOCK = threading.Lock()
+
+
+class ChangesNotifier:
+    """
+    Wake up threads waiting for a document to appear in a CouchDB database.
+    All the waiters share a single upstream _changes long-poll, filtered server
+    side on the key field; the watch only runs while somebody is waiting.
+    """
+
+    def __init__(self, couch_db, database, key_field="login", timeout_seconds=30, retry_seconds=2):
+        self._couch_db = couch_db
+        self._database = database
+        self._key_field = key_field
+        self._timeout_seconds = timeout_seconds
+        self._retry_seconds = retry_seconds
+        self._condition = threading.Condition()
+        self._waiters = {}
+        self._docs = {}
+        self._since = None
+        self._running = False
+
+    def subscribe(self, key):
+        """
+        Register interest in the document with the given key. Documents written
+        after subscribe returns are always notified: check for an existing
+        document only after subscribing.
+        """
+        with self._condition:
+            if not self._running:
+                self._since = self._couch_db.last_seq(self._database) or "now"
+                self._running = True
+                threading.Thread(
+                    target=self._run,
+                    name=f"couchdb-changes-{self._database}",
+                    daemon=True,
+                ).start()
+            self._waiters[key] = self._waiters.get(key, 0) + 1
+
+    def unsubscribe(self, key):
+        with self._condition:
+            count = self._waiters.get(key, 0) - 1
+            if count > 0:
+                self._waiters[key] = count
+            else:
+                self._waiters.pop(key, None)
+                self._docs.pop(key, None)
+
+    def wait(self, key, timeout):
+        """
+        Block until the document with the given key is notified or timeout expires.
+        Return the document, None on timeout.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: key in self._docs, timeout)
+            return self._docs.get(key)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._waiters:
+                    self._running = False
+                    return
+                since = self._since
+
+            try:
+                feed = self._couch_db.changes(
+                    self._database,
+                    since,
+                    selector={self._key_field: {"$exists": True}},
+                    timeout_seconds=self._timeout_seconds,
+                )
+            except Exception as ex:
+                logging.warning(f"{self._database} changes feed failed: {ex}")
+                feed = None
+
+            if feed is None:
+                with self._condition:
+                    self._condition.wait(self._retry_seconds)
+                continue
+
+            with self._condition:
+                self._since = feed.get("last_seq", since)
+                for change in feed.get("results", []):
+                    doc = change.get("doc") or {}
+                    key = doc.get(self._key_field)
+                    if key in self._waiters and not change.get("deleted"):
+                        self._docs[key] = doc
+                self._condition.notify_all()
+
+
+def shared_changes_notifier(couch_db, database, key_field="login"):
+    """
+    Return the process wide notifier for the given database, creating it on first use.
+    """
+    with _SHARED_NOTIFIERS_LOCK:
+        notifier = _SHARED_NOTIFIERS.get(database)
+        if notifier is None:
+            notifier = ChangesNotifier(couch_db, database, key_field=key_field)
+            _SHARED_NOTIFIERS[database] = notifier
+        return notifier
@@ -154,6 +154,41 @@ class CouchDB:
         res = self.db_session.put(url, json=roles)
         return res.status_code in [200, 201, 421]
 
+    # return the current update sequence of the database, None on failure
+    def last_seq(self, database):
+        url = f"{self.db_base}{database}"
+        r = self.db_session.get(url, timeout=10)
+        if r.status_code == 200:
+            return json.loads(r.text)["update_seq"]
+
+        logging.warning(f"query to {url} failed with {r.status_code}. Body {r.text}")
+        return None
+
+    #
+    # Long-poll the _changes feed from the given sequence, optionally filtering
+    # documents server side with a mango selector. Return the parsed feed
+    # ({"results": [...], "last_seq": ...}) or None on failure.
+    #
+    def changes(self, database, since, selector=None, timeout_seconds=30, include_docs=True):
+        url = f"{self.db_base}{database}/_changes"
+        params = {
+            "feed": "longpoll",
+            "since": since,
+            "timeout": int(timeout_seconds * 1000),
+            "include_docs": "true" if include_docs else "false",
+        }
+        body = {}
+        if selector:
+            params["filter"] = "_selector"
+            body["selector"] = selector
+
+        r = self.db_session.post(url, params=params, json=body, timeout=timeout_seconds + 10)
+        if r.status_code == 200:
+            return json.loads(r.text)
+
+        logging.warning(f"query to {url} failed with {r.status_code}. Body {r.text}")
+        return None
+
     #
     # Submit a POST request to the _find endpoint using the specified selector
     #
@@ -25,4 +25,10 @@ class EncodeError(Exception):
     pass
 
 class AuthorizationError(Exception):
-    pass
\ No newline at end of file
+    pass
+
+class QueueFullError(Exception):
+    pass
+
+class InvalidBuildError(Exception):
+    pass
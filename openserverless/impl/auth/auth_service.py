@@ -30,7 +30,12 @@ from openserverless.common.oidc_validator import (
     OidcTokenValidator,
     OidcValidationError,
 )
+from openserverless.common.flow_store import PROVISIONING_TICKET_PREFIX, shared_flow_store
+from openserverless.common.identity_map import IdentityMap
 from openserverless.common.sso_namespace import SsoNamespaceMapper
+from openserverless.config.settings import resolve_settings
+from openserverless.couchdb.changes_notifier import shared_changes_notifier
+from openserverless.impl.auth.warm_pool import shared_warm_pool, sso_identity
 from openserverless.couchdb.couchdb_util import CouchDB
 from openserverless.common.kube_api_client import KubeApiClient
 
@@ -42,15 +47,60 @@ SSO_SUB_ANNOTATION = "openserverless.apache.org/sso-sub"
 SSO_ISSUER_ANNOTATION = "openserverless.apache.org/sso-issuer"
 SSO_DISABLED_ANNOTATION = "openserverless.apache.org/sso-disabled"
 
+PROVISIONING_REQUESTED = "requested"
+PROVISIONING_CR_CREATED = "cr_created"
+PROVISIONING_METADATA_WRITTEN = "metadata_written"
+PROVISIONING_READY = "ready"
+
+WHISK_USER_KIND = "whisk_user"
+USER_DATA_KIND = "user_data"
+
 
 class AuthService:
 
-    def __init__(self, environ=os.environ, couch_db=None, kube_client=None):
-        self._environ = environ
+    def __init__(
+        self,
+        environ=os.environ,
+        couch_db=None,
+        kube_client=None,
+        user_data_notifier=None,
+        ticket_store=None,
+        warm_pool=None,
+    ):
+        self._settings = resolve_settings(environ)
         self.couch_db = couch_db if couch_db is not None else CouchDB()
         self.kube_client = kube_client if kube_client is not None else KubeApiClient()
+        self._user_data_notifier = user_data_notifier
+        self._ticket_store = ticket_store
+        self._warm_pool = warm_pool
+        # AuthService is built per request: lookups are shared by all the login checks
+        self._identity_map = IdentityMap()
+
+    def fetch_user_data(self, login: str, refresh=False):
+        """
+        Return the user metadata, loading it at most once per request unless refresh is set.
+        """
+        if refresh:
+            self._identity_map.evict(USER_DATA_KIND, login)
+        return self._identity_map.get_or_load(
+            USER_DATA_KIND, login, lambda: self._query_user_data(login)
+        )
+
+    def get_whisk_user(self, login, refresh=False):
+        """
+        Return the WhiskUser resource, loading it at most once per request unless
+        refresh is set. A refresh reads the API server, not the informer cache.
+        """
+        if refresh:
+            self._identity_map.evict(WHISK_USER_KIND, login)
+            return self._identity_map.get_or_load(
+                WHISK_USER_KIND, login, lambda: self.kube_client.get_whisk_user(login, cached=False)
+            )
+        return self._identity_map.get_or_load(
+            WHISK_USER_KIND, login, lambda: self.kube_client.get_whisk_user(login)
+        )
 
-    def fetch_user_data(self, login: str):
+    def _query_user_data(self, login: str):
         logging.info(f"searching for user {login} data")
         try:
             selector = {"selector": {"login": {"$eq": login}}}
@@ -119,7 +169,7 @@ class AuthService:
 
     def login_oidc(self, access_token, expected_namespace=None):
         try:
-            validator = OidcTokenValidator(self._environ)
+            validator = OidcTokenValidator(self._settings)
             claims = validator.validate(access_token)
         except OidcForbiddenError:
             return res_builder.build_error_message("Forbidden", 403)
@@ -127,14 +177,20 @@ class AuthService:
             logging.warning(f"OIDC token validation failed: {exc}")
             return res_builder.build_error_message("Invalid OIDC token", 401)
 
-        username_claim = self._environ.get("OIDC_USERNAME_CLAIM", "preferred_username")
-        external_username = claims[username_claim]
+        external_username = claims[self._settings.oidc_username_claim]
         try:
-            login = SsoNamespaceMapper(self._environ).namespace_for(claims)
+            login = SsoNamespaceMapper(self._settings).namespace_for(claims)
         except ValueError as exc:
             logging.warning(f"OIDC user {external_username} namespace mapping failed: {exc}")
             return res_builder.build_error_message("Invalid OIDC namespace mapping", 400)
 
+        pool = self.warm_pool()
+        if pool is not None and not self.fetch_user_data(login):
+            bound = pool.find_bound(sso_identity(claims))
+            if bound:
+                login = bound["metadata"]["name"]
+                self._identity_map.put(WHISK_USER_KIND, login, bound)
+
         if expected_namespace and login != expected_namespace:
             logging.warning(
                 f"OIDC user {external_username} resolved namespace {login} "
@@ -151,6 +207,18 @@ class AuthService:
 
         user_data = self.fetch_user_data(login)
 
+        if not user_data and pool is not None and not expected_namespace:
+            pooled_login = self.claim_warm_namespace(pool, external_username, claims)
+            if pooled_login:
+                # a namespace still being reconciled goes through the usual wait below
+                login = pooled_login
+                user_data = self.fetch_user_data(login)
+
+        if not user_data and self._settings.sso_autoprovision_async:
+            ticket = self.start_oidc_provisioning_if_enabled(login, external_username, claims)
+            if ticket:
+                return self._provisioning_response(ticket, login)
+
         if not user_data:
             user_data = self.provision_oidc_user_if_enabled(login, external_username, claims)
 
@@ -158,6 +226,16 @@ class AuthService:
             logging.warning(f"OIDC user {external_username} has no provisioned namespace")
             return res_builder.build_error_message("Namespace not provisioned", 404)
 
+        return self._oidc_login_response(login, user_data)
+
+    def is_login_ready(self, user_data):
+        """
+        Whether the metadata of a user carry the AUTH returned by the login,
+        looked up in the same env and userenv merge as the login response.
+        """
+        return bool(user_data) and "AUTH" in self.map_login_data(user_data)
+
+    def _oidc_login_response(self, login, user_data):
         login_data = self.map_login_data(user_data)
         if "AUTH" not in login_data:
             logging.error(f"OIDC user {login} metadata is missing AUTH")
@@ -167,8 +245,87 @@ class AuthService:
         login_data["NAMESPACE"] = login
         return res_builder.build_response_with_data(login_data)
 
+    def start_oidc_provisioning_if_enabled(self, login, external_username, claims):
+        """
+        Create the WhiskUser without waiting for the operator, and return a
+        provisioning ticket to be polled with provisioning_status.
+        Return None when the user cannot be provisioned.
+        """
+        if not self._settings.sso_autoprovision_on_login:
+            return None
+
+        email = claims.get("email")
+        if not email:
+            logging.warning(f"OIDC user {login} cannot be provisioned without email")
+            return None
+
+        if not self.ensure_whisk_user(login, external_username, email, claims):
+            return None
+
+        ticket = secrets.token_urlsafe(32)
+        ttl = self._settings.sso_autoprovision_ticket_ttl_seconds
+        self._tickets().put(ticket, {"login": login, "expires_at": time.time() + ttl})
+        logging.info(f"OIDC user {login} provisioning started")
+        return ticket
+
+    def provisioning_status(self, ticket):
+        """
+        Report the progress of an asynchronous provisioning: 202 with the current
+        phase until the namespace is ready, then the OIDC login payload.
+        """
+        record = self._tickets().get(ticket) if ticket else None
+        if not record:
+            return res_builder.build_error_message("Invalid provisioning ticket", 404)
+
+        login = record["login"]
+        if time.time() >= record["expires_at"]:
+            self._tickets().pop(ticket)
+            logging.warning(f"timeout waiting for OIDC namespace {login}")
+            return res_builder.build_error_message("Namespace provisioning timed out", 504)
+
+        user_data = self.fetch_user_data(login)
+        if self.is_login_ready(user_data):
+            if self._tickets().pop(ticket) is None:
+                return res_builder.build_error_message("Invalid provisioning ticket", 404)
+            return self._oidc_login_response(login, user_data)
+
+        return self._provisioning_response(ticket, login, user_data)
+
+    def _provisioning_response(self, ticket, login, user_data=None):
+        metadata_written = bool(user_data)
+        ready = self.is_login_ready(user_data)
+        cr_created = metadata_written or bool(self.get_whisk_user(login))
+        if ready:
+            phase = PROVISIONING_READY
+        elif metadata_written:
+            phase = PROVISIONING_METADATA_WRITTEN
+        elif cr_created:
+            phase = PROVISIONING_CR_CREATED
+        else:
+            phase = PROVISIONING_REQUESTED
+
+        return res_builder.build_response_with_data(
+            {
+                "status": "provisioning",
+                "ticket": ticket,
+                "phase": phase,
+                "progress": {
+                    PROVISIONING_CR_CREATED: cr_created,
+                    PROVISIONING_METADATA_WRITTEN: metadata_written,
+                    PROVISIONING_READY: ready,
+                },
+                "interval": self._settings.sso_autoprovision_poll_seconds,
+            },
+            202,
+        )
+
+    def _tickets(self):
+        if self._ticket_store is None:
+            self._ticket_store = shared_flow_store(self._settings, prefix=PROVISIONING_TICKET_PREFIX)
+        return self._ticket_store
+
     def provision_oidc_user_if_enabled(self, login, external_username, claims):
-        if not self._is_truthy(self._environ.get("SSO_AUTOPROVISION_ON_LOGIN")):
+        if not self._settings.sso_autoprovision_on_login:
             return None
 
         email = claims.get("email")
@@ -182,7 +339,7 @@ class AuthService:
         return self.wait_for_user_data(login)
 
     def ensure_whisk_user(self, login, external_username, email, claims):
-        existing_whisk_user = self.kube_client.get_whisk_user(login)
+        existing_whisk_user = self.get_whisk_user(login)
         if existing_whisk_user:
             logging.info(f"WhiskUser for OIDC user {login} already exists")
             return True
@@ -190,20 +347,87 @@ class AuthService:
         whisk_user = self.build_sso_whisk_user(login, external_username, email, claims)
         if self.kube_client.create_whisk_user(whisk_user):
             logging.info(f"WhiskUser for OIDC user {login} created")
+            self._identity_map.put(WHISK_USER_KIND, login, whisk_user)
             return True
 
         # A concurrent login may have created the CR between get and create.
-        if self.kube_client.get_whisk_user(login):
+        if self.get_whisk_user(login, refresh=True):
             logging.info(f"WhiskUser for OIDC user {login} found after create conflict")
             return True
 
         logging.error(f"failed to create WhiskUser for OIDC user {login}")
         return False
 
+    def warm_pool(self):
+        """
+        Return the warm namespace pool when SSO_WARM_POOL_SIZE is set, None otherwise.
+        """
+        if self._warm_pool is not None:
+            return self._warm_pool
+        if not self._settings.sso_autoprovision_on_login:
+            return None
+        if self._settings.sso_warm_pool_size <= 0:
+            return None
+        self._warm_pool = shared_warm_pool(
+            self.kube_client,
+            self.build_pool_whisk_user,
+            self._settings.sso_warm_pool_size,
+            name_prefix=self._settings.sso_warm_pool_prefix,
+            refill_seconds=self._settings.sso_warm_pool_refill_seconds,
+        )
+        return self._warm_pool
+
+    def claim_warm_namespace(self, pool, external_username, claims):
+        """
+        Bind a pooled namespace to the SSO user, return its login or None.
+        """
+        email = claims.get("email")
+        if not email:
+            logging.warning(f"OIDC user {external_username} cannot be provisioned without email")
+            return None
+
+        def bind(whisk_user):
+            whisk_user["metadata"].setdefault("annotations", {}).update(
+                self._sso_annotations(external_username, claims)
+            )
+            whisk_user["spec"]["email"] = email
+
+        whisk_user = pool.claim(sso_identity(claims), bind)
+        if not whisk_user:
+            return None
+
+        login = whisk_user["metadata"]["name"]
+        self._identity_map.put(WHISK_USER_KIND, login, whisk_user)
+        logging.info(f"OIDC user {external_username} bound to warm namespace {login}")
+        return login
+
+    def build_pool_whisk_user(self, login):
+        return self._build_whisk_user(
+            login,
+            f"{login}@{self._settings.sso_warm_pool_email_domain}",
+            {SSO_MODE_ANNOTATION: "sso"},
+        )
+
     def build_sso_whisk_user(self, login, external_username, email, claims):
+        return self._build_whisk_user(
+            login,
+            email,
+            self._sso_annotations(external_username, claims),
+        )
+
+    def _sso_annotations(self, external_username, claims):
+        return {
+            SSO_PROVIDER_ANNOTATION: self._settings.oidc_provider,
+            SSO_MODE_ANNOTATION: "sso",
+            SSO_USERNAME_ANNOTATION: external_username,
+            SSO_SUB_ANNOTATION: claims.get("sub", ""),
+            SSO_ISSUER_ANNOTATION: claims.get("iss", ""),
+        }
+
+    def _build_whisk_user(self, login, email, annotations):
         auth = self._random_auth()
         password = self._random_secret(24)
-        services = self._environ.get("SSO_AUTOPROVISION_DEFAULT_SERVICES", "all")
+        services = self._settings.sso_autoprovision_default_services
 
         whisk_user = {
             "apiVersion": "nuvolaris.org/v1",
@@ -211,13 +435,7 @@ class AuthService:
             "metadata": {
                 "name": login,
                 "namespace": "nuvolaris",
-                "annotations": {
-                    SSO_PROVIDER_ANNOTATION: self._environ.get("OIDC_PROVIDER", "keycloak"),
-                    SSO_MODE_ANNOTATION: "sso",
-                    SSO_USERNAME_ANNOTATION: external_username,
-                    SSO_SUB_ANNOTATION: claims.get("sub", ""),
-                    SSO_ISSUER_ANNOTATION: claims.get("iss", ""),
-                },
+                "annotations": annotations,
             },
             "spec": {
                 "email": email,
@@ -245,7 +463,7 @@ class AuthService:
             }
             whisk_user["spec"]["object-storage"] = {
                 "password": self._random_secret(40),
-                "quota": self._environ.get("SSO_AUTOPROVISION_STORAGE_QUOTA", "auto"),
+                "quota": self._settings.sso_autoprovision_storage_quota,
                 "data": {"enabled": True, "bucket": f"{login}-data"},
                 "route": {"enabled": True, "bucket": f"{login}-web"},
             }
@@ -258,12 +476,43 @@ class AuthService:
         return whisk_user
 
     def wait_for_user_data(self, login):
-        timeout_seconds = self._int_env("SSO_AUTOPROVISION_TIMEOUT_SECONDS", 120)
-        poll_seconds = self._float_env("SSO_AUTOPROVISION_POLL_SECONDS", 2)
+        timeout_seconds = self._settings.sso_autoprovision_timeout_seconds
         deadline = time.monotonic() + timeout_seconds
 
+        notifier = self._notifier()
+        if notifier is None:
+            return self._poll_for_user_data(login, deadline)
+
+        try:
+            notifier.subscribe(login)
+        except Exception as ex:
+            logging.warning(f"cannot watch {USER_META_DBN} changes, polling instead: {ex}")
+            return self._poll_for_user_data(login, deadline)
+
+        recheck_seconds = self._settings.sso_autoprovision_recheck_seconds
+        try:
+            user_data = self.fetch_user_data(login, refresh=True)
+            while not user_data:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logging.warning(f"timeout waiting for OIDC namespace {login}")
+                    return None
+
+                user_data = notifier.wait(login, min(remaining, recheck_seconds))
+                if not user_data:
+                    # the feed can miss a document only while failing: recheck now and then
+                    user_data = self.fetch_user_data(login, refresh=True)
+
+            self._identity_map.put(USER_DATA_KIND, login, user_data)
+            return user_data
+        finally:
+            notifier.unsubscribe(login)
+
+    def _poll_for_user_data(self, login, deadline):
+        poll_seconds = self._settings.sso_autoprovision_poll_seconds
+
         while True:
-            user_data = self.fetch_user_data(login)
+            user_data = self.fetch_user_data(login, refresh=True)
             if user_data:
                 return user_data
 
@@ -273,6 +522,13 @@ class AuthService:
 
             time.sleep(poll_seconds)
 
+    def _notifier(self):
+        if self._user_data_notifier is not None:
+            return self._user_data_notifier
+        if not hasattr(self.couch_db, "changes"):
+            return None
+        return shared_changes_notifier(self.couch_db, USER_META_DBN)
+
     def _random_auth(self):
         return f"{self._random_uuid()}:{self._random_secret(64)}"
 
@@ -287,23 +543,11 @@ class AuthService:
     def _is_truthy(self, value):
         return str(value or "").lower() in ["1", "true", "yes", "on"]
 
-    def _int_env(self, name, default):
-        try:
-            return int(self._environ.get(name, default))
-        except (TypeError, ValueError):
-            return default
-
-    def _float_env(self, name, default):
-        try:
-            return float(self._environ.get(name, default))
-        except (TypeError, ValueError):
-            return default
-
     def is_sso_login_disabled(self, login):
         if not hasattr(self.kube_client, "get_whisk_user"):
             return False
 
-        whisk_user = self.kube_client.get_whisk_user(login)
+        whisk_user = self.get_whisk_user(login)
         annotations = ((whisk_user or {}).get("metadata") or {}).get("annotations") or {}
         return self._is_truthy(annotations.get(SSO_DISABLED_ANNOTATION))
 
@@ -327,11 +571,15 @@ class AuthService:
 
         if user_data:
             if bu.verify_password(old_password, user_data["password"]):
-                whisk_user = self.kube_client.get_whisk_user(user_data["login"])
+                # a write: the resourceVersion of the informer cache may be stale
+                whisk_user = self.get_whisk_user(user_data["login"], refresh=True)
+                if not whisk_user:
+                    return res_builder.build_error_message(f"no user {login} found", 401)
 
                 whisk_user["spec"]["password"] = new_password
                 # whisk_user['spec']['password_timestamp'] = datetime.now().isoformat()
-                self.kube_client.update_whisk_user(whisk_user)
+                if not self.kube_client.update_whisk_user(whisk_user):
+                    return res_builder.build_error_message(f"Unable to update the password of user {login}", 500)
 
                 return res_builder.build_response_with_data(
                     {"status": "ok", "message": "Password updated"}
@@ -0,0 +1,154 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import logging
+import threading
+import time
+
+FLOW_PENDING = "pending"
+FLOW_AUTHORIZED = "authorized"
+FLOW_FAILED = "failed"
+
+_SHARED_POLLER = None
+_SHARED_POLLER_LOCK = threading.Lock()
+
+
+class DeviceFlowPoller:
+    """
+    Polls the identity provider token endpoint on behalf of the clients, one
+    background thread per active device flow. The outcome is cached in the flow
+    store, so clients polling admin-api never reach the identity provider.
+    """
+
+    def __init__(self, store, exchange, now=None, stale_seconds=30):
+        """
+        param: store the flow store shared with OidcDeviceFlowService
+        param: exchange callable taking a flow and returning a (status, updates) tuple
+        param: stale_seconds a pending flow not polled for interval + stale_seconds
+               is adopted by this poller (e.g. its original replica went away)
+        """
+        self._store = store
+        self._exchange = exchange
+        self._now = now if now is not None else time.time
+        self._stale_seconds = stale_seconds
+        self._condition = threading.Condition()
+        self._active = {}
+        self._stopped = threading.Event()
+
+    def track(self, flow_id):
+        """
+        Start polling the given flow, unless this process is already doing it.
+        """
+        with self._condition:
+            if flow_id in self._active:
+                return
+            thread = threading.Thread(
+                target=self._run,
+                args=(flow_id,),
+                name=f"oidc-device-poller-{flow_id[:8]}",
+                daemon=True,
+            )
+            self._active[flow_id] = thread
+        thread.start()
+
+    def ensure_polling(self, flow_id, flow):
+        """
+        Adopt a pending flow whose poller stopped updating it.
+        """
+        if flow.get("status") != FLOW_PENDING:
+            return
+        with self._condition:
+            if flow_id in self._active:
+                return
+        last_polled = flow.get("polled_at", 0)
+        if self._now() - last_polled > flow["interval"] + self._stale_seconds:
+            logging.info(f"adopting stale SSO device flow {flow_id[:8]}")
+            self.track(flow_id)
+
+    def wait_for_update(self, timeout):
+        """
+        Block until any flow handled by this poller changes, or until timeout.
+        """
+        with self._condition:
+            self._condition.wait(timeout)
+
+    def is_tracking(self, flow_id):
+        with self._condition:
+            return flow_id in self._active
+
+    def stop(self):
+        self._stopped.set()
+        with self._condition:
+            self._condition.notify_all()
+
+    def _run(self, flow_id):
+        try:
+            while not self._stopped.is_set():
+                flow = self._store.get(flow_id)
+                if not self._is_pollable(flow):
+                    return
+
+                if self._stopped.wait(flow["interval"]):
+                    return
+
+                # the flow may have been consumed or expired while sleeping
+                flow = self._store.get(flow_id)
+                if not self._is_pollable(flow):
+                    return
+
+                try:
+                    status, updates = self._exchange(flow)
+                except Exception as ex:
+                    logging.warning(f"SSO device flow {flow_id[:8]} poll failed: {ex}")
+                    status, updates = FLOW_PENDING, {}
+
+                flow = dict(flow)
+                flow.update(updates)
+                flow["status"] = status
+                flow["polled_at"] = self._now()
+                if not self._store.replace(flow_id, flow):
+                    return
+
+                self._notify()
+                if status != FLOW_PENDING:
+                    return
+        finally:
+            with self._condition:
+                self._active.pop(flow_id, None)
+                self._condition.notify_all()
+
+    def _is_pollable(self, flow):
+        return (
+            flow is not None
+            and flow.get("status") == FLOW_PENDING
+            and self._now() < flow["expires_at"]
+        )
+
+    def _notify(self):
+        with self._condition:
+            self._condition.notify_all()
+
+
+def shared_device_flow_poller(store, exchange):
+    """
+    Return the process wide poller, creating it on first use.
+    """
+    global _SHARED_POLLER
+    with _SHARED_POLLER_LOCK:
+        if _SHARED_POLLER is None:
+            _SHARED_POLLER = DeviceFlowPoller(store, exchange)
+        return _SHARED_POLLER
@@ -19,15 +19,41 @@ import base64
 import hashlib
 import os
 import secrets
+import threading
 import time
 
-import requests
-
 import openserverless.common.response_builder as res_builder
+from openserverless.common.flow_store import (
+    COMPLETED_FLOW_SECONDS,
+    DEVICE_FLOW_PREFIX,
+    InMemoryFlowStore,
+    shared_flow_cipher,
+    shared_flow_store,
+)
+from openserverless.common.idp_http_client import shared_idp_http_client
+from openserverless.config.settings import resolve_settings
 from openserverless.impl.auth.auth_service import AuthService
+from openserverless.impl.auth.device_flow_poller import (
+    FLOW_AUTHORIZED,
+    FLOW_FAILED,
+    FLOW_PENDING,
+    shared_device_flow_poller,
+)
+
+_SHARED_WAIT_SLOTS = None
+_SHARED_WAIT_SLOTS_LOCK = threading.Lock()
 
 
-_DEVICE_FLOWS = {}
+def shared_wait_slots(settings):
+    """
+    Return the process wide semaphore bounding the device flow long-polls,
+    each holding a waitress thread, to a quarter of LISTEN_THREADS.
+    """
+    global _SHARED_WAIT_SLOTS
+    with _SHARED_WAIT_SLOTS_LOCK:
+        if _SHARED_WAIT_SLOTS is None:
+            _SHARED_WAIT_SLOTS = threading.BoundedSemaphore(max(1, settings.listen_threads // 4))
+        return _SHARED_WAIT_SLOTS
 
 
 class OidcDeviceFlowService:
@@ -35,16 +61,23 @@ class OidcDeviceFlowService:
     def __init__(
         self,
         environ=os.environ,
-        http_client=requests,
+        http_client=None,
         auth_service=None,
         store=None,
         now=None,
+        poller=None,
+        cipher=None,
+        wait_slots=None,
     ):
-        self._environ = environ
-        self._http_client = http_client
-        self._auth_service = auth_service if auth_service is not None else AuthService(environ=environ)
-        self._store = store if store is not None else _DEVICE_FLOWS
+        self._settings = resolve_settings(environ)
+        # pooled keep-alive client shared by all requests, it applies the default timeout
+        self._http_client = http_client if http_client is not None else shared_idp_http_client(self._settings)
+        self._auth_service = auth_service if auth_service is not None else AuthService(environ=self._settings)
+        self._store = self._flow_store(store)
         self._now = now if now is not None else time.time
+        self._cipher = cipher if cipher is not None else shared_flow_cipher(self._settings)
+        self._poller = poller if poller is not None else self._device_flow_poller()
+        self._wait_slots = wait_slots if wait_slots is not None else shared_wait_slots(self._settings)
 
     def start(self, requested_namespace=None):
         try:
@@ -53,7 +86,6 @@ class OidcDeviceFlowService:
                 self._device_authorization_url(),
                 data=self._device_authorization_form(challenge),
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=10,
             )
             payload = response.json()
         except Exception:
@@ -67,14 +99,21 @@ class OidcDeviceFlowService:
 
         flow_id = secrets.token_urlsafe(32)
         expires_in = int(payload.get("expires_in", 600))
-        self._cleanup_expired()
-        self._store[flow_id] = {
+        flow = {
             "device_code": payload["device_code"],
             "verifier": verifier,
             "expires_at": self._now() + expires_in,
             "interval": int(payload.get("interval", 5)),
             "requested_namespace": requested_namespace,
         }
+        if self._poller is not None:
+            flow["status"] = FLOW_PENDING
+            flow["polled_at"] = self._now()
+
+        self._store.cleanup_expired(self._now())
+        self._store.put(flow_id, flow)
+        if self._poller is not None:
+            self._poller.track(flow_id)
 
         return res_builder.build_response_with_data(
             {
@@ -93,45 +132,130 @@ class OidcDeviceFlowService:
             return res_builder.build_error_message("Invalid SSO flow", 404)
 
         if self._now() >= flow["expires_at"]:
-            self._store.pop(flow_id, None)
+            self._store.pop(flow_id)
             return res_builder.build_error_message("SSO login expired", 400)
 
+        if self._poller is not None and flow.get("status"):
+            self._poller.ensure_polling(flow_id, flow)
+            return self._flow_status_response(flow_id, flow)
+
         try:
-            response = self._http_client.post(
-                self._token_url(),
-                data=self._token_form(flow),
-                auth=self._client_auth(),
-                headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=10,
-            )
-            payload = response.json()
+            status, updates = self.exchange_device_code(flow)
         except Exception:
             return res_builder.build_error_message("Unable to poll SSO login", 502)
 
+        if status == FLOW_PENDING:
+            # without the background poller the client owns the poll cadence
+            updates.pop("interval", None)
+        return self._flow_status_response(flow_id, dict(flow, status=status, **updates))
+
+    def wait(self, flow_id, timeout=None):
+        """
+        Long-poll a device flow: return as soon as the background poller completes
+        it, or a pending status once timeout seconds have elapsed.
+        When all the wait slots are taken the flow status is returned at once.
+        """
+        if self._poller is None:
+            return self.poll(flow_id)
+        if not self._wait_slots.acquire(blocking=False):
+            # the client polls again, without holding a request thread
+            return self.poll(flow_id)
+        try:
+            return self._wait(flow_id, timeout)
+        finally:
+            self._wait_slots.release()
+
+    def _wait(self, flow_id, timeout):
+
+        max_wait = self._settings.oidc_device_wait_max_seconds
+        try:
+            wait_seconds = min(float(timeout), max_wait) if timeout is not None else max_wait
+        except (TypeError, ValueError):
+            wait_seconds = max_wait
+        deadline = time.monotonic() + max(wait_seconds, 0)
+
+        while True:
+            flow = self._store.get(flow_id)
+            if not flow or not flow.get("status"):
+                return self.poll(flow_id)
+
+            remaining = deadline - time.monotonic()
+            if flow["status"] != FLOW_PENDING or remaining <= 0 or self._now() >= flow["expires_at"]:
+                return self.poll(flow_id)
+
+            self._poller.ensure_polling(flow_id, flow)
+            # flows completed by another replica are only visible through the store
+            self._poller.wait_for_update(min(remaining, 1))
+
+    def exchange_device_code(self, flow):
+        """
+        Exchange the device code of a flow at the identity provider token endpoint.
+        Return a (status, updates) tuple where status is pending, authorized or failed
+        and updates are the flow fields to store. Transport errors are raised.
+        """
+        response = self._http_client.post(
+            self._token_url(),
+            data=self._token_form(flow),
+            auth=self._client_auth(),
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+        payload = response.json()
+
         error = payload.get("error")
-        if error in ("authorization_pending", "slow_down"):
+        if error == "authorization_pending":
+            return FLOW_PENDING, {"message": error}
+
+        if error == "slow_down":
+            # RFC 8628: increase the polling interval by 5 seconds
+            return FLOW_PENDING, {"message": error, "interval": flow["interval"] + 5}
+
+        if response.status_code >= 400:
+            return FLOW_FAILED, {
+                "message": self._provider_error_message(payload, "SSO login failed")
+            }
+
+        access_token = payload.get("access_token")
+        if not access_token:
+            return FLOW_FAILED, {"message": "SSO login did not return an access token"}
+
+        return FLOW_AUTHORIZED, {"access_token": access_token}
+
+    def exchange_and_seal(self, flow):
+        """
+        Exchange the device code of a flow for the background poller: the
+        access token is sealed before reaching the store, and a completed
+        flow expires COMPLETED_FLOW_SECONDS later.
+        """
+        status, updates = self.exchange_device_code(flow)
+        if status != FLOW_PENDING:
+            updates["expires_at"] = min(flow["expires_at"], self._now() + COMPLETED_FLOW_SECONDS)
+        if "access_token" in updates:
+            updates["sealed_token"] = self._cipher.seal(updates.pop("access_token"))
+        return status, updates
+
+    def _flow_status_response(self, flow_id, flow):
+        status = flow["status"]
+        if status == FLOW_PENDING:
             return res_builder.build_response_with_data(
                 {
                     "status": "pending",
-                    "message": error,
+                    "message": flow.get("message", "authorization_pending"),
                     "interval": flow["interval"],
                 },
                 202,
             )
 
-        if response.status_code >= 400:
-            self._store.pop(flow_id, None)
-            return res_builder.build_error_message(
-                self._provider_error_message(payload, "SSO login failed"),
-                401,
-            )
+        # only the request that pops the flow may complete it
+        if self._store.pop(flow_id) is None:
+            return res_builder.build_error_message("Invalid SSO flow", 404)
 
-        access_token = payload.get("access_token")
+        if status == FLOW_FAILED:
+            return res_builder.build_error_message(flow.get("message", "SSO login failed"), 401)
+
+        access_token = flow.get("access_token") or self._cipher.unseal(flow.get("sealed_token"))
         if not access_token:
-            self._store.pop(flow_id, None)
-            return res_builder.build_error_message("SSO login did not return an access token", 401)
+            return res_builder.build_error_message("SSO login could not be completed, please login again", 401)
 
-        self._store.pop(flow_id, None)
         return self._auth_service.login_oidc(
             access_token,
             expected_namespace=flow.get("requested_namespace"),
@@ -147,7 +271,6 @@ class OidcDeviceFlowService:
                 data=self._password_token_form(username, password),
                 auth=self._client_auth(),
                 headers={"Content-Type": "application/x-www-form-urlencoded"},
-                timeout=10,
             )
             payload = response.json()
         except Exception:
@@ -173,15 +296,15 @@ class OidcDeviceFlowService:
         )
 
     def _client_id(self):
-        return self._environ.get("OIDC_CLIENT_ID") or self._environ.get("OIDC_AUDIENCE")
+        return self._settings.oidc_client_id
 
     def _client_secret(self):
-        return (self._environ.get("OIDC_CLIENT_SECRET") or "").strip()
+        return self._settings.oidc_client_secret
 
     def _device_authorization_form(self, challenge):
         form = {
             "client_id": self._client_id(),
-            "scope": self._environ.get("OIDC_DEVICE_SCOPE", "openid email profile"),
+            "scope": self._settings.oidc_device_scope,
             "code_challenge": challenge,
             "code_challenge_method": "S256",
         }
@@ -204,7 +327,7 @@ class OidcDeviceFlowService:
             "client_id": self._client_id(),
             "username": username,
             "password": password,
-            "scope": self._environ.get("OIDC_PASSWORD_SCOPE", "openid email profile"),
+            "scope": self._settings.oidc_password_scope,
         }
 
     def _client_auth(self):
@@ -221,26 +344,28 @@ class OidcDeviceFlowService:
         return message
 
     def _device_authorization_url(self):
-        return self._environ.get("OIDC_DEVICE_AUTHORIZATION_URL") or (
-            f"{self._issuer_url()}/protocol/openid-connect/auth/device"
-        )
+        return self._required_url(self._settings.oidc_device_authorization_url)
 
     def _token_url(self):
-        return self._environ.get("OIDC_TOKEN_URL") or (
-            f"{self._issuer_url()}/protocol/openid-connect/token"
-        )
+        return self._required_url(self._settings.oidc_token_url)
 
-    def _issuer_url(self):
-        issuer = self._environ.get("OIDC_ISSUER_URL")
-        if not issuer:
+    def _required_url(self, url):
+        # the endpoint URLs default to the issuer ones, so only the issuer can be missing
+        if not url:
             raise ValueError("missing OIDC_ISSUER_URL")
-        return issuer.rstrip("/")
+        return url
 
-    def _cleanup_expired(self):
-        now = self._now()
-        expired = [flow_id for flow_id, flow in self._store.items() if now >= flow["expires_at"]]
-        for flow_id in expired:
-            self._store.pop(flow_id, None)
+    def _device_flow_poller(self):
+        if not self._settings.oidc_device_background_poll:
+            return None
+        return shared_device_flow_poller(self._store, self.exchange_and_seal)
+
+    def _flow_store(self, store):
+        if store is None:
+            return shared_flow_store(self._settings, prefix=DEVICE_FLOW_PREFIX)
+        if isinstance(store, dict):
+            return InMemoryFlowStore(store)
+        return store
 
     def _create_pkce_pair(self):
         verifier = self._base64_url(secrets.token_bytes(32))
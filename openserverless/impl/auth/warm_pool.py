@@ -0,0 +1,184 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import copy
+import hashlib
+import logging
+import random
+import threading
+
+from openserverless.common.rate_limiter import background_requests
+
+POOL_LABEL = "openserverless.apache.org/pool"
+POOL_IDENTITY_LABEL = "openserverless.apache.org/sso-identity"
+POOL_AVAILABLE = "available"
+POOL_BOUND = "bound"
+
+_SHARED_POOL = None
+_SHARED_POOL_LOCK = threading.Lock()
+
+
+def sso_identity(claims):
+    """
+    Return a label safe key identifying an SSO user by issuer and subject.
+    """
+    source = f"{claims.get('iss', '')}|{claims.get('sub', '')}"
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()[:40]
+
+
+class WarmNamespacePool:
+    """
+    Keeps a number of WhiskUsers provisioned ahead of time, so that the operator
+    has already reconciled their services when a new SSO user logs in. A first
+    login binds one of them to the SSO identity instead of creating a namespace.
+    Pool membership and bindings are tracked with labels on the WhiskUser, so
+    every replica sees the same pool.
+    """
+
+    def __init__(self, kube_client, build_whisk_user, size, name_prefix="ws", refill_seconds=30):
+        """
+        param: kube_client the client used to list, create and update WhiskUsers
+        param: build_whisk_user callable taking a namespace name and returning the WhiskUser to create
+        param: size number of available namespaces to keep in the pool
+        param: refill_seconds how often the filler checks the pool size
+        """
+        self._kube_client = kube_client
+        self._build_whisk_user = build_whisk_user
+        self._size = size
+        self._name_prefix = name_prefix
+        self._refill_seconds = refill_seconds
+        self._refill = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def find_bound(self, identity):
+        """
+        Return the pooled WhiskUser already bound to the given identity, None otherwise.
+        """
+        users = self._kube_client.list_whisk_users(
+            f"{POOL_LABEL}={POOL_BOUND},{POOL_IDENTITY_LABEL}={identity}"
+        )
+        return next(iter(users or []), None)
+
+    def claim(self, identity, bind):
+        """
+        Bind an available WhiskUser to the given identity.
+        param: bind callable receiving the WhiskUser to update with the user details
+        return: the bound WhiskUser, None when the pool is empty
+        """
+        candidates = list(self._kube_client.list_whisk_users(f"{POOL_LABEL}={POOL_AVAILABLE}") or [])
+        # spread concurrent logins over the pool to limit conflicts
+        random.shuffle(candidates)
+
+        try:
+            for candidate in candidates:
+                whisk_user = copy.deepcopy(candidate)
+                labels = whisk_user["metadata"].setdefault("labels", {})
+                labels[POOL_LABEL] = POOL_BOUND
+                labels[POOL_IDENTITY_LABEL] = identity
+                bind(whisk_user)
+
+                # the update carries the listed resourceVersion: when another
+                # login claimed the same entry it fails and the next one is tried
+                if self._kube_client.update_whisk_user(whisk_user):
+                    logging.info(f"warm namespace {whisk_user['metadata']['name']} claimed")
+                    return whisk_user
+
+            logging.warning("warm namespace pool is empty")
+            return None
+        finally:
+            self._refill.set()
+
+    def next_names(self, count, pooled):
+        """
+        Return the count lowest pool names not used by the pooled WhiskUsers.
+        The names are deterministic, so replicas refilling the pool at the
+        same time pick the same ones and only one create of each succeeds.
+        """
+        taken = {user["metadata"]["name"] for user in pooled}
+        names = []
+        index = 0
+        while len(names) < count:
+            name = f"{self._name_prefix}{index}"
+            if name not in taken:
+                names.append(name)
+            index += 1
+        return names
+
+    def fill(self):
+        """
+        Create the WhiskUsers missing to reach the pool size.
+        Return the number of WhiskUsers created.
+        """
+        available = self._kube_client.list_whisk_users(f"{POOL_LABEL}={POOL_AVAILABLE}")
+        bound = self._kube_client.list_whisk_users(f"{POOL_LABEL}={POOL_BOUND}")
+        if available is None or bound is None:
+            return 0
+        available = list(available)
+
+        created = 0
+        for name in self.next_names(self._size - len(available), available + list(bound)):
+            whisk_user = self._build_whisk_user(name)
+            whisk_user["metadata"].setdefault("labels", {})[POOL_LABEL] = POOL_AVAILABLE
+            if self._kube_client.create_whisk_user(whisk_user):
+                created += 1
+            else:
+                # usually created in the meantime by another replica
+                logging.warning(f"warm namespace {name} not created")
+
+        if created:
+            logging.info(f"warm namespace pool refilled with {created} namespaces")
+        return created
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="sso-warm-pool", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._refill.set()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                # the refill must not slow down the logins
+                with background_requests():
+                    self.fill()
+            except Exception as ex:
+                logging.warning(f"warm namespace pool refill failed: {ex}")
+            self._refill.wait(self._refill_seconds)
+            self._refill.clear()
+
+
+def shared_warm_pool(kube_client, build_whisk_user, size, name_prefix="ws", refill_seconds=30):
+    """
+    Return the process wide pool, creating and starting its filler on first use.
+    """
+    global _SHARED_POOL
+    with _SHARED_POOL_LOCK:
+        if _SHARED_POOL is None:
+            _SHARED_POOL = WarmNamespacePool(
+                kube_client,
+                build_whisk_user,
+                size,
+                name_prefix=name_prefix,
+                refill_seconds=refill_seconds,
+            )
+            _SHARED_POOL.start()
+        return _SHARED_POOL
@@ -0,0 +1,163 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import base64
+import binascii
+import hashlib
+import json
+import logging
+import re
+import threading
+
+# bump when the generated Dockerfile changes, so older images are not reused
+BUILD_HASH_VERSION = 1
+BUILD_HASH_TAG_PREFIX = "bh-"
+
+_SHARED_IN_FLIGHT = None
+_SHARED_IN_FLIGHT_LOCK = threading.Lock()
+
+
+def _normalized_requirements(file_data):
+    text = base64.b64decode(file_data, validate=True).decode("utf-8")
+    lines = [line.rstrip() for line in text.replace("\r\n", "\n").split("\n")]
+    while lines and not lines[-1]:
+        lines.pop()
+    return "\n".join(lines)
+
+
+def build_hash(build_config: dict) -> str | None:
+    """
+    Return the content hash of a build request: the sha256 of its normalized
+    source, kind and decoded requirements file. Requests differing only in
+    the base64 encoding, line endings or trailing blanks of the file get the
+    same hash. None when the file cannot be decoded.
+    """
+    requirements = None
+    if "file" in build_config:
+        try:
+            requirements = _normalized_requirements(build_config.get("file") or "")
+        except (binascii.Error, ValueError):
+            return None
+
+    inputs = {
+        "version": BUILD_HASH_VERSION,
+        "source": str(build_config.get("source", "")).strip(),
+        "kind": str(build_config.get("kind", "")).strip().lower(),
+        "requirements": requirements,
+    }
+    return hashlib.sha256(json.dumps(inputs, sort_keys=True).encode()).hexdigest()
+
+
+def hash_tag(content_hash: str) -> str:
+    """The registry tag of the image built from content_hash."""
+    return f"{BUILD_HASH_TAG_PREFIX}{content_hash}"
+
+
+def cache_tag(build_config: dict) -> str:
+    """
+    The tag of the layer cache shared by the builds of a kind on a base
+    image: the builds differing only in their requirements reuse the layers
+    of the base image and of the unchanged steps.
+    """
+    kind = re.sub(r"[^a-z0-9]", "", str(build_config.get("kind", "")).lower()) or "none"
+    source = hashlib.sha256(str(build_config.get("source", "")).strip().encode()).hexdigest()
+    return f"{kind}-{source[:16]}"
+
+
+def collect_build_cache(registry, records, repository: str, max_age_seconds: float, now: float) -> int:
+    """
+    Delete the cache tags of repository not used by a build for
+    max_age_seconds. Tags missing from the usage index, e.g. after a restart
+    with the in memory store, are adopted as used now.
+    A manifest is deleted by digest, with all its tags: the ones sharing the
+    digest of a tag still in use are kept, and tried again at the next run.
+    Return the number of deleted tags.
+    """
+    uses = records.cache_uses()
+    tags = registry.list_tags(repository)
+    for tag in tags:
+        if tag not in uses:
+            records.touch_cache(tag, now)
+            uses[tag] = now
+
+    expired = {tag: last_used for tag, last_used in uses.items() if now - last_used >= max_age_seconds}
+    if not expired:
+        return 0
+    digests = {tag: registry.manifest_digest(repository, tag) for tag in set(tags) | set(expired)}
+    kept = {digest for tag, digest in digests.items() if tag not in expired and digest is not None}
+
+    deleted = 0
+    for tag, last_used in expired.items():
+        digest = digests[tag]
+        if digest is None:
+            records.forget_cache(tag)
+            continue
+        if digest in kept:
+            logging.info(f"Keeping the build cache {repository}:{tag}, its manifest has other tags in use")
+            continue
+        if not registry.delete_manifest(repository, digest):
+            continue
+        records.forget_cache(tag)
+        deleted += 1
+        logging.info(f"Deleted the build cache {repository}:{tag}, unused since {last_used}")
+    return deleted
+
+
+class InFlightBuilds:
+    """
+    The builds queued or running in this process, by content key, so an
+    identical submission joins the running build instead of starting another.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_key = {}
+        self._keys = {}
+
+    def claim(self, key, build_id, is_active):
+        """
+        Register build_id for key, unless an active build already has it.
+        is_active is called with the id of the registered build, to skip the
+        ones which finished without being released.
+        Return the id of the build to join, None when build_id was registered.
+        """
+        with self._lock:
+            current = self._by_key.get(key)
+            if current is not None and is_active(current):
+                return current
+            if current is not None:
+                self._keys.pop(current, None)
+            self._by_key[key] = build_id
+            self._keys[build_id] = key
+            return None
+
+    def release(self, build_id):
+        with self._lock:
+            key = self._keys.pop(build_id, None)
+            if key is not None and self._by_key.get(key) == build_id:
+                del self._by_key[key]
+
+
+def shared_in_flight_builds():
+    """
+    Return the process wide registry of the in-flight builds.
+    """
+    global _SHARED_IN_FLIGHT
+    with _SHARED_IN_FLIGHT_LOCK:
+        if _SHARED_IN_FLIGHT is None:
+            _SHARED_IN_FLIGHT = InFlightBuilds()
+        return _SHARED_IN_FLIGHT
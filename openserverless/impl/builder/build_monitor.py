@@ -0,0 +1,164 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import logging
+import threading
+import time
+
+from openserverless.common.pod_status import event_failure_reason, pod_failure_reason
+
+# the watches are renewed this often: they stop soon after the build started,
+# and the replayed pod shows how long it has been unschedulable
+WATCH_ROUND_SECONDS = 10
+
+
+class BuildMonitor:
+    """
+    Follows a build Job until its pod has started, watching the pod status and
+    the warning Events of the Job and of the pod. An image pull error or a
+    missing secret is reported as soon as the API server knows about it, a
+    pod that stays unschedulable once it has lasted, instead of after a timeout.
+    """
+
+    def __init__(self, kube_client, job_name, namespace="nuvolaris", timeout_seconds=120, on_failure=None):
+        """
+        param: timeout_seconds how long the start of the build is followed
+        param: on_failure callable receiving the failure reason, called once
+        """
+        self._kube_client = kube_client
+        self._job_name = job_name
+        self._namespace = namespace
+        self._timeout_seconds = timeout_seconds
+        self._on_failure = on_failure
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._pods = set()
+        self.failure_reason = None
+
+    def start(self):
+        self._spawn(self._watch_pods, "pods")
+        self._spawn(self._watch_events, "job-events", f"involvedObject.kind=Job,involvedObject.name={self._job_name}")
+
+    def wait(self, timeout=None):
+        """
+        Wait for the build to start or fail. Return the failure reason, None otherwise.
+        """
+        self._done.wait(timeout)
+        return self.failure_reason
+
+    def _spawn(self, target, name, *args):
+        threading.Thread(target=target, args=args, name=f"monitor-{self._job_name}-{name}", daemon=True).start()
+
+    def _follow(self, watch, handle, what):
+        """
+        Pass the objects of short watch rounds to handle until it returns True,
+        the build started or failed, or timeout_seconds expire.
+        """
+        deadline = time.monotonic() + self._timeout_seconds
+        while not self._done.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            round_seconds = max(1, int(min(remaining, WATCH_ROUND_SECONDS)))
+            round_end = time.monotonic() + round_seconds
+            events = watch(round_seconds)
+            try:
+                for event_type, obj in events:
+                    if self._done.is_set():
+                        return
+                    if event_type != "DELETED" and handle(obj):
+                        return
+            except Exception as ex:
+                logging.warning(f"build monitor of {self._job_name} stopped watching {what}: {ex}")
+                return
+            finally:
+                events.close()
+            # a watch ended early is not renewed before its round is over
+            self._done.wait(max(0, round_end - time.monotonic()))
+
+    def _watch_pods(self):
+        self._follow(
+            lambda timeout_seconds: self._kube_client.watch_pods(
+                namespace=self._namespace,
+                label_selector=f"job-name={self._job_name}",
+                timeout_seconds=timeout_seconds,
+            ),
+            self._pod_changed,
+            "pods",
+        )
+
+    def _pod_changed(self, pod):
+        pod_name = pod.get("metadata", {}).get("name")
+        with self._lock:
+            new_pod = pod_name not in self._pods
+            self._pods.add(pod_name)
+        if new_pod:
+            self._spawn(
+                self._watch_events,
+                f"pod-events-{pod_name}",
+                f"involvedObject.kind=Pod,involvedObject.name={pod_name}",
+            )
+
+        reason = pod_failure_reason(pod)
+        if reason:
+            self._fail(f"pod {pod_name}: {reason}")
+            return True
+        if self._started(pod):
+            logging.info(f"Build job {self._job_name} started")
+            self._done.set()
+            return True
+        return False
+
+    def _watch_events(self, field_selector):
+        self._follow(
+            lambda timeout_seconds: self._kube_client.watch_events(
+                namespace=self._namespace,
+                field_selector=f"{field_selector},type=Warning",
+                timeout_seconds=timeout_seconds,
+            ),
+            self._event_received,
+            "events",
+        )
+
+    def _event_received(self, event):
+        reason = event_failure_reason(event)
+        if reason:
+            self._fail(f"{event.get('involvedObject', {}).get('name')}: {reason}")
+            return True
+        return False
+
+    def _started(self, pod):
+        status = pod.get("status") or {}
+        if status.get("phase") in ["Running", "Succeeded"]:
+            return True
+        return False
+
+    def _fail(self, reason):
+        with self._lock:
+            if self._done.is_set() or self.failure_reason is not None:
+                return
+            self.failure_reason = reason
+
+        logging.error(f"Build job {self._job_name} failed: {reason}")
+        try:
+            if self._on_failure is not None:
+                self._on_failure(reason)
+        except Exception as ex:
+            logging.error(f"build failure handler of {self._job_name} failed: {ex}")
+        finally:
+            # wait returns once the failure has been handled
+            self._done.set()
@@ -0,0 +1,242 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import bisect
+import copy
+import heapq
+import json
+import math
+import threading
+import time
+
+import redis
+
+from openserverless.common.flow_store import BUILD_RECORD_PREFIX
+from openserverless.config.settings import resolve_settings
+
+_SHARED_STORE = None
+_SHARED_STORE_LOCK = threading.Lock()
+
+
+class InMemoryBuildRecordStore:
+    """
+    Thread safe, process local build records, indexed by id and by user in
+    creation order. Every record carries an `expires_at` epoch timestamp.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records = {}
+        self._by_user = {}
+        self._expirations = []
+        self._cache_uses = {}
+        self._cache_gc_at = None
+
+    def put(self, record):
+        with self._lock:
+            self._records[record["id"]] = copy.deepcopy(record)
+            bisect.insort(self._by_user.setdefault(record["user"], []), (record["created_at"], record["id"]))
+            heapq.heappush(self._expirations, (record["expires_at"], record["id"]))
+
+    def get(self, build_id):
+        with self._lock:
+            return copy.deepcopy(self._records.get(build_id))
+
+    def update(self, build_id, changes):
+        """
+        Apply changes to a stored record, return the updated record or None when unknown.
+        """
+        with self._lock:
+            record = self._records.get(build_id)
+            if record is None:
+                return None
+            record.update(changes)
+            return copy.deepcopy(record)
+
+    def list_by_user(self, user, offset=0, limit=20):
+        """
+        Return a page of the records of a user, most recent first.
+        """
+        with self._lock:
+            index = self._by_user.get(user, [])
+            page = list(reversed(index))[offset:offset + limit]
+            return [copy.deepcopy(self._records[build_id]) for _, build_id in page]
+
+    def cleanup_expired(self, now):
+        with self._lock:
+            while self._expirations and self._expirations[0][0] <= now:
+                _, build_id = heapq.heappop(self._expirations)
+                record = self._records.pop(build_id, None)
+                if record is not None:
+                    self._by_user[record["user"]].remove((record["created_at"], build_id))
+
+    def touch_cache(self, tag, now):
+        """Record the last use of the build cache tag."""
+        with self._lock:
+            self._cache_uses[tag] = now
+
+    def cache_uses(self):
+        """Return the last use of every known build cache tag."""
+        with self._lock:
+            return dict(self._cache_uses)
+
+    def forget_cache(self, tag):
+        with self._lock:
+            self._cache_uses.pop(tag, None)
+
+    def claim_cache_gc(self, now, interval_seconds):
+        """
+        Return True, and record the run, when the last collection of the
+        build cache is older than interval_seconds.
+        """
+        with self._lock:
+            if self._cache_gc_at is not None and now - self._cache_gc_at < interval_seconds:
+                return False
+            self._cache_gc_at = now
+            return True
+
+
+class RedisBuildRecordStore:
+    """
+    Build records shared by all admin-api replicas: a JSON value with a TTL
+    per record, and a sorted set per user scored by creation time.
+    """
+
+    def __init__(self, client, prefix=BUILD_RECORD_PREFIX, now=None):
+        self._client = client
+        self._prefix = prefix
+        self._now = now if now is not None else time.time
+
+    def _key(self, build_id):
+        return f"{self._prefix}{build_id}"
+
+    def _user_key(self, user):
+        return f"{self._prefix}user:{user}"
+
+    def _cache_key(self):
+        return f"{self._prefix}cache"
+
+    def _cache_gc_key(self):
+        return f"{self._prefix}cache-gc"
+
+    def _ttl(self, record):
+        return max(1, math.ceil(record["expires_at"] - self._now()))
+
+    def put(self, record):
+        pipe = self._client.pipeline()
+        pipe.set(self._key(record["id"]), json.dumps(record), ex=self._ttl(record))
+        pipe.zadd(self._user_key(record["user"]), {record["id"]: record["created_at"]})
+        pipe.execute()
+
+    def get(self, build_id):
+        value = self._client.get(self._key(build_id))
+        if value is None:
+            return None
+        return json.loads(value)
+
+    def update(self, build_id, changes):
+        """
+        Apply changes to a stored record, return the updated record or None when unknown.
+        Concurrent updates of the same record are retried on conflict.
+        """
+        key = self._key(build_id)
+        while True:
+            with self._client.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    value = pipe.get(key)
+                    if value is None:
+                        return None
+                    record = json.loads(value)
+                    record.update(changes)
+                    pipe.multi()
+                    pipe.set(key, json.dumps(record), ex=self._ttl(record))
+                    pipe.execute()
+                    return record
+                except redis.WatchError:
+                    continue
+
+    def list_by_user(self, user, offset=0, limit=20):
+        """
+        Return a page of the records of a user, most recent first.
+        """
+        ids = [
+            build_id.decode() if isinstance(build_id, bytes) else build_id
+            for build_id in self._client.zrevrange(self._user_key(user), offset, offset + limit - 1)
+        ]
+        if not ids:
+            return []
+
+        records = []
+        expired = []
+        for build_id, value in zip(ids, self._client.mget([self._key(build_id) for build_id in ids])):
+            if value is None:
+                expired.append(build_id)
+            else:
+                records.append(json.loads(value))
+        # the records expired on their own, drop them from the index too
+        if expired:
+            self._client.zrem(self._user_key(user), *expired)
+        return records
+
+    def cleanup_expired(self, now):
+        # redis expires the records on their own
+        pass
+
+    def touch_cache(self, tag, now):
+        """Record the last use of the build cache tag."""
+        self._client.zadd(self._cache_key(), {tag: now})
+
+    def cache_uses(self):
+        """Return the last use of every known build cache tag."""
+        return {
+            tag.decode() if isinstance(tag, bytes) else tag: score
+            for tag, score in self._client.zrange(self._cache_key(), 0, -1, withscores=True)
+        }
+
+    def forget_cache(self, tag):
+        self._client.zrem(self._cache_key(), tag)
+
+    def claim_cache_gc(self, now, interval_seconds):
+        """
+        Return True, and record the run, when the last collection of the
+        build cache is older than interval_seconds: the key expires with the
+        interval, so a single replica gets it.
+        """
+        return bool(self._client.set(self._cache_gc_key(), now, nx=True, ex=max(1, math.ceil(interval_seconds))))
+
+
+def build_record_store(environ):
+    """
+    Build the record store on the backend configured for the flows
+    (OIDC_FLOW_STORE, memory or redis).
+    """
+    settings = resolve_settings(environ)
+    if settings.oidc_flow_store == "redis":
+        return RedisBuildRecordStore(redis.Redis.from_url(settings.oidc_flow_store_redis_url))
+    return InMemoryBuildRecordStore()
+
+
+def shared_build_record_store(environ):
+    """
+    Return the process wide build record store, creating it on first use.
+    """
+    global _SHARED_STORE
+    with _SHARED_STORE_LOCK:
+        if _SHARED_STORE is None:
+            _SHARED_STORE = build_record_store(environ)
+        return _SHARED_STORE
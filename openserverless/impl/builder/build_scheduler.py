@@ -0,0 +1,151 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import collections
+import logging
+import threading
+
+from openserverless.config.settings import get_settings
+from openserverless.error.api_error import QueueFullError
+
+_SHARED_SCHEDULER = None
+_SHARED_SCHEDULER_LOCK = threading.Lock()
+
+
+class BuildScheduler:
+    """
+    Admits builds up to a global and a per-user number of running build Jobs.
+    The waiting builds are queued per user and dispatched round robin across
+    the users, so one user submitting many builds does not delay the others.
+    A build holds its slot from its start until release is called, when its
+    Job finished or failed to start.
+    """
+
+    def __init__(self, max_running, max_running_per_user, max_queued):
+        self._max_running = max_running
+        self._max_running_per_user = max_running_per_user
+        self._max_queued = max_queued
+        self._lock = threading.Lock()
+        self._queues = collections.OrderedDict()
+        self._queued = 0
+        self._running = {}
+        self._running_by_user = collections.Counter()
+
+    def submit(self, user, build_id, start):
+        """
+        Queue a build, start is called without arguments when it is admitted.
+        Return the queue position, 0 when the build started at once.
+        Raise QueueFullError when max_queued builds are already waiting.
+        """
+        with self._lock:
+            if self._queued >= self._max_queued:
+                raise QueueFullError(f"build queue is full ({self._queued} builds waiting)")
+            self._queues.setdefault(user, collections.deque()).append((build_id, start))
+            self._queued += 1
+            started = self._dispatch()
+
+        self._start(started)
+        return self.position(build_id) or 0
+
+    def release(self, build_id):
+        """
+        Free the slot of a finished build and start the next ones.
+        Unknown or already released builds are ignored.
+        """
+        with self._lock:
+            user = self._running.pop(build_id, None)
+            if user is None:
+                return
+            self._running_by_user[user] -= 1
+            if self._running_by_user[user] <= 0:
+                del self._running_by_user[user]
+            started = self._dispatch()
+
+        self._start(started)
+
+    def position(self, build_id):
+        """
+        Return the 1-based position of a waiting build in the dispatch order,
+        None when it is not waiting.
+        """
+        with self._lock:
+            for index, queued_id in enumerate(self._dispatch_order()):
+                if queued_id == build_id:
+                    return index + 1
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {"running": len(self._running), "queued": self._queued}
+
+    def _dispatch_order(self):
+        # round robin over the user queues, in their current rotation
+        queues = [list(queue) for queue in self._queues.values()]
+        order = []
+        for depth in range(max((len(queue) for queue in queues), default=0)):
+            order.extend(queue[depth][0] for queue in queues if depth < len(queue))
+        return order
+
+    def _dispatch(self):
+        started = []
+        while len(self._running) < self._max_running:
+            user = next(
+                (
+                    user
+                    for user, queue in self._queues.items()
+                    if queue and self._running_by_user[user] < self._max_running_per_user
+                ),
+                None,
+            )
+            if user is None:
+                break
+
+            build_id, start = self._queues[user].popleft()
+            self._queued -= 1
+            # the user goes to the back of the rotation
+            self._queues.move_to_end(user)
+            if not self._queues[user]:
+                del self._queues[user]
+            self._running[build_id] = user
+            self._running_by_user[user] += 1
+            started.append((build_id, start))
+        return started
+
+    def _start(self, started):
+        for build_id, start in started:
+            try:
+                start()
+            except Exception as ex:
+                logging.error(f"failed to start build {build_id}: {ex}")
+                self.release(build_id)
+
+
+def shared_build_scheduler():
+    """
+    Return the process wide build scheduler, configured by BUILD_MAX_RUNNING,
+    BUILD_MAX_RUNNING_PER_USER and BUILD_MAX_QUEUED.
+    """
+    global _SHARED_SCHEDULER
+    with _SHARED_SCHEDULER_LOCK:
+        if _SHARED_SCHEDULER is None:
+            settings = get_settings()
+            _SHARED_SCHEDULER = BuildScheduler(
+                settings.build_max_running,
+                settings.build_max_running_per_user,
+                settings.build_max_queued,
+            )
+        return _SHARED_SCHEDULER
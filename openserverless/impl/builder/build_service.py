@@ -16,19 +16,125 @@
 # under the License.
 #
 import shutil
-from openserverless.common.kube_api_client import KubeApiClient
+from openserverless.common.kube_api_client import (
+    BUILD_COMPONENT,
+    BUILD_COMPONENT_LABEL,
+    KubeApiClient,
+)
+from openserverless.common.rate_limiter import background_requests
+from openserverless.common.registry_client import RegistryClient, registry_credentials, split_image_name
+from openserverless.impl.builder.build_cache import (
+    build_hash,
+    cache_tag,
+    collect_build_cache,
+    hash_tag,
+    shared_in_flight_builds,
+)
+from openserverless.impl.builder.build_monitor import BuildMonitor
+from openserverless.impl.builder.build_records import shared_build_record_store
+from openserverless.impl.builder.build_scheduler import shared_build_scheduler
+from openserverless.impl.builder.buildkit_pool import shared_buildkit_pool
+from openserverless.impl.builder.build_status import (
+    BUILD_COMPLETED_HOUR_LABEL,
+    BUILD_FAILED,
+    BUILD_HOUR_FORMAT,
+    BUILD_ID_LABEL,
+    BUILD_QUEUED,
+    BUILD_STARTED,
+    BUILD_STARTING,
+    BUILD_SUCCEEDED,
+    FINAL_STATUSES,
+    shared_build_status_watcher,
+)
+from openserverless.config.settings import get_settings
+from openserverless.error.api_error import InvalidBuildError, QueueFullError
 import os
+import time
 import uuid
 import logging
+import threading
 from datetime import datetime, timezone, timedelta
 from types import SimpleNamespace
 import random
 import string
+import base64
 import binascii
+from concurrent.futures import ThreadPoolExecutor
 
 JOB_NAME = "build"
 CM_NAME = "cm"
 
+BUILD_USER_LABEL = "openserverless.apache.org/build-user"
+
+# size limits of the requirements file, base64 encoded and decoded
+MAX_ENCODED_FILE_SIZE = 10_000_000
+MAX_DECODED_FILE_SIZE = 5_000_000
+
+# the unused build cache tags are collected at most once per hour
+CACHE_GC_INTERVAL_SECONDS = 3600
+
+_SHARED_EXECUTOR = None
+_SHARED_EXECUTOR_LOCK = threading.Lock()
+
+
+def shared_build_executor():
+    """
+    Return the process wide executor running the build orchestration, with
+    BUILD_WORKERS threads, creating it on first use.
+    """
+    global _SHARED_EXECUTOR
+    with _SHARED_EXECUTOR_LOCK:
+        if _SHARED_EXECUTOR is None:
+            _SHARED_EXECUTOR = ThreadPoolExecutor(
+                max_workers=get_settings().build_workers,
+                thread_name_prefix="build",
+            )
+        return _SHARED_EXECUTOR
+
+
+def collect_build_cache_if_due(registry, records, now=None):
+    """
+    Delete the build cache tags unused for BUILD_CACHE_MAX_AGE_SECONDS, when
+    the last collection is older than CACHE_GC_INTERVAL_SECONDS. The last run
+    is kept in the record store, so the replicas sharing it collect in turn.
+    Return the number of deleted tags, None when not due.
+    """
+    settings = get_settings()
+    if settings.build_cache_mode == "off" or not settings.build_cache_max_age_seconds:
+        return None
+
+    now = now if now is not None else time.time()
+    if not records.claim_cache_gc(now, CACHE_GC_INTERVAL_SECONDS):
+        return None
+
+    return collect_build_cache(
+        registry, records, settings.build_cache_repository, settings.build_cache_max_age_seconds, now
+    )
+
+
+def release_build(build_id):
+    """
+    Release the scheduler slot, the in-flight entry and the buildkitd of a
+    finished build.
+    """
+    shared_build_scheduler().release(build_id)
+    shared_in_flight_builds().release(build_id)
+    pool = shared_buildkit_pool()
+    if pool is not None:
+        pool.release(build_id)
+
+
+def start_build_status_watcher():
+    """
+    Start, once per process, the watch keeping the build records up to date.
+    """
+    return shared_build_status_watcher(
+        KubeApiClient,
+        shared_build_record_store(get_settings()),
+        on_final=release_build,
+    )
+
+
 class BuildService:
     """
     BuildService is responsible for managing the build process in a Kubernetes environment.
@@ -36,12 +142,25 @@ class BuildService:
     based on the provided build configuration.
     """
 
-    def __init__(self, user_env=None):
+    def __init__(self, user_env=None, kube_client=None, record_store=None, executor=None, scheduler=None,
+                 in_flight=None, registry_client=None, buildkit_pool=None):
         # A super userful Kube Api Client
-        self.kube_client = KubeApiClient()       
+        self.kube_client = kube_client if kube_client is not None else KubeApiClient()
+        self._record_store = record_store
+        self._executor = executor
+        self._scheduler = scheduler
+        self._in_flight = in_flight if in_flight is not None else shared_in_flight_builds()
+        self._registry_client = registry_client
+        self._buildkit_pool = buildkit_pool if buildkit_pool is not None else shared_buildkit_pool()
         
         # generate a unique ID for the build
         self.id = str(uuid.uuid4())
+        # content hash of the build inputs, when the build can be deduplicated
+        self.content_hash = None
+        # the buildkitd of the pool running the build, None for a per-job daemon
+        self.buildkit_address = None
+        # the registry ref of the layer cache of the build, None without cache
+        self.cache_ref = None
 
         # user environment variables
         self.user_env = user_env if user_env is not None else {}
@@ -85,6 +204,224 @@ class BuildService:
             if status is None:
                 logging.error("Failed to create nuvolaris-buildkitd-conf ConfigMap")
 
+    def validate(self, build_config: dict):
+        """
+        Check a build request before it is queued.
+        Raise InvalidBuildError with the reason when it cannot be built.
+        """
+        self.build_config = build_config
+        if not self.registry_host:
+            raise InvalidBuildError("No registry host configured")
+        if 'file' in build_config:
+            self.decode_requirements(build_config.get('file') or "")
+            try:
+                self.get_requirements_file_from_kind()
+            except ValueError as e:
+                raise InvalidBuildError(str(e))
+
+    def decode_requirements(self, file_data: str) -> str:
+        """
+        Decode the base64 requirements file of a build request.
+        Raise InvalidBuildError when it is too large or not valid.
+        """
+        # Validate base64 data size (10MB limit for encoded data)
+        if len(file_data) > MAX_ENCODED_FILE_SIZE:
+            raise InvalidBuildError("Requirements file too large (max 10MB base64-encoded)")
+
+        try:
+            requirements = base64.b64decode(file_data).decode('utf-8')
+        except binascii.Error as e:
+            logging.error(f"Invalid base64 encoding: {e}")
+            raise InvalidBuildError("Requirements file must be valid base64-encoded data")
+        except UnicodeDecodeError as e:
+            logging.error(f"Invalid UTF-8 encoding: {e}")
+            raise InvalidBuildError("Requirements file must be valid UTF-8 text")
+
+        # Validate decoded size (5MB limit for decoded text)
+        if len(requirements) > MAX_DECODED_FILE_SIZE:
+            raise InvalidBuildError("Decoded requirements file too large (max 5MB)")
+        return requirements
+
+    def submit(self, build_config: dict, image_name: str) -> dict:
+        """
+        Record the build as queued and run its orchestration (init and build)
+        on the build executor, without waiting for it, once the build
+        scheduler admits it.
+        Return the build record, with its queue_position (0 when started).
+        An identical build of the same target already in flight is returned
+        instead, and an image already in the registry as a succeeded build.
+        Raise InvalidBuildError when the request cannot be built, before
+        anything is recorded, and QueueFullError when the build queue is full.
+        """
+        self.validate(build_config)
+
+        now = time.time()
+        records = self._records()
+        records.cleanup_expired(now)
+
+        if self.dedup_enabled(build_config):
+            self.content_hash = build_hash(build_config)
+        if self.content_hash:
+            joined = self._in_flight.claim((self.user, image_name, self.content_hash), self.id, self._is_active)
+            if joined is not None:
+                logging.info(f"Build {self.id} joins the identical build {joined}")
+                return {**records.get(joined), "queue_position": self._build_scheduler().position(joined) or 0}
+
+            cached = self._cached_image(build_config, image_name, now)
+            if cached is not None:
+                self._in_flight.release(self.id)
+                records.put(cached)
+                logging.info(f"Build {self.id} reuses the image {cached['image']}@{cached['digest']}")
+                return {**cached, "queue_position": 0}
+
+        record = {
+            "id": self.id,
+            "user": self.user,
+            "job_name": self.job_name,
+            "target": image_name,
+            "image": None,
+            "kind": build_config.get("kind"),
+            "status": BUILD_QUEUED,
+            "created_at": now,
+            "started_at": None,
+            "finished_at": None,
+            "digest": None,
+            "reason": None,
+            "content_hash": self.content_hash,
+            "cached": False,
+            "expires_at": now + get_settings().build_record_ttl_seconds,
+        }
+        records.put(record)
+
+        executor = self._executor if self._executor is not None else shared_build_executor()
+        try:
+            position = self._build_scheduler().submit(
+                self.user,
+                self.id,
+                lambda: executor.submit(self._run, build_config, image_name),
+            )
+        except QueueFullError as ex:
+            self._in_flight.release(self.id)
+            self._update_record(status=BUILD_FAILED, reason=str(ex), finished_at=time.time())
+            raise
+
+        logging.info(f"Build {self.id} queued for {self.user} at position {position}")
+        return {**record, "queue_position": position}
+
+    def _run(self, build_config: dict, image_name: str):
+        self._update_record(status=BUILD_STARTING)
+        try:
+            self.init(build_config=build_config)
+            success, msg = self.build(image_name)
+        except Exception as ex:
+            logging.error(f"Build {self.id} failed: {ex}")
+            success, msg = False, str(ex)
+
+        if success:
+            # the status watcher may already have seen the job running
+            self._update_record(only_from=[BUILD_QUEUED, BUILD_STARTING], status=BUILD_STARTED)
+            self._update_record(image=getattr(self, "image", None))
+            if self.cache_ref:
+                try:
+                    collect_build_cache_if_due(self._registry(), self._records())
+                except Exception as ex:
+                    logging.warning(f"Build cache collection failed: {ex}")
+        else:
+            self._update_record(status=BUILD_FAILED, reason=msg or "Build process failed.")
+            self._release()
+
+    def dedup_enabled(self, build_config: dict) -> bool:
+        """
+        Whether the build can be deduplicated: BUILD_DEDUP is on, the request
+        does not ask to force a build, and the image goes to the default
+        registry with the default credentials.
+        """
+        return (
+            get_settings().build_dedup
+            and not build_config.get("force")
+            and self.uses_default_registry()
+        )
+
+    def uses_default_registry(self) -> bool:
+        """
+        Whether the image goes to the registry of the cluster with the
+        registry-pull-secret, the one the registry client talks to, rather
+        than to a REGISTRY_HOST or REGISTRY_SECRET of the user environment.
+        """
+        if self.user_env.get("REGISTRY_SECRET") is not None:
+            return False
+        return bool(get_settings().registry_host) or not self.user_env.get("REGISTRY_HOST", "").strip()
+
+    def _is_active(self, build_id: str) -> bool:
+        record = self._records().get(build_id)
+        return record is not None and record.get("status") not in FINAL_STATUSES
+
+    def _cached_image(self, build_config: dict, image_name: str, now: float) -> dict | None:
+        """
+        Look up the image built from the same content hash in the registry,
+        tagging it with the requested tag too. Return the succeeded build
+        record, None when the image has to be built.
+        """
+        repository, tag = split_image_name(image_name)
+        registry = self._registry()
+        digest = registry.manifest_digest(repository, hash_tag(self.content_hash))
+        if digest is None:
+            return None
+        if registry.manifest_digest(repository, tag) != digest:
+            if not registry.tag_manifest(repository, hash_tag(self.content_hash), tag):
+                return None
+
+        return {
+            "id": self.id,
+            "user": self.user,
+            "job_name": None,
+            "target": image_name,
+            "image": f"{self.registry_host}/{image_name}",
+            "kind": build_config.get("kind"),
+            "status": BUILD_SUCCEEDED,
+            "created_at": now,
+            "started_at": now,
+            "finished_at": now,
+            "digest": digest,
+            "reason": None,
+            "content_hash": self.content_hash,
+            "cached": True,
+            "expires_at": now + get_settings().build_record_ttl_seconds,
+        }
+
+    def _registry(self) -> RegistryClient:
+        if self._registry_client is None:
+            secret = self.kube_client.get_secret("registry-pull-secret")
+            self._registry_client = RegistryClient(
+                self.registry_host,
+                credentials=registry_credentials(secret, self.registry_host),
+                scheme=get_settings().registry_scheme,
+            )
+        return self._registry_client
+
+    def _release(self):
+        self._build_scheduler().release(self.id)
+        self._in_flight.release(self.id)
+        if self._buildkit_pool is not None:
+            self._buildkit_pool.release(self.id)
+
+    def _build_scheduler(self):
+        if self._scheduler is None:
+            self._scheduler = shared_build_scheduler()
+        return self._scheduler
+
+    def _records(self):
+        if self._record_store is None:
+            self._record_store = shared_build_record_store(get_settings())
+        return self._record_store
+
+    def _update_record(self, only_from=None, **changes):
+        if only_from is not None:
+            record = self._records().get(self.id)
+            if record is None or record.get("status") not in only_from:
+                return
+        self._records().update(self.id, changes)
+
     def create_registry_secret(self, username: str, password: str, registry: str):
         randompart = ''.join(random.choices(string.ascii_lowercase + string.digits, k=5))
         random_name = f"reg-{self.user}-{randompart}"
@@ -104,7 +441,7 @@ class BuildService:
         """
 
         # Check environment variable (only use if not empty)
-        registry_host = os.environ.get("REGISTRY_HOST", "").strip()
+        registry_host = get_settings().registry_host
         if registry_host:
             return registry_host
 
@@ -204,10 +541,10 @@ class BuildService:
             is False and `message` contains an error description.
         """
         import tempfile
-        import base64
 
-        # define registry host
-        self.registry_host = self.get_registry_host()
+        # define registry host, already resolved by the constructor
+        if self.registry_host is None:
+            self.registry_host = self.get_registry_host()
         if self.registry_host is None:
             return (False, "No registry host configured")
         logging.info(f"Using registry host: {self.registry_host}")
@@ -221,8 +558,9 @@ class BuildService:
 
         logging.info(f"Using registry auth: {self.registry_auth}")
 
-        # firstly remove old build jobs
-        self.delete_old_build_jobs()
+        # without a ttl on the jobs, firstly remove old build jobs
+        if not get_settings().build_job_ttl_seconds:
+            self.delete_old_build_jobs()
 
         tmpdirname = tempfile.mkdtemp()
         logging.info(f"Starting the build to: {tmpdirname}")
@@ -231,30 +569,14 @@ class BuildService:
             logging.info("Decoding the requirements file from base64")
             # decode base64 self.build_config.get('file')
             try:
-                file_data = self.build_config.get('file', "")
-
-                # Validate base64 data size (10MB limit for encoded data)
-                if len(file_data) > 10_000_000:
-                    return (False, "Requirements file too large (max 10MB base64-encoded)")
-
-                # Decode base64 and UTF-8
-                requirements = base64.b64decode(file_data).decode('utf-8')
-
-                # Validate decoded size (5MB limit for decoded text)
-                if len(requirements) > 5_000_000:
-                    return (False, "Decoded requirements file too large (max 5MB)")
-
+                requirements = self.decode_requirements(self.build_config.get('file', ""))
                 requirements_file = self.get_requirements_file_from_kind()
 
                 with open(os.path.join(tmpdirname, requirements_file), 'w') as f:
                     f.write(requirements)
 
-            except binascii.Error as e:
-                logging.error(f"Invalid base64 encoding: {e}")
-                return (False, "Requirements file must be valid base64-encoded data")
-            except UnicodeDecodeError as e:
-                logging.error(f"Invalid UTF-8 encoding: {e}")
-                return (False, "Requirements file must be valid UTF-8 text")
+            except (InvalidBuildError, ValueError) as e:
+                return (False, str(e))
             except IOError as e:
                 logging.error(f"Failed to write requirements file: {e}")
                 return (False, f"Failed to write requirements file: {e}")
@@ -282,6 +604,9 @@ class BuildService:
             return (False, "Failed to create ConfigMap for build context")
 
         logging.info(f"ConfigMap {self.cm} created successfully")
+        self.cache_ref = self.build_cache_ref()
+        if self._buildkit_pool is not None:
+            self.buildkit_address = self._buildkit_pool.acquire(self.id)
         job_template = self.create_build_job(image_name)
 
         job = self.kube_client.post_job(job_template)
@@ -293,7 +618,62 @@ class BuildService:
 
         logging.info(f"Job {self.job_name} created successfully")
 
-        # Wait for the copy-build-context init container to complete before cleaning up resources
+        # The ConfigMap and the custom Secret are owned by the Job: the garbage
+        # collector removes them with it, once its ttlSecondsAfterFinished expires
+        if not self._set_build_resources_owner(job):
+            logging.warning(f"Failed to set the owner of the build resources of job {self.job_name}, cleaning them up in background")
+            threading.Thread(
+                target=self._cleanup_after_init_container,
+                name=f"cleanup-{self.job_name}",
+                daemon=True,
+            ).start()
+
+        # fail fast when the build pod cannot start
+        monitor_seconds = get_settings().build_monitor_seconds
+        if monitor_seconds:
+            BuildMonitor(
+                self.kube_client,
+                self.job_name,
+                timeout_seconds=monitor_seconds,
+                on_failure=self._on_build_failure,
+            ).start()
+
+        # Success: return True and the job name (string) so callers get a simple identifier
+        return (True, self.job_name)
+
+    def _on_build_failure(self, reason: str):
+        """
+        Release the resources of a build that cannot start: the Job with its
+        pods, the ConfigMap and the custom registry Secret.
+        """
+        logging.error(f"Build {self.job_name} cannot start: {reason}")
+        self._update_record(status=BUILD_FAILED, reason=reason)
+        if not self.kube_client.delete_job(job_name=self.job_name):
+            logging.error(f"Failed to delete job {self.job_name}")
+        self._cleanup_build_resources()
+        self._release()
+
+    def _set_build_resources_owner(self, job: dict) -> bool:
+        """
+        Add an owner reference to the build Job on the build ConfigMap and on
+        the custom registry Secret, if one was created.
+        """
+        owner = {
+            "apiVersion": "batch/v1",
+            "kind": "Job",
+            "name": job["metadata"]["name"],
+            "uid": job["metadata"]["uid"],
+        }
+        owned = self.kube_client.set_owner_reference("configmaps", self.cm, owner)
+        if self.custom_registry_auth:
+            owned = self.kube_client.set_owner_reference("secrets", self.registry_auth, owner) and owned
+        return owned
+
+    def _cleanup_after_init_container(self):
+        """
+        Delete the build resources once the copy-build-context init container
+        has copied the build context.
+        """
         # The init container needs to copy the ConfigMap contents to the workspace volume
         # Only after it completes (successfully or with error) can we safely delete the ConfigMap and Secret
         logging.info(f"Waiting for init container 'copy-build-context' to complete for job {self.job_name}")
@@ -311,9 +691,6 @@ class BuildService:
             logging.warning(f"Init container did not complete within timeout for job {self.job_name}, resources will not be cleaned up automatically")
             # Note: Resources are not cleaned up if init container doesn't complete
             # This prevents race conditions where the ConfigMap is deleted while the init container still needs it
-
-        # Success: return True and the job name (string) so callers get a simple identifier
-        return (True, self.job_name)
     
     def _cleanup_build_resources(self):
         """
@@ -333,9 +710,127 @@ class BuildService:
             else:
                 logging.info(f"Successfully deleted Secret {self.registry_auth}")
 
+    def build_labels(self) -> dict:
+        """Labels identifying the Job and Pods of this build."""
+        labels = {
+            BUILD_COMPONENT_LABEL: BUILD_COMPONENT,
+            BUILD_ID_LABEL: self.id,
+        }
+        if self.user:
+            labels[BUILD_USER_LABEL] = self.user
+        return labels
+
+    def job_ttl(self) -> dict:
+        """ttlSecondsAfterFinished of the build Job, when configured."""
+        ttl = get_settings().build_job_ttl_seconds
+        if not ttl:
+            return {}
+        return {"ttlSecondsAfterFinished": ttl}
+
+    def build_cache_ref(self) -> str | None:
+        """
+        The registry ref the build imports its layer cache from and exports
+        it to, shared by the builds of the same kind and base image.
+        None when BUILD_CACHE_MODE is off or the image goes to a custom registry.
+        """
+        settings = get_settings()
+        if settings.build_cache_mode == "off" or not self.uses_default_registry():
+            return None
+        tag = cache_tag(self.build_config)
+        self._records().touch_cache(tag, time.time())
+        return f"{self.registry_host}/{settings.build_cache_repository}:{tag}"
+
+    def build_resources(self) -> dict:
+        """
+        Resources of the buildkit container, from BUILD_CPU_LIMIT and
+        BUILD_MEMORY_LIMIT: requested as much as the limit, so the cluster
+        share of the builds is at most BUILD_MAX_RUNNING times the limits.
+        """
+        settings = get_settings()
+        limits = {}
+        if settings.build_cpu_limit:
+            limits["cpu"] = settings.build_cpu_limit
+        if settings.build_memory_limit:
+            limits["memory"] = settings.build_memory_limit
+        if not limits:
+            return {}
+        return {"resources": {"requests": dict(limits), "limits": limits}}
+
+    def build_selector(self) -> str:
+        """Label selector matching the build jobs of the current user."""
+        selector = f"{BUILD_COMPONENT_LABEL}={BUILD_COMPONENT}"
+        if self.user:
+            selector = f"{selector},{BUILD_USER_LABEL}={self.user}"
+        return selector
+
+    def expired_jobs_selector(self, max_age_hours: int, now=None) -> str:
+        """
+        Label selector matching the build jobs of the current user completed
+        more than max_age_hours ago: their completion hour label is none of the
+        recent ones.
+        """
+        now = now or datetime.now(timezone.utc)
+        recent = [(now - timedelta(hours=h)).strftime(BUILD_HOUR_FORMAT) for h in range(max_age_hours + 1)]
+        return (
+            f"{self.build_selector()},{BUILD_COMPLETED_HOUR_LABEL},"
+            f"{BUILD_COMPLETED_HOUR_LABEL} notin ({','.join(recent)})"
+        )
+
     def delete_old_build_jobs(self, max_age_hours: int = 24) -> int:
-        name_filter = f"build-{self.user}-" if self.user else "build"
-        jobs = self.kube_client.get_jobs(name_filter=name_filter)
+        """
+        Delete the successful build jobs of the current user older than max_age_hours.
+        The jobs labelled with their completion hour go with a single
+        deletecollection call; the jobs without the label, or all of them when
+        the bulk delete fails, are scanned and deleted in parallel, as are the
+        jobs created before the build labels, matched by name.
+        Return the number of deleted jobs, -1 on error.
+        """
+        with background_requests():
+            return self._delete_old_build_jobs(max_age_hours)
+
+    def _delete_old_build_jobs(self, max_age_hours: int) -> int:
+        count = self.kube_client.delete_jobs(
+            label_selector=self.expired_jobs_selector(max_age_hours),
+            field_selector="status.successful=1",
+        )
+        if count is None:
+            logging.warning("Bulk delete of old build jobs failed, deleting them one by one")
+            count = self.delete_expired_jobs(self.build_selector(), max_age_hours)
+        else:
+            unlabelled = self.delete_expired_jobs(f"{self.build_selector()},!{BUILD_COMPLETED_HOUR_LABEL}", max_age_hours)
+            count = -1 if unlabelled < 0 else count + unlabelled
+
+        legacy = self.delete_expired_jobs(f"!{BUILD_COMPONENT_LABEL}", max_age_hours, name_prefix=self.legacy_job_prefix())
+        if count < 0 or legacy < 0:
+            return -1
+        return count + legacy
+
+    def legacy_job_prefix(self) -> str:
+        """Name prefix of the build jobs of the current user created before the build labels."""
+        if self.user:
+            return f"{JOB_NAME}-{self.user}-"
+        return f"{JOB_NAME}-"
+
+    def delete_expired_jobs(self, label_selector: str, max_age_hours: int, name_prefix: str | None = None) -> int:
+        """
+        Scan the jobs matching label_selector and delete the ones completed
+        more than max_age_hours ago, BUILD_CLEANUP_CONCURRENCY at a time.
+        With name_prefix only the jobs whose name starts with it are scanned.
+        """
+        if name_prefix is None:
+            # filtered by the API server and read one page at a time, as
+            # metadata only: jobs the status watcher did not annotate yet are
+            # left to a later run
+            jobs = self.kube_client.get_job_status(label_selector=label_selector)
+        else:
+            # unwatched jobs carry no completion annotation, they are read whole
+            jobs = self.kube_client.get_jobs(label_selector=label_selector)
+            if jobs is not None:
+                jobs = (
+                    {"metadata": job["metadata"], "status": job.get("status") or {}}
+                    for job in jobs
+                    if job["metadata"]["name"].startswith(name_prefix)
+                )
 
         if jobs is None:
             logging.error("Failed to retrieve jobs list")
@@ -343,7 +838,7 @@ class BuildService:
 
         try:
             cutoff_time = datetime.now(timezone.utc) - timedelta(hours=max_age_hours)
-            count = 0
+            expired = []
 
             for j in jobs:
                 job = SimpleNamespace(**j)
@@ -357,7 +852,7 @@ class BuildService:
 
                 completed = False
                 # Check if job is completed
-                for c in status.conditions:
+                for c in getattr(status, "conditions", None) or []:
                     condition = SimpleNamespace(**c)
                     if condition.type == "Complete" and condition.status == "True":
                         completed = True
@@ -367,26 +862,35 @@ class BuildService:
                     continue
 
                 # Check completion time
-                completion_time = status.completionTime
+                completion_time = getattr(status, "completionTime", None)
                 if not completion_time:
                     continue
                 job_completion_time = datetime.strptime(completion_time,"%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
 
                 if job_completion_time < cutoff_time:
                     logging.info (f"Deleting job {job_name} (completed at {completion_time})")
-                    status = self.kube_client.delete_job(job_name=job_name)
-                    if not status:
-                        logging.error(f"Failed to delete job {job_name}")
-                    else:
-                        count+=1
-                        logging.info(f"Job {job_name} deleted successfully")
-            
-            return count
+                    expired.append(job_name)
+
+            if not expired:
+                return 0
+
+            workers = min(get_settings().build_cleanup_concurrency, len(expired))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self._delete_job_in_background, expired))
+
+            for job_name, deleted in zip(expired, results):
+                if not deleted:
+                    logging.error(f"Failed to delete job {job_name}")
+            return sum(1 for deleted in results if deleted)
         except Exception as e:
             logging.error(f"Error deleting old build jobs: {e}")
             return -1
 
     
+    def _delete_job_in_background(self, job_name: str) -> bool:
+        with background_requests():
+            return self.kube_client.delete_job(job_name=job_name)
+
     def check_build_dir(self, unzip_dir: str) -> bool:
         """
         Check if the unzipped directory contains a Dockerfile and is not empty."""
@@ -406,15 +910,23 @@ class BuildService:
             registry_image_name = f"{self.registry_host}/{image_name}"
         else:
             registry_image_name = f"{image_name}"
+        self.image = registry_image_name
+        # the image is pushed with its content hash tag too, for the next identical builds
+        output_names = registry_image_name
+        if self.content_hash:
+            repository, _ = split_image_name(registry_image_name)
+            output_names = f"{registry_image_name},{repository}:{hash_tag(self.content_hash)}"
 
         # --- MANIFEST DEL JOB ---
         job_manifest = {
             "apiVersion": "batch/v1",
             "kind": "Job",
-            "metadata": {"name": self.job_name},
+            "metadata": {"name": self.job_name, "labels": self.build_labels()},
             "spec": {
                 "backoffLimit": 0,
+                **self.job_ttl(),
                 "template": {
+                    "metadata": {"labels": self.build_labels()},
                     "spec": {
                         "restartPolicy": "Never",
                         "volumes": [
@@ -457,39 +969,76 @@ class BuildService:
                                 ],
                             }
                         ],
-                        "containers": [
-                            {
-                                "name": "buildkit",
-                                "image": "moby/buildkit:master-rootless",
-                                "command": ["sh", "-c"],
-                                "args": [
-                                    "rootlesskit buildkitd --config /config/buildkitd.toml  & sleep 3 && "
-                                    f"buildctl build --progress=plain --frontend=dockerfile.v0 --local context=/workspace --local dockerfile=/workspace --output=type=image,name={registry_image_name},push=true"
-                                ],                                
-                                "securityContext": {
-                                    "runAsUser": 1000,
-                                    "runAsGroup": 1000,
-                                    "allowPrivilegeEscalation": True,
-                                    "privileged": True,
-                                    "seccompProfile": { "type": "Unconfined" }
-                                },
-                                "env": [
-                                    { "name": "BUILDKIT_ROOTLESS", "value": "1" }
-                                ],
-                                "volumeMounts": [
-                                    { "name": "nuvolaris-buildkitd-conf", "mountPath": "/config" },
-                                    { "name": "workspace", "mountPath": "/workspace" },
-                                    { "name": "docker-config", "mountPath": "/home/user/.docker" },
-                                    { "name": "img-cache", "mountPath": "/tmp" },
-                                    { "name": "cdi-etc", "mountPath": "/etc/cdi" },
-                                    { "name": "cdi-run", "mountPath": "/var/run/cdi" },
-                                    { "name": "cdi-buildkit", "mountPath": "/etc/buildkit/cdi" },
-                                ],
-                            }
-                        ],
+                        "containers": [self.build_container(output_names)],
                     }
                 },
             },
         }
 
         return job_manifest
+
+    def build_container(self, output_names: str) -> dict:
+        """
+        The container running the build: buildctl against the buildkitd of
+        the pool chosen for the build, or against its own rootless buildkitd.
+        """
+        addr = f" --addr {self.buildkit_address}" if self.buildkit_address else ""
+        cache = ""
+        if self.cache_ref:
+            cache = (
+                f"--import-cache type=registry,ref={self.cache_ref} "
+                f"--export-cache type=registry,ref={self.cache_ref},mode={get_settings().build_cache_mode} "
+            )
+        buildctl = (
+            f"buildctl{addr} build --progress=plain --frontend=dockerfile.v0 --local context=/workspace --local dockerfile=/workspace "
+            f"'--output=type=image,\"name={output_names}\",push=true' {cache}"
+            # the pushed digest is read back from the pod status
+            "--metadata-file=/dev/termination-log"
+        )
+        if self.buildkit_address:
+            # a warm daemon of the pool: no privileges needed to run the client
+            return {
+                "name": "buildkit",
+                "image": "moby/buildkit:master-rootless",
+                "command": ["sh", "-c"],
+                "args": [buildctl],
+                "securityContext": {
+                    "runAsUser": 1000,
+                    "runAsGroup": 1000,
+                    "allowPrivilegeEscalation": False,
+                },
+                "volumeMounts": [
+                    { "name": "workspace", "mountPath": "/workspace" },
+                    { "name": "docker-config", "mountPath": "/home/user/.docker" },
+                ],
+            }
+
+        return {
+            "name": "buildkit",
+            "image": "moby/buildkit:master-rootless",
+            "command": ["sh", "-c"],
+            "args": [
+                "rootlesskit buildkitd --config /config/buildkitd.toml  & sleep 3 && "
+                + buildctl
+            ],
+            "securityContext": {
+                "runAsUser": 1000,
+                "runAsGroup": 1000,
+                "allowPrivilegeEscalation": True,
+                "privileged": True,
+                "seccompProfile": { "type": "Unconfined" }
+            },
+            "env": [
+                { "name": "BUILDKIT_ROOTLESS", "value": "1" }
+            ],
+            **self.build_resources(),
+            "volumeMounts": [
+                { "name": "nuvolaris-buildkitd-conf", "mountPath": "/config" },
+                { "name": "workspace", "mountPath": "/workspace" },
+                { "name": "docker-config", "mountPath": "/home/user/.docker" },
+                { "name": "img-cache", "mountPath": "/tmp" },
+                { "name": "cdi-etc", "mountPath": "/etc/cdi" },
+                { "name": "cdi-run", "mountPath": "/var/run/cdi" },
+                { "name": "cdi-buildkit", "mountPath": "/etc/buildkit/cdi" },
+            ],
+        }
@@ -0,0 +1,253 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from openserverless.common.kube_api_client import (
+    BUILD_COMPLETED_AT_ANNOTATION,
+    BUILD_COMPONENT,
+    BUILD_COMPONENT_LABEL,
+)
+from openserverless.common.rate_limiter import background_requests
+
+# build record status
+BUILD_QUEUED = "queued"
+BUILD_STARTING = "starting"
+BUILD_STARTED = "started"
+BUILD_RUNNING = "running"
+BUILD_SUCCEEDED = "succeeded"
+BUILD_FAILED = "failed"
+FINAL_STATUSES = [BUILD_SUCCEEDED, BUILD_FAILED]
+
+BUILD_ID_LABEL = "openserverless.apache.org/build-id"
+# completion hour (UTC) of a successful build Job, set by the status watcher so
+# the cleanup can select the expired jobs by label
+BUILD_COMPLETED_HOUR_LABEL = "openserverless.apache.org/build-completed-hour"
+BUILD_HOUR_FORMAT = "%Y%m%d%H"
+BUILD_CONTAINER = "buildkit"
+# watches are restarted, and the build objects listed again, once per hour
+WATCH_SECONDS = 3600
+
+_SHARED_WATCHER = None
+_SHARED_WATCHER_LOCK = threading.Lock()
+
+
+def _timestamp(value):
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc).timestamp()
+
+
+def job_changes(job):
+    """
+    Return the build record fields described by the status of a build Job.
+    """
+    status = job.get("status") or {}
+    changes = {}
+    if status.get("startTime"):
+        changes["started_at"] = _timestamp(status["startTime"])
+
+    for condition in status.get("conditions") or []:
+        if condition.get("status") != "True":
+            continue
+        if condition.get("type") == "Complete":
+            changes["status"] = BUILD_SUCCEEDED
+            changes["finished_at"] = _timestamp(status.get("completionTime") or condition.get("lastTransitionTime"))
+            return changes
+        if condition.get("type") == "Failed":
+            changes["status"] = BUILD_FAILED
+            changes["finished_at"] = _timestamp(condition.get("lastTransitionTime"))
+            changes["reason"] = f"{condition.get('reason', 'Failed')}: {condition.get('message', '')}".rstrip(": ")
+            return changes
+
+    if status.get("active"):
+        changes["status"] = BUILD_RUNNING
+    return changes
+
+
+def completed_hour(job):
+    """
+    Return the completion hour label of a successful build Job, None while it
+    has not completed.
+    """
+    status = job.get("status") or {}
+    if not status.get("completionTime"):
+        return None
+    for condition in status.get("conditions") or []:
+        if condition.get("type") == "Complete" and condition.get("status") == "True":
+            completed_at = datetime.strptime(status["completionTime"], "%Y-%m-%dT%H:%M:%SZ")
+            return completed_at.strftime(BUILD_HOUR_FORMAT)
+    return None
+
+
+def pod_changes(pod):
+    """
+    Return the build record fields described by the status of a build Pod:
+    the pushed image digest, written by buildctl to the termination message.
+    """
+    for container in (pod.get("status") or {}).get("containerStatuses") or []:
+        if container.get("name") != BUILD_CONTAINER:
+            continue
+        terminated = (container.get("state") or {}).get("terminated") or {}
+        if terminated.get("exitCode") != 0 or not terminated.get("message"):
+            continue
+        try:
+            metadata = json.loads(terminated["message"])
+        except ValueError:
+            continue
+        if metadata.get("containerimage.digest"):
+            return {"digest": metadata["containerimage.digest"]}
+    return {}
+
+
+class BuildStatusWatcher:
+    """
+    Keeps the build records up to date from the changes of the build Jobs and
+    Pods, followed by a watch on each: a status request reads the record only.
+    """
+
+    def __init__(self, kube_client_factory, records, namespace="nuvolaris", retry_seconds=5, on_final=None):
+        """
+        param: kube_client_factory callable returning a KubeApiClient, called
+               for every watch to pick up the rotated service account token
+        param: records the build record store
+        param: on_final callable receiving the id of a build whose Job
+               finished or was deleted, it may be called more than once
+        """
+        self._kube_client_factory = kube_client_factory
+        self._records = records
+        self._on_final = on_final
+        self._namespace = namespace
+        self._retry_seconds = retry_seconds
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        for name, target in [("jobs", self._watch_jobs), ("pods", self._watch_pods)]:
+            thread = threading.Thread(target=target, name=f"build-status-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stopped.set()
+
+    def apply(self, obj, changes):
+        """
+        Apply the changes to the record of the build owning obj.
+        A build in a final status only gets its digest updated.
+        """
+        build_id = (obj.get("metadata", {}).get("labels") or {}).get(BUILD_ID_LABEL)
+        if not build_id or not changes:
+            return None
+
+        record = self._records.get(build_id)
+        if record is None:
+            return None
+        if record.get("status") in FINAL_STATUSES:
+            changes = {key: value for key, value in changes.items() if key == "digest"}
+        changes = {key: value for key, value in changes.items() if record.get(key) != value}
+        if not changes:
+            return record
+        return self._records.update(build_id, changes)
+
+    def finished(self, job, deleted=False):
+        """
+        Notify on_final when the build Job was deleted or reached a terminal
+        condition, whether or not its build record still exists: the scheduler
+        slot of the build is released even after the record expired.
+        """
+        build_id = (job.get("metadata", {}).get("labels") or {}).get(BUILD_ID_LABEL)
+        if not build_id or self._on_final is None:
+            return
+        if not deleted and job_changes(job).get("status") not in FINAL_STATUSES:
+            return
+        try:
+            self._on_final(build_id)
+        except Exception as ex:
+            logging.error(f"failed to notify the end of build {build_id}: {ex}")
+
+    def label_completed(self, kube_client, job):
+        """
+        Label a successful build Job with its completion hour, and annotate it
+        with its completion time, once.
+        """
+        hour = completed_hour(job)
+        if hour is None:
+            return
+        metadata = job.get("metadata", {})
+        completed_at = job["status"]["completionTime"]
+        if (
+            (metadata.get("labels") or {}).get(BUILD_COMPLETED_HOUR_LABEL) == hour
+            and (metadata.get("annotations") or {}).get(BUILD_COMPLETED_AT_ANNOTATION) == completed_at
+        ):
+            return
+        kube_client.label_job(
+            metadata["name"],
+            {BUILD_COMPLETED_HOUR_LABEL: hour},
+            annotations={BUILD_COMPLETED_AT_ANNOTATION: completed_at},
+            namespace=self._namespace,
+        )
+
+    def _watch_jobs(self):
+        self._follow(f"/apis/batch/v1/namespaces/{self._namespace}/jobs", job_changes, jobs=True)
+
+    def _watch_pods(self):
+        self._follow(f"/api/v1/namespaces/{self._namespace}/pods", pod_changes)
+
+    def _follow(self, path, changes_of, jobs=False):
+        while not self._stopped.is_set():
+            try:
+                with background_requests():
+                    kube_client = self._kube_client_factory()
+                    events = kube_client.watch(
+                        f"{kube_client.host}{path}",
+                        label_selector=f"{BUILD_COMPONENT_LABEL}={BUILD_COMPONENT}",
+                        timeout_seconds=WATCH_SECONDS,
+                    )
+                    for event_type, obj in events:
+                        if event_type == "DELETED":
+                            if jobs:
+                                self.finished(obj, deleted=True)
+                        else:
+                            self.apply(obj, changes_of(obj))
+                            if jobs:
+                                self.label_completed(kube_client, obj)
+                                self.finished(obj)
+                        if self._stopped.is_set():
+                            events.close()
+                            return
+            except Exception as ex:
+                logging.warning(f"build status watch of {path} failed: {ex}")
+                time.sleep(self._retry_seconds)
+
+
+def shared_build_status_watcher(kube_client_factory, records, on_final=None):
+    """
+    Return the process wide build status watcher, starting it on first use.
+    """
+    global _SHARED_WATCHER
+    with _SHARED_WATCHER_LOCK:
+        if _SHARED_WATCHER is None:
+            _SHARED_WATCHER = BuildStatusWatcher(kube_client_factory, records, on_final=on_final)
+            _SHARED_WATCHER.start()
+        return _SHARED_WATCHER
@@ -0,0 +1,130 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import collections
+import logging
+import socket
+import threading
+import time
+
+from openserverless.config.settings import get_settings
+
+_SHARED_POOL = None
+_SHARED_POOL_LOCK = threading.Lock()
+
+
+def tcp_probe(address, timeout=1):
+    """
+    Return True when the buildkitd at tcp://host:port accepts connections.
+    """
+    host, _, port = address[len("tcp://"):].rpartition(":")
+    try:
+        with socket.create_connection((host, int(port)), timeout=timeout):
+            return True
+    except (OSError, ValueError):
+        return False
+
+
+class BuildkitPool:
+    """
+    Dispatches the builds to a pool of long running buildkitd daemons: each
+    build goes to the healthy daemon with the fewest builds dispatched by this
+    process, up to max_builds per daemon. When no daemon is available the
+    build runs its own buildkitd in the Job, as without a pool.
+    """
+
+    def __init__(self, addresses, max_builds=4, health_seconds=10, probe=tcp_probe, clock=time.monotonic):
+        self._addresses = list(addresses)
+        self._max_builds = max_builds
+        self._health_seconds = health_seconds
+        self._probe = probe
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._load = collections.Counter()
+        self._builds = {}
+        # address -> (healthy, checked at)
+        self._health = {}
+
+    def acquire(self, build_id):
+        """
+        Return the address of the daemon running build_id, None when the
+        build has to run its own daemon.
+        """
+        with self._lock:
+            if build_id in self._builds:
+                return self._builds[build_id]
+            candidates = sorted(
+                (address for address in self._addresses if self._load[address] < self._max_builds),
+                key=lambda address: self._load[address],
+            )
+
+        for address in candidates:
+            if not self._healthy(address):
+                continue
+            with self._lock:
+                # the load may have changed while probing
+                if self._load[address] >= self._max_builds:
+                    continue
+                self._load[address] += 1
+                self._builds[build_id] = address
+            logging.info(f"Build {build_id} dispatched to buildkitd {address}")
+            return address
+
+        logging.warning(f"No buildkitd of the pool available for build {build_id}, using a per-job daemon")
+        return None
+
+    def release(self, build_id):
+        with self._lock:
+            address = self._builds.pop(build_id, None)
+            if address is not None:
+                self._load[address] -= 1
+
+    def load(self):
+        with self._lock:
+            return {address: self._load[address] for address in self._addresses}
+
+    def _healthy(self, address):
+        with self._lock:
+            healthy, checked_at = self._health.get(address, (None, None))
+            if checked_at is not None and self._clock() - checked_at < self._health_seconds:
+                return healthy
+
+        healthy = self._probe(address)
+        if not healthy:
+            logging.warning(f"buildkitd {address} is not reachable")
+        with self._lock:
+            self._health[address] = (healthy, self._clock())
+        return healthy
+
+
+def shared_buildkit_pool():
+    """
+    Return the process wide buildkitd pool configured by BUILDKIT_POOL_ADDRESSES,
+    None when no pool is configured.
+    """
+    global _SHARED_POOL
+    settings = get_settings()
+    if not settings.buildkit_pool_addresses:
+        return None
+    with _SHARED_POOL_LOCK:
+        if _SHARED_POOL is None:
+            _SHARED_POOL = BuildkitPool(
+                settings.buildkit_pool_addresses,
+                max_builds=settings.buildkit_pool_max_builds,
+                health_seconds=settings.buildkit_pool_health_seconds,
+            )
+        return _SHARED_POOL
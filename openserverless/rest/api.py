@@ -18,6 +18,8 @@
 
 from openserverless import app
 import openserverless.common.response_builder as res_builder
+from openserverless.common.idp_http_client import shared_idp_http_client
+from openserverless.security.validate_ow_auth import validate_ow_auth
 
 @app.route('/system/info')
 def info():
@@ -111,4 +113,29 @@ def config():
     config = {
         
     }
-    return res_builder.build_response_with_data(config)
\ No newline at end of file
+    return res_builder.build_response_with_data(config)
+
+@app.route('/system/metrics')
+@validate_ow_auth()
+def metrics():
+    """
+    Metrics Endpoint
+    ---
+    tags:
+      - Config
+    summary: Get API client metrics
+    description: Returns call counters and latencies (seconds) per identity provider endpoint, to the whisk-system namespace only
+    operationId: getMetrics
+    security:
+        - openwhiskBasicAuth: []
+    responses:
+      200:
+        description: Metrics retrieved successfully
+        schema:
+          $ref: '#/definitions/MessageData'
+      401:
+        description: Unauthorized. Missing or non whisk-system authorization.
+        schema:
+          $ref: '#/definitions/Message'
+    """
+    return res_builder.build_response_with_data({"idp": shared_idp_http_client().metrics()})
@@ -192,6 +192,50 @@ def login_oidc():
     return auth_service.login_oidc(_extract_bearer_token())
 
 
+@app.route('/system/api/v1/auth/oidc/provisioning', methods=['POST'])
+def oidc_provisioning_status():
+    """
+    Poll an asynchronous SSO namespace provisioning
+    ---
+    tags:
+      - Authentication Api
+    summary: Get the progress of an SSO namespace provisioning
+    description: With SSO_AUTOPROVISION_ASYNC enabled, the first OIDC login of a new user returns 202 with a provisioning ticket instead of waiting for the operator. Poll this endpoint with the ticket until it returns the OpenServerless login data.
+    operationId: oidcProvisioningStatus
+    consumes:
+        - application/json
+    parameters:
+    - in: body
+      name: OidcProvisioning
+      required: true
+      schema:
+        type: object
+        properties:
+          ticket:
+            type: string
+    responses:
+      200:
+        description: Namespace ready. Returns OpenServerless user data.
+        schema:
+          $ref: '#/definitions/MessageData'
+      202:
+        description: Provisioning in progress. Returns the current phase (requested, cr_created, metadata_written).
+        schema:
+          type: object
+      404:
+        description: Unknown or already consumed provisioning ticket.
+        schema:
+          $ref: '#/definitions/Message'
+      504:
+        description: The namespace was not provisioned in time.
+        schema:
+          $ref: '#/definitions/Message'
+    """
+    body = request.get_json(silent=True) or {}
+    auth_service = AuthService()
+    return auth_service.provisioning_status(body.get("ticket"))
+
+
 @app.route('/system/api/v1/auth/oidc/device/start', methods=['POST'])
 def start_oidc_device_login():
     """
@@ -267,6 +311,56 @@ def poll_oidc_device_login():
     return OidcDeviceFlowService().poll(body.get("flow_id"))
 
 
+@app.route('/system/api/v1/auth/oidc/device/wait', methods=['POST'])
+def wait_oidc_device_login():
+    """
+    Long-poll backend-managed OIDC Device Authorization login
+    ---
+    tags:
+      - Authentication Api
+    summary: Wait for an SSO login flow managed by admin-api
+    description: When OIDC_DEVICE_BACKGROUND_POLL is enabled admin-api polls the configured OIDC provider in background and this call returns as soon as the login completes, or a pending status after the given timeout. Without background polling it behaves like the poll endpoint.
+    operationId: waitOidcDeviceLogin
+    consumes:
+        - application/json
+    parameters:
+    - in: body
+      name: OidcDeviceWait
+      required: true
+      schema:
+        type: object
+        properties:
+          flow_id:
+            type: string
+          timeout:
+            type: number
+            description: Maximum seconds to wait, capped by OIDC_DEVICE_WAIT_MAX_SECONDS (default 10). When a quarter of the LISTEN_THREADS already wait, the current status is returned at once
+    responses:
+      200:
+        description: Authentication successful. Returns OpenServerless user data.
+        schema:
+          $ref: '#/definitions/MessageData'
+      202:
+        description: Login is still pending at the identity provider.
+        schema:
+          type: object
+      400:
+        description: Login flow expired.
+        schema:
+          $ref: '#/definitions/Message'
+      401:
+        description: SSO login failed.
+        schema:
+          $ref: '#/definitions/Message'
+      404:
+        description: Unknown login flow or namespace not provisioned.
+        schema:
+          $ref: '#/definitions/Message'
+    """
+    body = request.get_json(silent=True) or {}
+    return OidcDeviceFlowService().wait(body.get("flow_id"), timeout=body.get("timeout"))
+
+
 @app.route('/system/api/v1/auth/oidc/password', methods=['POST'])
 def oidc_password_login():
     """
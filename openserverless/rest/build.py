@@ -15,17 +15,27 @@
 # specific language governing permissions and limitations
 # under the License.
 #
-import os
 from openserverless import app
 from http import HTTPStatus
 from flask import request, Response
 
 import openserverless.common.response_builder as res_builder
 from openserverless.common.utils import env_to_dict
-from openserverless.error.api_error import AuthorizationError
-from openserverless.impl.builder.build_service import BuildService
+from openserverless.config.settings import get_settings
+from openserverless.error.api_error import AuthorizationError, InvalidBuildError, QueueFullError
+from openserverless.impl.builder.build_records import shared_build_record_store
+from openserverless.impl.builder.build_scheduler import shared_build_scheduler
+from openserverless.impl.builder.build_service import (
+    BUILD_QUEUED,
+    BUILD_SUCCEEDED,
+    BuildService,
+    start_build_status_watcher,
+)
 from openserverless.common.openwhisk_authorize import OpenwhiskAuthorize
 
+# suggested to the clients when the build queue is full
+BUILD_RETRY_AFTER_SECONDS = 30
+
 def authorize() -> Response | dict:
     normalized_headers = {key.lower(): value for key, value in request.headers.items()}
     auth_header = normalized_headers.get('authorization', None)
@@ -84,26 +94,58 @@ def build():
               type: string
               description: Base64-encoded requirements file (optional, e.g., requirements.txt for Python)
               example: "cmVxdWVzdHM9PTIuMzEuMA=="
+            force:
+              type: boolean
+              description: Build the image even when an identical one is already in the registry or in flight
+              default: false
     responses:
       200:
-        description: Build process initiated successfully.
+        description: The image was already built from identical inputs, it is tagged with the target and returned at once.
+        schema:
+          type: object
+          properties:
+            message:
+              type: string
+              example: "Image already built: nuvolaris-registry-svc:5000/myuser:custom-tag"
+            status:
+              type: string
+              example: "ok"
+            id:
+              type: string
+            build_status:
+              type: string
+              example: "succeeded"
+            image:
+              type: string
+            digest:
+              type: string
+      202:
+        description: Build accepted, the job is created in background.
         schema:
           type: object
           properties:
             message:
               type: string
-              example: "Build process initiated successfully. Job: build-myuser-abc123"
-            data:
-              type: object
-              properties:
-                id:
-                  type: string
-                  description: Unique build ID
-                  example: "550e8400-e29b-41d4-a716-446655440000"
-                job_name:
-                  type: string
-                  description: Kubernetes job name
-                  example: "build-myuser-abc123"
+              example: "Build accepted. Job: build-myuser-abc123"
+            status:
+              type: string
+              example: "ok"
+            id:
+              type: string
+              description: Unique build ID
+              example: "550e8400-e29b-41d4-a716-446655440000"
+            job_name:
+              type: string
+              description: Kubernetes job name
+              example: "build-myuser-abc123"
+            build_status:
+              type: string
+              description: Build status (queued, starting, started, failed)
+              example: "queued"
+            queue_position:
+              type: integer
+              description: Position in the build queue, 0 when the build started
+              example: 0
       400:
         description: Bad Request. Missing or invalid parameters.
         schema:
@@ -112,6 +154,10 @@ def build():
         description: Unauthorized. Invalid or missing authorization header.
         schema:
           $ref: '#/definitions/Message'
+      429:
+        description: Too Many Requests. The build queue is full, retry after the Retry-After seconds.
+        schema:
+          $ref: '#/definitions/Message'
       500:
         description: Internal Server Error. Build process failed.
         schema:
@@ -148,22 +194,44 @@ def build():
     target_user = str(target).split(':')[0]
 
     # Strict user check is enabled by default for security
-    strict_user_check = os.environ.get("STRICT_USER_CHECK", "true").lower() not in ("false", "0", "no", "off")
-    if strict_user_check and (wsk_user_name != target_user):
+    if get_settings().strict_user_check and (wsk_user_name != target_user):
         return res_builder.build_error_message("Invalid target for the build.", status_code=HTTPStatus.BAD_REQUEST)
 
     env['wsk_user_name'] = wsk_user_name
+    start_build_status_watcher()
     build_service = BuildService(user_env=env)
-    build_service.init(build_config=json_data)
-    success, msg = build_service.build(json_data.get('target')) 
+    # the job is created by the build executor, the request thread returns at once
+    try:
+        record = build_service.submit(json_data, json_data.get('target'))
+    except InvalidBuildError as ex:
+        return res_builder.build_error_message(str(ex), status_code=HTTPStatus.BAD_REQUEST)
+    except QueueFullError as ex:
+        return res_builder.build_error_message(
+            f"Build rejected: {ex}",
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            headers={"Content-Type": "application/json", "Retry-After": str(BUILD_RETRY_AFTER_SECONDS)},
+        )
 
-    if not success:
-      return res_builder.build_error_message(msg or "Build process failed.", status_code=HTTPStatus.INTERNAL_SERVER_ERROR)
+    if record["status"] == BUILD_SUCCEEDED:
+        additional_data = {
+            "id": record["id"],
+            "build_status": record["status"],
+            "image": record["image"],
+            "digest": record["digest"],
+        }
+        return res_builder.build_response_message(f"Image already built: {record['image']}",
+                                                  data=additional_data,
+                                                  status_code=HTTPStatus.OK)
 
-    additional_data = {"id": build_service.id, "job_name": build_service.job_name }
-    return res_builder.build_response_message(f"Build process initiated successfully. Job: {msg}", 
+    additional_data = {
+        "id": record["id"],
+        "job_name": record["job_name"],
+        "build_status": record["status"],
+        "queue_position": record["queue_position"],
+    }
+    return res_builder.build_response_message(f"Build accepted. Job: {record['job_name']}",
                                               data=additional_data,
-                                              status_code=HTTPStatus.OK)
+                                              status_code=HTTPStatus.ACCEPTED)
 
 @app.route('/system/api/v1/build/cleanup', methods=['POST'])    
 def clean():
@@ -246,9 +314,163 @@ def clean():
     json_data = request.json
     max_age_hours = int(json_data.get('max_age_hours', 24)) 
     
+    # the watcher labels the completed jobs the cleanup selects
+    start_build_status_watcher()
     build_service = BuildService(user_env=env)
     clean_result = build_service.delete_old_build_jobs(max_age_hours=max_age_hours)
     if clean_result == -1:
         return res_builder.build_error_message("Failed to clean up old build jobs.", status_code=HTTPStatus.INTERNAL_SERVER_ERROR)
     
-    return res_builder.build_response_message(f"Cleaned up {clean_result} jobs successfully.", status_code=HTTPStatus.OK)
\ No newline at end of file
+    return res_builder.build_response_message(f"Cleaned up {clean_result} jobs successfully.", status_code=HTTPStatus.OK)
+
+
+def public_build_record(record: dict) -> dict:
+    public = {key: value for key, value in record.items() if key != "expires_at"}
+    if public.get("status") == BUILD_QUEUED:
+        # known only by the replica which queued the build
+        position = shared_build_scheduler().position(public["id"])
+        if position is not None:
+            public["queue_position"] = position
+    return public
+
+
+@app.route('/system/api/v1/build/<build_id>', methods=['GET'])
+def build_status(build_id):
+    """
+    Build Status Endpoint
+    ---
+    tags:
+      - Build
+    summary: Get the status of a build of the authenticated user.
+    description: >
+        The build record is kept up to date from the changes of the build Job and Pod,
+        the request does not query Kubernetes.
+    operationId: getBuild
+    security:
+        - openwhiskBasicAuth: []
+    parameters:
+      - in: path
+        name: build_id
+        type: string
+        required: true
+        description: The build id returned by the build submission
+    responses:
+      200:
+        description: The build record.
+        schema:
+          type: object
+          properties:
+            id:
+              type: string
+            job_name:
+              type: string
+            status:
+              type: string
+              description: queued, starting, started, running, succeeded or failed
+            image:
+              type: string
+            digest:
+              type: string
+            reason:
+              type: string
+              description: Failure reason
+            queue_position:
+              type: integer
+              description: Position in the build queue, while the build is queued
+            content_hash:
+              type: string
+              description: Hash of the build inputs, the image is also tagged bh-<content_hash>
+            cached:
+              type: boolean
+              description: True when an image built from identical inputs was reused
+            created_at:
+              type: number
+            started_at:
+              type: number
+            finished_at:
+              type: number
+      401:
+        description: Unauthorized. Invalid or missing authorization header.
+        schema:
+          $ref: '#/definitions/Message'
+      404:
+        description: Build not found.
+        schema:
+          $ref: '#/definitions/Message'
+    """
+    auth_result = authorize()
+    if isinstance(auth_result, Response):
+      return auth_result
+
+    start_build_status_watcher()
+    wsk_user_name = auth_result.get('login','').lower()
+    record = shared_build_record_store(get_settings()).get(build_id)
+    if record is None or record.get("user") != wsk_user_name:
+        return res_builder.build_error_message("Build not found.", status_code=HTTPStatus.NOT_FOUND)
+
+    return res_builder.build_response_with_data(public_build_record(record), status_code=HTTPStatus.OK)
+
+
+@app.route('/system/api/v1/build', methods=['GET'])
+def build_list():
+    """
+    Build List Endpoint
+    ---
+    tags:
+      - Build
+    summary: List the builds of the authenticated user, most recent first.
+    operationId: listBuilds
+    security:
+        - openwhiskBasicAuth: []
+    parameters:
+      - in: query
+        name: limit
+        type: integer
+        default: 20
+        description: Page size (max 100)
+      - in: query
+        name: offset
+        type: integer
+        default: 0
+        description: Number of builds to skip
+    responses:
+      200:
+        description: A page of build records.
+        schema:
+          type: object
+          properties:
+            builds:
+              type: array
+              items:
+                type: object
+            next_offset:
+              type: integer
+              description: Offset of the next page, missing on the last page
+      400:
+        description: Bad Request. Invalid limit or offset.
+        schema:
+          $ref: '#/definitions/Message'
+      401:
+        description: Unauthorized. Invalid or missing authorization header.
+        schema:
+          $ref: '#/definitions/Message'
+    """
+    auth_result = authorize()
+    if isinstance(auth_result, Response):
+      return auth_result
+
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return res_builder.build_error_message("Invalid limit or offset.", status_code=HTTPStatus.BAD_REQUEST)
+
+    start_build_status_watcher()
+    wsk_user_name = auth_result.get('login','').lower()
+    # one more record tells whether there is a next page
+    records = shared_build_record_store(get_settings()).list_by_user(wsk_user_name, offset=offset, limit=limit + 1)
+
+    data = {"builds": [public_build_record(record) for record in records[:limit]]}
+    if len(records) > limit:
+        data["next_offset"] = offset + limit
+    return res_builder.build_response_with_data(data, status_code=HTTPStatus.OK)
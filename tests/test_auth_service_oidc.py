@@ -19,6 +19,8 @@ import unittest
 from unittest.mock import patch
 
 from openserverless import app
+from openserverless.common.flow_store import InMemoryFlowStore
+import openserverless.couchdb.bcrypt_util as bu
 from openserverless.impl.auth.auth_service import AuthService
 
 
@@ -43,20 +45,49 @@ class SequencedCouchDB:
         return {"docs": self.docs_by_call[index]}
 
 
+class FakeNotifier:
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.subscribed = []
+        self.unsubscribed = []
+
+    def subscribe(self, key):
+        self.subscribed.append(key)
+
+    def unsubscribe(self, key):
+        self.unsubscribed.append(key)
+
+    def wait(self, key, timeout):
+        return self.doc
+
+
 class FakeKubeClient:
 
-    def __init__(self, existing=None, create_result=True):
+    def __init__(self, existing=None, create_result=True, created_meanwhile=None):
         self.existing = existing
         self.create_result = create_result
+        # seen by the API server only, not yet by the informer cache
+        self.created_meanwhile = created_meanwhile
         self.created = []
-
-    def get_whisk_user(self, username):
+        self.updated = []
+        self.update_result = True
+        self.gets = 0
+
+    def get_whisk_user(self, username, cached=True):
+        self.gets += 1
+        if not cached and self.created_meanwhile:
+            return self.created_meanwhile
         return self.existing
 
     def create_whisk_user(self, whisk_user):
         self.created.append(whisk_user)
         return self.create_result
 
+    def update_whisk_user(self, whisk_user):
+        self.updated.append(whisk_user)
+        return self.update_result
+
 
 class AuthServiceOidcTest(unittest.TestCase):
 
@@ -149,6 +180,46 @@ class AuthServiceOidcTest(unittest.TestCase):
         self.assertEqual(403, response.status_code)
         self.assertEqual("ko", response.json["status"])
 
+    def test_create_conflict_reads_the_whisk_user_from_the_api_server(self):
+        kube_client = FakeKubeClient(create_result=False, created_meanwhile={"metadata": {"name": "ssouser"}})
+        service = AuthService(
+            environ={"OIDC_USERNAME_CLAIM": "preferred_username"},
+            couch_db=FakeCouchDB([]),
+            kube_client=kube_client,
+        )
+
+        with app.app_context():
+            created = service.ensure_whisk_user(
+                "ssouser", "ssouser", "sso.user@example.test", {"iss": "http://issuer.test", "sub": "subject"}
+            )
+
+        self.assertTrue(created)
+        self.assertEqual(2, kube_client.gets)
+
+    def test_update_password_reads_the_whisk_user_from_the_api_server(self):
+        kube_client = FakeKubeClient(
+            existing={"metadata": {"resourceVersion": "1"}, "spec": {"password": "old"}},
+            created_meanwhile={"metadata": {"resourceVersion": "2"}, "spec": {"password": "old"}},
+        )
+        service = self.service([{"login": "devel", "password": bu.hash_password("old")}], kube_client=kube_client)
+
+        with app.app_context():
+            response = service.update_password("devel", "old", "new")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([{"metadata": {"resourceVersion": "2"}, "spec": {"password": "new"}}], kube_client.updated)
+
+    def test_update_password_reports_a_failed_update(self):
+        kube_client = FakeKubeClient(existing={"metadata": {}, "spec": {"password": "old"}})
+        kube_client.update_result = False
+        service = self.service([{"login": "devel", "password": bu.hash_password("old")}], kube_client=kube_client)
+
+        with app.app_context():
+            response = service.update_password("devel", "old", "new")
+
+        self.assertEqual(500, response.status_code)
+        self.assertEqual("ko", response.json["status"])
+
     @patch("openserverless.impl.auth.auth_service.OidcTokenValidator")
     def test_oidc_login_autoprovisions_whisk_user_when_enabled(self, validator_class):
         validator_class.return_value.validate.return_value = {
@@ -191,6 +262,7 @@ class AuthServiceOidcTest(unittest.TestCase):
         self.assertEqual("ssouser", response.json["LOGIN"])
         self.assertEqual("ssouser", response.json["NAMESPACE"])
         self.assertEqual(1, len(kube_client.created))
+        self.assertEqual(1, kube_client.gets)
 
         whisk_user = kube_client.created[0]
         self.assertEqual("WhiskUser", whisk_user["kind"])
@@ -281,6 +353,131 @@ class AuthServiceOidcTest(unittest.TestCase):
             ],
         )
 
+    @patch("openserverless.impl.auth.auth_service.OidcTokenValidator")
+    def test_oidc_login_reads_existing_whisk_user_once(self, validator_class):
+        validator_class.return_value.validate.return_value = {
+            "preferred_username": "devel",
+            "email": "devel@example.test",
+        }
+        kube_client = FakeKubeClient(existing={"metadata": {"name": "devel"}})
+        service = AuthService(
+            environ={
+                "OIDC_USERNAME_CLAIM": "preferred_username",
+                "SSO_AUTOPROVISION_ON_LOGIN": "true",
+                "SSO_AUTOPROVISION_TIMEOUT_SECONDS": "1",
+                "SSO_AUTOPROVISION_POLL_SECONDS": "0",
+            },
+            couch_db=SequencedCouchDB(
+                [[], [{"login": "devel", "email": "devel@example.test", "env": [{"key": "AUTH", "value": "uuid:key"}]}]]
+            ),
+            kube_client=kube_client,
+        )
+
+        with app.app_context():
+            response = service.login_oidc("token")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(1, kube_client.gets)
+        self.assertEqual([], kube_client.created)
+
+    @patch("openserverless.impl.auth.auth_service.OidcTokenValidator")
+    def test_oidc_login_autoprovision_waits_for_changes_notification(self, validator_class):
+        validator_class.return_value.validate.return_value = {
+            "iss": "http://issuer.test",
+            "sub": "keycloak-subject",
+            "preferred_username": "ssouser",
+            "email": "sso.user@example.test",
+        }
+        couch_db = SequencedCouchDB([[]])
+        notifier = FakeNotifier(
+            {
+                "login": "ssouser",
+                "email": "sso.user@example.test",
+                "env": [{"key": "AUTH", "value": "uuid:key"}],
+            }
+        )
+        service = AuthService(
+            environ={
+                "OIDC_USERNAME_CLAIM": "preferred_username",
+                "SSO_AUTOPROVISION_ON_LOGIN": "true",
+            },
+            couch_db=couch_db,
+            kube_client=FakeKubeClient(),
+            user_data_notifier=notifier,
+        )
+
+        with app.app_context():
+            response = service.login_oidc("token")
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("uuid:key", response.json["AUTH"])
+        self.assertEqual(["ssouser"], notifier.subscribed)
+        self.assertEqual(["ssouser"], notifier.unsubscribed)
+        # one lookup in login_oidc, one right after subscribing, none while waiting
+        self.assertEqual(2, couch_db.calls)
+
+    @patch("openserverless.impl.auth.auth_service.OidcTokenValidator")
+    def test_oidc_login_async_autoprovision_returns_ticket_then_login(self, validator_class):
+        validator_class.return_value.validate.return_value = {
+            "iss": "http://issuer.test",
+            "sub": "keycloak-subject",
+            "preferred_username": "ssouser",
+            "email": "sso.user@example.test",
+        }
+        environ = {
+            "OIDC_USERNAME_CLAIM": "preferred_username",
+            "SSO_AUTOPROVISION_ON_LOGIN": "true",
+            "SSO_AUTOPROVISION_ASYNC": "true",
+        }
+        tickets = InMemoryFlowStore()
+        kube_client = FakeKubeClient()
+        service = AuthService(
+            environ=environ,
+            couch_db=FakeCouchDB([]),
+            kube_client=kube_client,
+            ticket_store=tickets,
+        )
+
+        with app.app_context():
+            response = service.login_oidc("token")
+
+        self.assertEqual(202, response.status_code)
+        self.assertEqual("provisioning", response.json["status"])
+        self.assertEqual("cr_created", response.json["phase"])
+        self.assertEqual(1, len(kube_client.created))
+        ticket = response.json["ticket"]
+
+        pending = AuthService(
+            environ=environ,
+            couch_db=FakeCouchDB([{"login": "ssouser", "email": "sso.user@example.test", "env": []}]),
+            kube_client=FakeKubeClient(existing={"metadata": {"name": "ssouser"}}),
+            ticket_store=tickets,
+        )
+        with app.app_context():
+            response = pending.provisioning_status(ticket)
+
+        self.assertEqual(202, response.status_code)
+        self.assertEqual("metadata_written", response.json["phase"])
+        self.assertFalse(response.json["progress"]["ready"])
+
+        ready = AuthService(
+            environ=environ,
+            couch_db=FakeCouchDB(
+                # AUTH written in userenv only, as the login response reads it
+                [{"login": "ssouser", "email": "sso.user@example.test", "env": [], "userenv": [{"key": "AUTH", "value": "uuid:key"}]}]
+            ),
+            kube_client=FakeKubeClient(existing={"metadata": {"name": "ssouser"}}),
+            ticket_store=tickets,
+        )
+        with app.app_context():
+            response = ready.provisioning_status(ticket)
+            consumed = ready.provisioning_status(ticket)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual("uuid:key", response.json["AUTH"])
+        self.assertEqual("ssouser", response.json["NAMESPACE"])
+        self.assertEqual(404, consumed.status_code)
+
     @patch("openserverless.impl.auth.auth_service.OidcTokenValidator")
     def test_oidc_login_returns_500_when_auth_is_missing(self, validator_class):
         validator_class.return_value.validate.return_value = {
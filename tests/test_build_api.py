@@ -0,0 +1,83 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import unittest
+from unittest.mock import patch
+
+from openserverless import app
+from openserverless.impl.builder.build_records import InMemoryBuildRecordStore
+from openserverless.impl.builder.build_scheduler import BuildScheduler
+from openserverless.impl.builder.build_service import BuildService
+
+USER_DATA = {
+    "login": "devel",
+    "env": [{"key": "AUTH", "value": "uuid:key"}],
+    "userenv": [{"key": "REGISTRY_HOST", "value": "registry:5000"}],
+}
+
+
+class BuildApiTest(unittest.TestCase):
+
+    def setUp(self):
+        self.records = InMemoryBuildRecordStore()
+        self.submitted = []
+        self.scheduler = BuildScheduler(max_running=1, max_running_per_user=1, max_queued=1)
+
+    def build_service(self, user_env):
+        return BuildService(
+            user_env=user_env,
+            kube_client=object(),
+            record_store=self.records,
+            executor=self,
+            scheduler=self.scheduler,
+            registry_client=object(),
+        )
+
+    def submit(self, fn, *args):
+        self.submitted.append(fn)
+
+    @patch("openserverless.rest.build.start_build_status_watcher")
+    @patch("openserverless.rest.build.authorize", return_value=USER_DATA)
+    def test_invalid_requirements_file_is_rejected_with_400(self, authorize, start_watcher):
+        with patch("openserverless.rest.build.BuildService", side_effect=self.build_service):
+            response = app.test_client().post(
+                "/system/api/v1/build/start",
+                json={"source": "ghcr.io/nuvolaris/runtime-python:3.12", "target": "devel:tag", "kind": "python", "file": "not base64!"},
+            )
+
+        self.assertEqual(400, response.status_code)
+        self.assertEqual("Requirements file must be valid base64-encoded data", response.json["message"])
+        self.assertEqual([], self.submitted)
+        self.assertEqual([], self.records.list_by_user("devel"))
+
+    @patch("openserverless.rest.build.start_build_status_watcher")
+    @patch("openserverless.rest.build.authorize", return_value=USER_DATA)
+    def test_accepted_build_keeps_the_response_status(self, authorize, start_watcher):
+        with patch("openserverless.rest.build.BuildService", side_effect=self.build_service):
+            response = app.test_client().post(
+                "/system/api/v1/build/start",
+                json={"source": "ghcr.io/nuvolaris/runtime-python:3.12", "target": "devel:tag", "kind": "python"},
+            )
+
+        self.assertEqual(202, response.status_code)
+        self.assertEqual("ok", response.json["status"])
+        self.assertEqual("queued", response.json["build_status"])
+        self.assertEqual(1, len(self.submitted))
+
+
+if __name__ == "__main__":
+    unittest.main()
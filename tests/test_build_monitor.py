@@ -0,0 +1,125 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import unittest
+
+from openserverless.impl.builder.build_monitor import WATCH_ROUND_SECONDS, BuildMonitor
+
+
+def events_of(items):
+    for item in items:
+        yield item
+
+
+def pod(name, phase="Pending", waiting=None):
+    status = {"phase": phase}
+    if waiting:
+        status["containerStatuses"] = [{"name": "build", "state": {"waiting": {"reason": waiting}}}]
+    return {"metadata": {"name": name}, "status": status}
+
+
+class FakeMonitorKubeClient:
+
+    def __init__(self, pod_events=None, events=None):
+        self.pod_events = pod_events or []
+        self.events = events or {}
+        self.event_selectors = []
+        self.watch_timeouts = []
+
+    def watch_pods(self, namespace="nuvolaris", label_selector=None, timeout_seconds=300):
+        self.watch_timeouts.append(timeout_seconds)
+        return events_of(self.pod_events)
+
+    def watch_events(self, namespace="nuvolaris", field_selector=None, timeout_seconds=300):
+        self.watch_timeouts.append(timeout_seconds)
+        self.event_selectors.append(field_selector)
+        for key, items in self.events.items():
+            if key in field_selector:
+                return events_of(items)
+        return events_of([])
+
+
+class BuildMonitorTest(unittest.TestCase):
+
+    def monitor(self, kube_client):
+        self.failures = []
+        return BuildMonitor(kube_client, "build-1", timeout_seconds=5, on_failure=self.failures.append)
+
+    def test_image_pull_error_fails_the_build(self):
+        kube_client = FakeMonitorKubeClient(
+            pod_events=[("ADDED", pod("build-1-x")), ("MODIFIED", pod("build-1-x", waiting="ImagePullBackOff"))]
+        )
+        monitor = self.monitor(kube_client)
+        monitor.start()
+
+        reason = monitor.wait(5)
+
+        self.assertEqual("pod build-1-x: build: ImagePullBackOff", reason)
+        self.assertEqual([reason], self.failures)
+
+    def test_warning_event_of_the_pod_fails_the_build(self):
+        warning = {
+            "type": "Warning",
+            "reason": "FailedMount",
+            "message": 'secret "registry-pull-secret" not found',
+            "involvedObject": {"kind": "Pod", "name": "build-1-x"},
+        }
+        kube_client = FakeMonitorKubeClient(
+            pod_events=[("ADDED", pod("build-1-x"))],
+            events={"involvedObject.name=build-1-x": [("ADDED", warning)]},
+        )
+        monitor = self.monitor(kube_client)
+        monitor.start()
+
+        reason = monitor.wait(5)
+
+        self.assertEqual('build-1-x: FailedMount: secret "registry-pull-secret" not found', reason)
+        self.assertIn("involvedObject.kind=Pod,involvedObject.name=build-1-x,type=Warning", kube_client.event_selectors)
+
+    def test_running_pod_ends_the_monitoring(self):
+        kube_client = FakeMonitorKubeClient(pod_events=[("ADDED", pod("build-1-x")), ("MODIFIED", pod("build-1-x", "Running"))])
+        monitor = self.monitor(kube_client)
+        monitor.start()
+
+        self.assertIsNone(monitor.wait(5))
+        self.assertEqual([], self.failures)
+        # short watch rounds, so the event watches end soon after the start
+        self.assertTrue(all(timeout <= WATCH_ROUND_SECONDS for timeout in kube_client.watch_timeouts))
+
+    def test_a_first_scheduling_failure_does_not_fail_the_build(self):
+        warning = {
+            "type": "Warning",
+            "reason": "FailedScheduling",
+            "message": "0/3 nodes are available",
+            "count": 1,
+            "firstTimestamp": "2026-01-01T10:00:00Z",
+            "lastTimestamp": "2026-01-01T10:00:00Z",
+            "involvedObject": {"kind": "Pod", "name": "build-1-x"},
+        }
+        kube_client = FakeMonitorKubeClient(
+            pod_events=[("ADDED", pod("build-1-x")), ("MODIFIED", pod("build-1-x", "Running"))],
+            events={"involvedObject.name=build-1-x": [("ADDED", warning)]},
+        )
+        monitor = self.monitor(kube_client)
+        monitor.start()
+
+        self.assertIsNone(monitor.wait(5))
+        self.assertEqual([], self.failures)
+
+
+if __name__ == "__main__":
+    unittest.main()
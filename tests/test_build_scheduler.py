@@ -0,0 +1,94 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import unittest
+
+from openserverless.error.api_error import QueueFullError
+from openserverless.impl.builder.build_scheduler import BuildScheduler
+
+
+class BuildSchedulerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.started = []
+
+    def submit(self, scheduler, user, build_id):
+        return scheduler.submit(user, build_id, lambda: self.started.append(build_id))
+
+    def test_builds_start_up_to_the_global_limit(self):
+        scheduler = BuildScheduler(max_running=2, max_running_per_user=5, max_queued=10)
+
+        positions = [self.submit(scheduler, "devel", f"b{i}") for i in range(3)]
+
+        self.assertEqual([0, 0, 1], positions)
+        self.assertEqual(["b0", "b1"], self.started)
+
+        scheduler.release("b0")
+
+        self.assertEqual(["b0", "b1", "b2"], self.started)
+        self.assertEqual({"running": 2, "queued": 0}, scheduler.stats())
+
+    def test_users_are_served_round_robin(self):
+        scheduler = BuildScheduler(max_running=1, max_running_per_user=1, max_queued=10)
+        self.submit(scheduler, "devel", "running")
+        for i in range(3):
+            self.submit(scheduler, "devel", f"d{i}")
+        self.submit(scheduler, "admin", "a0")
+
+        # the single admin build comes right after the first devel one
+        self.assertEqual(2, scheduler.position("a0"))
+        self.assertEqual(4, scheduler.position("d2"))
+
+        for build_id in ["running", "d0", "a0"]:
+            scheduler.release(build_id)
+
+        self.assertEqual(["running", "d0", "a0", "d1"], self.started)
+
+    def test_per_user_limit_leaves_room_to_other_users(self):
+        scheduler = BuildScheduler(max_running=3, max_running_per_user=1, max_queued=10)
+
+        self.submit(scheduler, "devel", "d0")
+        self.assertEqual(1, self.submit(scheduler, "devel", "d1"))
+        self.submit(scheduler, "admin", "a0")
+
+        self.assertEqual(["d0", "a0"], self.started)
+
+    def test_full_queue_rejects_the_build(self):
+        scheduler = BuildScheduler(max_running=1, max_running_per_user=1, max_queued=1)
+        self.submit(scheduler, "devel", "d0")
+        self.submit(scheduler, "devel", "d1")
+
+        with self.assertRaises(QueueFullError):
+            self.submit(scheduler, "admin", "a0")
+
+    def test_release_is_idempotent_and_failed_starts_free_the_slot(self):
+        scheduler = BuildScheduler(max_running=1, max_running_per_user=1, max_queued=10)
+
+        def failing_start():
+            raise RuntimeError("executor shut down")
+
+        scheduler.submit("devel", "d0", failing_start)
+        self.submit(scheduler, "devel", "d1")
+        scheduler.release("d0")
+        scheduler.release("unknown")
+
+        self.assertEqual(["d1"], self.started)
+        self.assertEqual({"running": 1, "queued": 0}, scheduler.stats())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,359 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import base64
+import unittest
+
+from openserverless.error.api_error import InvalidBuildError, QueueFullError
+from openserverless.impl.builder.build_cache import (
+    InFlightBuilds,
+    build_hash,
+    cache_tag,
+    collect_build_cache,
+    hash_tag,
+)
+from openserverless.impl.builder.build_records import InMemoryBuildRecordStore
+from openserverless.impl.builder.build_scheduler import BuildScheduler
+from openserverless.impl.builder.buildkit_pool import BuildkitPool
+from openserverless.impl.builder.build_service import (
+    BUILD_FAILED,
+    BUILD_QUEUED,
+    BUILD_STARTED,
+    BUILD_SUCCEEDED,
+    BuildService,
+)
+
+
+def no_events():
+    return
+    yield
+
+
+class FakeBuildKubeClient:
+
+    def __init__(self, job_created=True):
+        self.job_created = job_created
+        self.config_maps = []
+        self.jobs = []
+
+    def get_config_map(self, cm_name, namespace="nuvolaris"):
+        if cm_name == "config":
+            return {"metadata": {"name": cm_name, "annotations": {"registry_host": "registry:5000"}}}
+        return {"metadata": {"name": cm_name}}
+
+    def get_secret(self, secret_name, namespace="nuvolaris"):
+        return {"metadata": {"name": secret_name}}
+
+    def post_config_map(self, cm_name, file_or_dir, namespace="nuvolaris"):
+        self.config_maps.append(cm_name)
+        return {"metadata": {"name": cm_name}}
+
+    def delete_config_map(self, cm_name, namespace="nuvolaris"):
+        return True
+
+    def post_job(self, job_manifest, namespace="nuvolaris"):
+        if not self.job_created:
+            return None
+        self.jobs.append(job_manifest)
+        return {"metadata": {"name": job_manifest["metadata"]["name"], "uid": "1234"}}
+
+    def set_owner_reference(self, resource, name, owner, namespace="nuvolaris"):
+        return True
+
+    def watch_pods(self, namespace="nuvolaris", label_selector=None, timeout_seconds=300):
+        return no_events()
+
+    def watch_events(self, namespace="nuvolaris", field_selector=None, timeout_seconds=300):
+        return no_events()
+
+
+class FakeRegistryClient:
+
+    def __init__(self, manifests=None):
+        self.manifests = manifests or {}
+        self.tagged = []
+
+    def manifest_digest(self, repository, reference):
+        return self.manifests.get(f"{repository}:{reference}")
+
+    def tag_manifest(self, repository, reference, tag):
+        self.tagged.append(f"{repository}:{tag}")
+        self.manifests[f"{repository}:{tag}"] = self.manifests[f"{repository}:{reference}"]
+        return True
+
+    def list_tags(self, repository):
+        return [name.split(":", 1)[1] for name in self.manifests if name.startswith(f"{repository}:")]
+
+    def delete_manifest(self, repository, digest):
+        for name in [name for name, value in self.manifests.items() if value == digest]:
+            del self.manifests[name]
+        return True
+
+
+class DeferredExecutor:
+
+    def __init__(self):
+        self.tasks = []
+
+    def submit(self, fn, *args):
+        self.tasks.append((fn, args))
+
+    def run_all(self):
+        for fn, args in self.tasks:
+            fn(*args)
+
+
+BUILD_CONFIG = {"source": "ghcr.io/nuvolaris/runtime-python:3.12", "target": "devel:tag", "kind": "python"}
+
+
+class BuildServiceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.records = InMemoryBuildRecordStore()
+        self.executor = DeferredExecutor()
+        self.scheduler = BuildScheduler(max_running=1, max_running_per_user=1, max_queued=1)
+        self.in_flight = InFlightBuilds()
+        self.registry = FakeRegistryClient()
+
+    def service(self, kube_client, user_env=None, **kwargs):
+        return BuildService(
+            user_env={"wsk_user_name": "devel", **(user_env or {})},
+            kube_client=kube_client,
+            record_store=self.records,
+            executor=self.executor,
+            scheduler=self.scheduler,
+            in_flight=self.in_flight,
+            registry_client=self.registry,
+            **kwargs,
+        )
+
+
+class BuildServiceSubmitTest(BuildServiceTestCase):
+
+    def test_submit_records_the_build_and_returns_before_the_job_is_created(self):
+        kube_client = FakeBuildKubeClient()
+        service = self.service(kube_client)
+
+        record = service.submit(BUILD_CONFIG, "devel:tag")
+
+        self.assertEqual(BUILD_QUEUED, record["status"])
+        self.assertEqual(0, record["queue_position"])
+        self.assertEqual(service.job_name, record["job_name"])
+        self.assertEqual([], kube_client.jobs)
+
+        self.executor.run_all()
+
+        self.assertEqual(BUILD_STARTED, self.records.get(service.id)["status"])
+        self.assertEqual("registry:5000/devel:tag", self.records.get(service.id)["image"])
+        self.assertEqual(service.job_name, kube_client.jobs[0]["metadata"]["name"])
+
+    def test_invalid_request_is_rejected_before_it_is_recorded(self):
+        service = self.service(FakeBuildKubeClient())
+
+        with self.assertRaises(InvalidBuildError):
+            service.submit({**BUILD_CONFIG, "file": "not base64!"}, "devel:tag")
+        with self.assertRaises(InvalidBuildError):
+            service.submit({**BUILD_CONFIG, "kind": "cobol", "file": "YQ=="}, "devel:tag")
+
+        self.assertIsNone(self.records.get(service.id))
+        self.assertEqual({"running": 0, "queued": 0}, self.scheduler.stats())
+
+    def test_failed_orchestration_is_recorded(self):
+        service = self.service(FakeBuildKubeClient(job_created=False))
+
+        service.submit(BUILD_CONFIG, "devel:tag")
+        self.executor.run_all()
+
+        record = self.records.get(service.id)
+        self.assertEqual(BUILD_FAILED, record["status"])
+        self.assertEqual(f"Failed to create job {service.job_name}", record["reason"])
+        self.assertEqual({"running": 0, "queued": 0}, self.scheduler.stats())
+
+    def test_pool_daemon_runs_the_build_without_privileges(self):
+        kube_client = FakeBuildKubeClient()
+        pool = BuildkitPool(["tcp://buildkitd-0.buildkitd:1234"], probe=lambda address: True)
+        service = self.service(kube_client, buildkit_pool=pool)
+
+        service.submit(BUILD_CONFIG, "devel:tag")
+        self.executor.run_all()
+
+        container = kube_client.jobs[0]["spec"]["template"]["spec"]["containers"][0]
+        self.assertTrue(container["args"][0].startswith("buildctl --addr tcp://buildkitd-0.buildkitd:1234 build"))
+        self.assertNotIn("privileged", container["securityContext"])
+
+    def test_builds_beyond_the_limits_wait_or_are_rejected(self):
+        kube_client = FakeBuildKubeClient()
+        forced = {**BUILD_CONFIG, "force": True}
+        self.service(kube_client).submit(forced, "devel:tag")
+        waiting = self.service(kube_client).submit(forced, "devel:tag")
+
+        self.assertEqual(1, waiting["queue_position"])
+        self.assertEqual(1, len(self.executor.tasks))
+
+        rejected = self.service(kube_client)
+        with self.assertRaises(QueueFullError):
+            rejected.submit(forced, "devel:tag")
+        self.assertEqual(BUILD_FAILED, self.records.get(rejected.id)["status"])
+
+
+class BuildServiceDedupTest(BuildServiceTestCase):
+
+    def test_identical_builds_in_flight_are_coalesced(self):
+        kube_client = FakeBuildKubeClient()
+        first = self.service(kube_client)
+        first.submit(BUILD_CONFIG, "devel:tag")
+
+        joined = self.service(kube_client).submit(dict(BUILD_CONFIG), "devel:tag")
+        other_target = self.service(kube_client).submit(BUILD_CONFIG, "devel:other")
+
+        self.assertEqual(first.id, joined["id"])
+        self.assertNotEqual(first.id, other_target["id"])
+
+        self.executor.run_all()
+        args = kube_client.jobs[0]["spec"]["template"]["spec"]["containers"][0]["args"][0]
+        self.assertIn(f"name=registry:5000/devel:tag,registry:5000/devel:{hash_tag(first.content_hash)}", args)
+
+    def test_image_in_the_registry_is_reused_without_a_job(self):
+        kube_client = FakeBuildKubeClient()
+        self.registry.manifests[f"devel:{hash_tag(build_hash(BUILD_CONFIG))}"] = "sha256:abc"
+        service = self.service(kube_client)
+
+        record = service.submit(BUILD_CONFIG, "devel:tag")
+
+        self.assertEqual(BUILD_SUCCEEDED, record["status"])
+        self.assertEqual("sha256:abc", record["digest"])
+        self.assertTrue(self.records.get(service.id)["cached"])
+        self.assertEqual(["devel:tag"], self.registry.tagged)
+        self.assertEqual([], self.executor.tasks)
+
+    def test_builds_to_a_user_registry_are_not_deduplicated(self):
+        kube_client = FakeBuildKubeClient()
+        self.registry.manifests[f"devel:{hash_tag(build_hash(BUILD_CONFIG))}"] = "sha256:abc"
+        service = self.service(kube_client, user_env={"REGISTRY_HOST": "user-registry:5000"})
+
+        record = service.submit(BUILD_CONFIG, "devel:tag")
+
+        self.assertEqual(BUILD_QUEUED, record["status"])
+        self.assertIsNone(service.content_hash)
+        self.assertEqual([], self.registry.tagged)
+
+    def test_content_hash_ignores_the_file_encoding(self):
+        crlf = {**BUILD_CONFIG, "file": base64.b64encode(b"requests==2.31.0\r\n\r\n").decode()}
+        lf = {**BUILD_CONFIG, "file": base64.b64encode(b"requests==2.31.0").decode()}
+
+        self.assertEqual(build_hash(lf), build_hash(crlf))
+        self.assertNotEqual(build_hash(BUILD_CONFIG), build_hash(lf))
+
+
+
+class BuildCacheTest(BuildServiceTestCase):
+
+    def test_build_imports_and_exports_the_cache_of_its_kind_and_base(self):
+        kube_client = FakeBuildKubeClient()
+
+        self.service(kube_client).submit(BUILD_CONFIG, "devel:tag")
+        self.executor.run_all()
+
+        ref = f"registry:5000/buildcache:{cache_tag(BUILD_CONFIG)}"
+        args = kube_client.jobs[0]["spec"]["template"]["spec"]["containers"][0]["args"][0]
+        self.assertIn(f"--import-cache type=registry,ref={ref} ", args)
+        self.assertIn(f"--export-cache type=registry,ref={ref},mode=min ", args)
+        self.assertIn(cache_tag(BUILD_CONFIG), self.records.cache_uses())
+        self.assertEqual(cache_tag(BUILD_CONFIG), cache_tag({**BUILD_CONFIG, "file": "cmVxdWVzdHM="}))
+
+    def test_unused_cache_tags_are_collected(self):
+        self.registry.manifests.update({"buildcache:python-old": "sha256:old", "buildcache:python-new": "sha256:new"})
+        self.records.touch_cache("python-old", 1000.0)
+        self.records.touch_cache("python-new", 5000.0)
+
+        deleted = collect_build_cache(self.registry, self.records, "buildcache", max_age_seconds=3600, now=6000.0)
+
+        self.assertEqual(1, deleted)
+        self.assertEqual({"buildcache:python-new": "sha256:new"}, self.registry.manifests)
+        self.assertEqual({"python-new": 5000.0}, self.records.cache_uses())
+
+    def test_cache_tags_sharing_a_digest_in_use_are_kept(self):
+        self.registry.manifests.update({"buildcache:python-old": "sha256:same", "buildcache:python-new": "sha256:same"})
+        self.records.touch_cache("python-old", 1000.0)
+        self.records.touch_cache("python-new", 5000.0)
+
+        deleted = collect_build_cache(self.registry, self.records, "buildcache", max_age_seconds=3600, now=6000.0)
+
+        self.assertEqual(0, deleted)
+        self.assertIn("buildcache:python-new", self.registry.manifests)
+        self.assertIn("python-old", self.records.cache_uses())
+
+    def test_unknown_cache_tags_are_adopted(self):
+        self.registry.manifests["buildcache:go-unknown"] = "sha256:go"
+
+        collect_build_cache(self.registry, self.records, "buildcache", max_age_seconds=3600, now=6000.0)
+
+        self.assertEqual({"go-unknown": 6000.0}, self.records.cache_uses())
+        self.assertIn("buildcache:go-unknown", self.registry.manifests)
+
+
+
+class FakeCleanupKubeClient(FakeBuildKubeClient):
+
+    def __init__(self, legacy_jobs):
+        super().__init__()
+        self.legacy_jobs = legacy_jobs
+        self.listed = []
+        self.deleted = []
+
+    def delete_jobs(self, label_selector=None, field_selector=None, namespace="nuvolaris"):
+        return 2
+
+    def get_job_status(self, namespace="nuvolaris", label_selector=None):
+        return iter([])
+
+    def get_jobs(self, name_filter=None, namespace="nuvolaris", label_selector=None, field_selector=None, resource_version=None):
+        self.listed.append(label_selector)
+        return iter(self.legacy_jobs)
+
+    def delete_job(self, job_name, namespace="nuvolaris"):
+        self.deleted.append(job_name)
+        return True
+
+
+def completed_job(name, completion_time):
+    return {
+        "metadata": {"name": name},
+        "status": {"conditions": [{"type": "Complete", "status": "True"}], "completionTime": completion_time},
+    }
+
+
+class BuildCleanupTest(BuildServiceTestCase):
+
+    def test_unlabelled_jobs_of_the_user_are_deleted_by_name(self):
+        kube_client = FakeCleanupKubeClient(
+            [
+                completed_job("build-devel-old", "2020-01-01T10:00:00Z"),
+                completed_job("build-other-old", "2020-01-01T10:00:00Z"),
+                completed_job("build-devel-new", "2999-01-01T10:00:00Z"),
+            ]
+        )
+
+        deleted = self.service(kube_client).delete_old_build_jobs(max_age_hours=24)
+
+        self.assertEqual(3, deleted)
+        self.assertEqual(["!app.kubernetes.io/component"], kube_client.listed)
+        self.assertEqual(["build-devel-old"], kube_client.deleted)
+
+
+if __name__ == "__main__":
+    unittest.main()
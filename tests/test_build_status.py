@@ -0,0 +1,192 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import json
+import unittest
+
+from openserverless.common.kube_api_client import BUILD_COMPLETED_AT_ANNOTATION
+from openserverless.impl.builder.build_records import InMemoryBuildRecordStore, RedisBuildRecordStore
+from openserverless.impl.builder.build_status import (
+    BUILD_FAILED,
+    BUILD_COMPLETED_HOUR_LABEL,
+    BUILD_ID_LABEL,
+    BUILD_RUNNING,
+    BUILD_STARTED,
+    BUILD_SUCCEEDED,
+    BuildStatusWatcher,
+    job_changes,
+    pod_changes,
+)
+
+
+def record(build_id, user="devel", created_at=1000.0, status=BUILD_STARTED):
+    return {
+        "id": build_id,
+        "user": user,
+        "status": status,
+        "created_at": created_at,
+        "expires_at": created_at + 3600,
+        "digest": None,
+    }
+
+
+class FakeRedis:
+
+    def __init__(self):
+        self.values = {}
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+
+def labelled(build_id, status):
+    return {"metadata": {"name": f"build-{build_id}", "labels": {BUILD_ID_LABEL: build_id}}, "status": status}
+
+
+class BuildRecordStoreTest(unittest.TestCase):
+
+    def test_list_by_user_pages_most_recent_first(self):
+        store = InMemoryBuildRecordStore()
+        for i in range(5):
+            store.put(record(f"b{i}", created_at=1000.0 + i))
+        store.put(record("other", user="admin"))
+
+        first = store.list_by_user("devel", offset=0, limit=2)
+        second = store.list_by_user("devel", offset=2, limit=2)
+
+        self.assertEqual(["b4", "b3"], [r["id"] for r in first])
+        self.assertEqual(["b2", "b1"], [r["id"] for r in second])
+
+    def test_expired_records_leave_the_index(self):
+        store = InMemoryBuildRecordStore()
+        store.put(record("b1", created_at=1000.0))
+
+        store.cleanup_expired(1000.0 + 3600)
+
+        self.assertIsNone(store.get("b1"))
+        self.assertEqual([], store.list_by_user("devel"))
+
+    def test_cache_collection_is_claimed_once_per_interval(self):
+        store = InMemoryBuildRecordStore()
+
+        self.assertTrue(store.claim_cache_gc(1000.0, 3600))
+        self.assertFalse(store.claim_cache_gc(2000.0, 3600))
+        self.assertTrue(store.claim_cache_gc(4600.0, 3600))
+
+    def test_replicas_sharing_redis_claim_the_cache_collection_once(self):
+        client = FakeRedis()
+        replicas = [RedisBuildRecordStore(client), RedisBuildRecordStore(client)]
+
+        self.assertEqual([True, False], [store.claim_cache_gc(1000.0, 3600) for store in replicas])
+
+
+class BuildStatusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.records = InMemoryBuildRecordStore()
+        self.finished = []
+        self.watcher = BuildStatusWatcher(lambda: None, self.records, on_final=self.finished.append)
+
+    def test_job_changes_follow_the_job_status(self):
+        self.assertEqual(
+            {"status": BUILD_RUNNING, "started_at": 1767261600.0},
+            job_changes({"status": {"active": 1, "startTime": "2026-01-01T10:00:00Z"}}),
+        )
+        failed = job_changes(
+            {"status": {"conditions": [{"type": "Failed", "status": "True", "reason": "BackoffLimitExceeded"}]}}
+        )
+        self.assertEqual(BUILD_FAILED, failed["status"])
+        self.assertEqual("BackoffLimitExceeded", failed["reason"])
+
+    def test_pod_changes_read_the_digest_from_the_termination_message(self):
+        metadata = {"containerimage.digest": "sha256:abc", "image.name": "registry:5000/devel:tag"}
+        pod = {
+            "status": {
+                "containerStatuses": [
+                    {"name": "buildkit", "state": {"terminated": {"exitCode": 0, "message": json.dumps(metadata)}}}
+                ]
+            }
+        }
+
+        self.assertEqual({"digest": "sha256:abc"}, pod_changes(pod))
+
+    def test_final_status_is_not_overwritten(self):
+        self.records.put(record("b1"))
+        complete = {"conditions": [{"type": "Complete", "status": "True"}], "completionTime": "2026-01-01T10:05:00Z"}
+
+        self.watcher.apply(labelled("b1", complete), job_changes(labelled("b1", complete)))
+        self.watcher.apply(labelled("b1", {"active": 1}), {"status": BUILD_RUNNING, "digest": "sha256:abc"})
+
+        stored = self.records.get("b1")
+        self.assertEqual(BUILD_SUCCEEDED, stored["status"])
+        self.assertEqual("sha256:abc", stored["digest"])
+
+    def test_finished_builds_are_notified(self):
+        self.records.put(record("b1"))
+        running = labelled("b1", {"active": 1})
+
+        self.watcher.finished(running)
+        self.assertEqual([], self.finished)
+
+        failed = labelled("b1", {"conditions": [{"type": "Failed", "status": "True"}]})
+        self.watcher.finished(failed)
+        # a deleted job
+        self.watcher.finished(labelled("b2", {}), deleted=True)
+
+        self.assertEqual(["b1", "b2"], self.finished)
+
+    def test_finished_builds_are_notified_after_their_record_expired(self):
+        complete = labelled("expired", {"conditions": [{"type": "Complete", "status": "True"}]})
+
+        self.assertIsNone(self.watcher.apply(complete, job_changes(complete)))
+        self.watcher.finished(complete)
+
+        self.assertEqual(["expired"], self.finished)
+
+    def test_completed_jobs_are_labelled_with_their_completion_hour(self):
+        class FakeKubeClient:
+            def __init__(self):
+                self.labelled = []
+
+            def label_job(self, name, labels, annotations=None, namespace="nuvolaris"):
+                self.labelled.append((name, labels, annotations))
+                return True
+
+        kube_client = FakeKubeClient()
+        complete = {"conditions": [{"type": "Complete", "status": "True"}], "completionTime": "2026-01-01T10:05:00Z"}
+        job = labelled("b1", complete)
+
+        self.watcher.label_completed(kube_client, labelled("b1", {"active": 1}))
+        self.watcher.label_completed(kube_client, job)
+        job["metadata"]["labels"][BUILD_COMPLETED_HOUR_LABEL] = "2026010110"
+        job["metadata"]["annotations"] = {BUILD_COMPLETED_AT_ANNOTATION: "2026-01-01T10:05:00Z"}
+        self.watcher.label_completed(kube_client, job)
+
+        self.assertEqual(
+            [("build-b1", {BUILD_COMPLETED_HOUR_LABEL: "2026010110"}, {BUILD_COMPLETED_AT_ANNOTATION: "2026-01-01T10:05:00Z"})],
+            kube_client.labelled,
+        )
+
+    def test_objects_of_unknown_builds_are_ignored(self):
+        self.assertIsNone(self.watcher.apply(labelled("unknown", {"active": 1}), {"status": BUILD_RUNNING}))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import unittest
+
+from openserverless.impl.builder.buildkit_pool import BuildkitPool
+
+DAEMON_0 = "tcp://buildkitd-0.buildkitd:1234"
+DAEMON_1 = "tcp://buildkitd-1.buildkitd:1234"
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeProbe:
+
+    def __init__(self, down=()):
+        self.down = set(down)
+        self.calls = []
+
+    def __call__(self, address):
+        self.calls.append(address)
+        return address not in self.down
+
+
+class BuildkitPoolTest(unittest.TestCase):
+
+    def pool(self, probe, max_builds=2):
+        self.clock = FakeClock()
+        return BuildkitPool([DAEMON_0, DAEMON_1], max_builds=max_builds, health_seconds=10, probe=probe, clock=self.clock)
+
+    def test_builds_go_to_the_least_loaded_daemon(self):
+        pool = self.pool(FakeProbe())
+
+        addresses = [pool.acquire(f"b{i}") for i in range(3)]
+        pool.release("b1")
+
+        self.assertEqual([DAEMON_0, DAEMON_1, DAEMON_0], addresses)
+        self.assertEqual(DAEMON_1, pool.acquire("b3"))
+        self.assertEqual({DAEMON_0: 2, DAEMON_1: 1}, pool.load())
+
+    def test_full_or_unhealthy_pool_falls_back_to_a_per_job_daemon(self):
+        probe = FakeProbe(down=[DAEMON_1])
+        pool = self.pool(probe, max_builds=1)
+
+        self.assertEqual(DAEMON_0, pool.acquire("b0"))
+        self.assertIsNone(pool.acquire("b1"))
+
+    def test_health_is_probed_again_after_health_seconds(self):
+        probe = FakeProbe(down=[DAEMON_0, DAEMON_1])
+        pool = self.pool(probe)
+
+        self.assertIsNone(pool.acquire("b0"))
+        self.assertIsNone(pool.acquire("b1"))
+        self.assertEqual(2, len(probe.calls))
+
+        probe.down.clear()
+        self.clock.now = 11
+        self.assertEqual(DAEMON_0, pool.acquire("b2"))
+
+
+if __name__ == "__main__":
+    unittest.main()
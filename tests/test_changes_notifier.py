@@ -0,0 +1,98 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import threading
+import unittest
+
+from openserverless.couchdb.changes_notifier import ChangesNotifier
+
+
+class FakeChangesCouchDB:
+
+    def __init__(self, feeds):
+        self.feeds = list(feeds)
+        self.calls = []
+        self.released = threading.Event()
+
+    def last_seq(self, database):
+        return "10-abc"
+
+    def changes(self, database, since, selector=None, timeout_seconds=30):
+        self.calls.append({"since": since, "selector": selector})
+        if self.feeds:
+            return self.feeds.pop(0)
+        # emulate an idle long-poll
+        self.released.wait(0.05)
+        return {"results": [], "last_seq": since}
+
+
+class ChangesNotifierTest(unittest.TestCase):
+
+    def test_waiter_is_woken_by_matching_document(self):
+        couch = FakeChangesCouchDB(
+            [
+                {
+                    "results": [
+                        {"doc": {"login": "other"}},
+                        {"doc": {"login": "ssouser", "env": []}},
+                    ],
+                    "last_seq": "12-def",
+                }
+            ]
+        )
+        notifier = ChangesNotifier(couch, "users_metadata")
+
+        notifier.subscribe("ssouser")
+        try:
+            doc = notifier.wait("ssouser", 2)
+        finally:
+            notifier.unsubscribe("ssouser")
+
+        self.assertEqual({"login": "ssouser", "env": []}, doc)
+        self.assertEqual("10-abc", couch.calls[0]["since"])
+        self.assertEqual({"login": {"$exists": True}}, couch.calls[0]["selector"])
+
+    def test_waiters_share_a_single_feed(self):
+        couch = FakeChangesCouchDB([])
+        notifier = ChangesNotifier(couch, "users_metadata")
+
+        notifier.subscribe("first")
+        notifier.subscribe("second")
+        self.assertIsNone(notifier.wait("first", 0.1))
+        notifier.unsubscribe("first")
+        notifier.unsubscribe("second")
+
+        threads = [t for t in threading.enumerate() if t.name == "couchdb-changes-users_metadata"]
+        self.assertLessEqual(len(threads), 1)
+
+    def test_deleted_documents_are_ignored(self):
+        couch = FakeChangesCouchDB(
+            [{"results": [{"deleted": True, "doc": {"login": "ssouser"}}], "last_seq": "11"}]
+        )
+        notifier = ChangesNotifier(couch, "users_metadata")
+
+        notifier.subscribe("ssouser")
+        try:
+            doc = notifier.wait("ssouser", 0.2)
+        finally:
+            notifier.unsubscribe("ssouser")
+
+        self.assertIsNone(doc)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import unittest
+
+from openserverless.common.flow_store import (
+    InMemoryFlowStore,
+    RedisFlowStore,
+    build_flow_store,
+)
+from openserverless.error.config_exception import ConfigException
+
+
+class FakeRedis:
+
+    def __init__(self):
+        self.values = {}
+        self.ttls = {}
+
+    def set(self, key, value, ex=None, xx=False):
+        if xx and key not in self.values:
+            return None
+        self.values[key] = value
+        self.ttls[key] = ex
+        return True
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def getdel(self, key):
+        self.ttls.pop(key, None)
+        return self.values.pop(key, None)
+
+
+class InMemoryFlowStoreTest(unittest.TestCase):
+
+    def test_cleanup_removes_only_expired_flows(self):
+        store = InMemoryFlowStore()
+        store.put("old", {"expires_at": 100})
+        store.put("new", {"expires_at": 300})
+
+        store.cleanup_expired(200)
+
+        self.assertIsNone(store.get("old"))
+        self.assertEqual({"expires_at": 300}, store.get("new"))
+        self.assertEqual(1, len(store))
+
+    def test_cleanup_ignores_stale_heap_entries(self):
+        store = InMemoryFlowStore()
+        store.put("flow", {"expires_at": 100})
+        store.put("flow", {"expires_at": 500})
+
+        store.cleanup_expired(200)
+
+        self.assertEqual({"expires_at": 500}, store.get("flow"))
+
+    def test_cleanup_removes_flows_replaced_with_a_shorter_expiry(self):
+        store = InMemoryFlowStore()
+        store.put("flow", {"expires_at": 500})
+
+        self.assertTrue(store.replace("flow", {"expires_at": 100}))
+        store.cleanup_expired(200)
+
+        self.assertIsNone(store.get("flow"))
+        self.assertEqual(0, len(store))
+
+    def test_wraps_existing_dict(self):
+        flows = {"flow": {"expires_at": 100}}
+        store = InMemoryFlowStore(flows)
+
+        store.cleanup_expired(100)
+
+        self.assertNotIn("flow", flows)
+
+
+class RedisFlowStoreTest(unittest.TestCase):
+
+    def test_put_uses_native_ttl_with_grace(self):
+        client = FakeRedis()
+        store = RedisFlowStore(client, prefix="flows:", grace_seconds=60, now=lambda: 1000)
+
+        store.put("flow", {"expires_at": 1600, "device_code": "code"})
+
+        self.assertEqual(660, client.ttls["flows:flow"])
+        self.assertEqual("code", store.get("flow")["device_code"])
+
+    def test_pop_consumes_flow_once(self):
+        client = FakeRedis()
+        store = RedisFlowStore(client, prefix="flows:", now=lambda: 1000)
+        store.put("flow", {"expires_at": 1600})
+
+        self.assertEqual({"expires_at": 1600}, store.pop("flow"))
+        self.assertIsNone(store.pop("flow"))
+        self.assertIsNone(store.get("flow"))
+
+
+class BuildFlowStoreTest(unittest.TestCase):
+
+    def test_defaults_to_memory(self):
+        self.assertIsInstance(build_flow_store({}), InMemoryFlowStore)
+
+    def test_redis_requires_url(self):
+        with self.assertRaises(ConfigException):
+            build_flow_store({"OIDC_FLOW_STORE": "redis"})
+
+    def test_rejects_unknown_backend(self):
+        with self.assertRaises(ConfigException):
+            build_flow_store({"OIDC_FLOW_STORE": "etcd"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import email.message
+import unittest
+import urllib.request
+
+import requests
+
+from openserverless.common.idp_http_client import IdpHttpClient
+
+
+class FakeSession:
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+        self.mounted = {}
+        self.cookies = requests.cookies.RequestsCookieJar()
+
+    def mount(self, prefix, adapter):
+        self.mounted[prefix] = adapter
+
+    def request(self, method, url, **kwargs):
+        self.calls.append({"method": method, "url": url, **kwargs})
+        if self.fail:
+            raise ConnectionError("unreachable")
+        return "response"
+
+
+class IdpHttpClientTest(unittest.TestCase):
+
+    def test_applies_default_timeout_and_pools_connections(self):
+        session = FakeSession()
+        client = IdpHttpClient(pool_maxsize=7, timeout=3, session=session)
+
+        client.post("https://idp.test/token", data={"a": "b"})
+        client.get("https://idp.test/certs", timeout=1)
+
+        self.assertEqual(3, session.calls[0]["timeout"])
+        self.assertEqual(1, session.calls[1]["timeout"])
+        self.assertEqual(7, session.mounted["https://"]._pool_maxsize)
+
+    def test_records_latency_per_endpoint(self):
+        client = IdpHttpClient(session=FakeSession())
+
+        client.post("https://idp.test/token?x=1")
+        client.post("https://idp.test/token")
+        metrics = client.metrics()
+
+        self.assertEqual(2, metrics["POST /token"]["count"])
+        self.assertEqual(0, metrics["POST /token"]["errors"])
+        self.assertGreaterEqual(metrics["POST /token"]["max_seconds"], 0)
+
+    def test_idp_cookies_are_not_kept(self):
+        session = requests.Session()
+        IdpHttpClient(session=session)
+
+        class CookieResponse:
+            def info(self):
+                headers = email.message.Message()
+                headers["Set-Cookie"] = "AUTH_SESSION_ID=abc; Path=/"
+                return headers
+
+        session.cookies.extract_cookies(CookieResponse(), urllib.request.Request("https://idp.test/token"))
+
+        self.assertEqual(0, len(session.cookies))
+
+    def test_records_errors(self):
+        client = IdpHttpClient(session=FakeSession(fail=True))
+
+        with self.assertRaises(ConnectionError):
+            client.get("https://idp.test/certs")
+
+        self.assertEqual(1, client.metrics()["GET /certs"]["errors"])
+
+
+if __name__ == "__main__":
+    unittest.main()
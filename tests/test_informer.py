@@ -0,0 +1,122 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import threading
+import unittest
+
+from openserverless.common.informer import Informer
+
+
+def resource(name, labels=None, resource_version="1"):
+    return {"metadata": {"name": name, "labels": labels or {}, "resourceVersion": resource_version}}
+
+
+class InformerTest(unittest.TestCase):
+
+    def informer(self, list_func=None, watch_func=None):
+        return Informer(
+            "test",
+            list_func or (lambda: None),
+            watch_func or (lambda resource_version, timeout_seconds: iter([])),
+        )
+
+    def test_list_uses_label_index(self):
+        informer = self.informer()
+        informer.replace(
+            [
+                resource("wsone", {"pool": "available"}),
+                resource("wstwo", {"pool": "bound", "identity": "abc"}),
+                resource("devel"),
+            ]
+        )
+
+        self.assertEqual(["wsone"], [u["metadata"]["name"] for u in informer.list("pool=available")])
+        self.assertEqual(["wstwo"], [u["metadata"]["name"] for u in informer.list("pool=bound,identity=abc")])
+        self.assertEqual(["devel", "wsone"], [u["metadata"]["name"] for u in informer.list("pool!=bound")])
+
+    def test_events_update_the_cache_and_reach_handlers(self):
+        informer = self.informer()
+        informer.replace([resource("wsone", {"pool": "available"})])
+        seen = []
+        informer.add_handler(lambda event_type, obj: seen.append(event_type))
+
+        informer.apply("MODIFIED", resource("wsone", {"pool": "bound"}, "2"))
+        informer.apply("ADDED", resource("wstwo", {"pool": "available"}, "3"))
+        informer.apply("DELETED", resource("wstwo", {"pool": "available"}, "4"))
+
+        self.assertEqual([], informer.list("pool=available"))
+        self.assertEqual("2", informer.get("wsone")["metadata"]["resourceVersion"])
+        self.assertIsNone(informer.get("wstwo"))
+        self.assertEqual(["MODIFIED", "ADDED", "DELETED"], seen)
+
+    def test_reads_return_copies(self):
+        informer = self.informer()
+        informer.replace([resource("wsone")])
+
+        informer.get("wsone")["metadata"]["labels"]["changed"] = "yes"
+
+        self.assertEqual({}, informer.get("wsone")["metadata"]["labels"])
+
+    def test_run_lists_then_watches_from_the_list_version(self):
+        watched = threading.Event()
+        versions = []
+
+        def watch(resource_version, timeout_seconds):
+            versions.append(resource_version)
+            yield "ADDED", resource("wstwo")
+            informer.stop()
+            watched.set()
+            yield "ADDED", resource("ignored")
+
+        informer = self.informer(
+            lambda: {"items": [resource("wsone")], "metadata": {"resourceVersion": "42"}},
+            watch,
+        )
+        informer.start()
+
+        self.assertTrue(informer.wait_for_sync(5))
+        self.assertTrue(watched.wait(5))
+        self.assertEqual(["42"], versions[:1])
+        self.assertIsNotNone(informer.get("wsone"))
+
+    def test_relist_after_an_expired_watch_drops_deleted_objects(self):
+        relisted = threading.Event()
+        lists = [
+            {"items": [resource("wsone"), resource("wstwo")], "metadata": {"resourceVersion": "1"}},
+            {"items": [resource("wsone")], "metadata": {"resourceVersion": "9"}},
+        ]
+
+        def list_func():
+            return lists.pop(0) if lists else None
+
+        def watch(resource_version, timeout_seconds):
+            if resource_version == "9":
+                informer.stop()
+                relisted.set()
+            # the version expired (410 Gone): the watch ends without events
+            return iter([])
+
+        informer = self.informer(list_func, watch)
+        informer.start()
+
+        self.assertTrue(relisted.wait(5))
+        self.assertIsNone(informer.get("wstwo"))
+        self.assertIsNotNone(informer.get("wsone"))
+
+
+if __name__ == "__main__":
+    unittest.main()
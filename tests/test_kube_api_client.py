@@ -0,0 +1,374 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import json
+import os
+import tempfile
+import unittest
+
+from openserverless.common.kube_api_client import (
+    ACCEPT_PARTIAL_METADATA,
+    BUILD_COMPLETED_AT_ANNOTATION,
+    KubeApiClient,
+    shared_kube_session,
+)
+
+
+class FakeResponse:
+
+    def __init__(self, status_code=200, payload=None):
+        self.status_code = status_code
+        self.text = json.dumps(payload or {})
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class FakeWatchResponse(FakeResponse):
+
+    def __init__(self, events, status_code=200):
+        super().__init__(status_code)
+        self.lines = [json.dumps(event).encode() for event in events]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+
+def pod_event(event_type, name, resource_version, init_state=None):
+    pod = {"metadata": {"name": name, "resourceVersion": resource_version}, "status": {}}
+    if init_state:
+        pod["status"]["initContainerStatuses"] = [{"name": "copy-build-context", "state": init_state}]
+    return {"type": event_type, "object": pod}
+
+
+class FakeSession:
+
+    def __init__(self, responses=None):
+        self.responses = list(responses or [])
+        self.calls = []
+
+    def request(self, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        if self.responses:
+            return self.responses.pop(0)
+        return FakeResponse()
+
+
+class KubeApiClientTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        token = os.path.join(self.tmpdir.name, "token")
+        cert = os.path.join(self.tmpdir.name, "ca.crt")
+        with open(token, "w") as f:
+            f.write("service-token")
+        with open(cert, "w") as f:
+            f.write("certificate")
+        self.environ = {
+            "KUBERNETES_SERVICE_HOST": "10.0.0.1",
+            "KUBERNETES_SERVICE_PORT": "443",
+            "KUBERNETES_TOKEN_FILENAME": token,
+            "KUBERNETES_CERT_FILENAME": cert,
+            "KUBE_CONNECT_TIMEOUT_SECONDS": "3",
+            "KUBE_READ_TIMEOUT_SECONDS": "10",
+            "KUBE_WRITE_TIMEOUT_SECONDS": "20",
+        }
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def client(self, session):
+        return KubeApiClient(environ=self.environ, session=session)
+
+
+class KubeApiClientSessionTest(KubeApiClientTestCase):
+
+    def test_requests_use_per_verb_timeouts(self):
+        session = FakeSession([FakeResponse(200, {"metadata": {"name": "devel"}}), FakeResponse(201)])
+        client = self.client(session)
+
+        self.assertEqual("devel", client.get_whisk_user("devel")["metadata"]["name"])
+        self.assertTrue(client.create_whisk_user({"metadata": {"name": "devel"}}))
+
+        self.assertEqual(("GET", (3, 10)), (session.calls[0][0], session.calls[0][2]["timeout"]))
+        self.assertEqual(("POST", (3, 20)), (session.calls[1][0], session.calls[1][2]["timeout"]))
+        self.assertEqual("Bearer service-token", session.calls[0][2]["headers"]["Authorization"])
+
+    def test_clients_share_the_session_of_the_same_server(self):
+        first = shared_kube_session("https://10.0.0.1:443", self.environ["KUBERNETES_CERT_FILENAME"])
+        second = shared_kube_session("https://10.0.0.1:443", self.environ["KUBERNETES_CERT_FILENAME"])
+
+        self.assertIs(first, second)
+        self.assertEqual(self.environ["KUBERNETES_CERT_FILENAME"], first.verify)
+
+
+class KubeApiClientSelectorTest(KubeApiClientTestCase):
+
+    def test_get_jobs_passes_selectors_to_the_api_server(self):
+        session = FakeSession([FakeResponse(200, {"items": [{"metadata": {"name": "build-devel-1"}}]})])
+
+        jobs = self.client(session).get_jobs(
+            label_selector="app.kubernetes.io/component=build",
+            resource_version="0",
+        )
+
+        self.assertEqual(["build-devel-1"], [job["metadata"]["name"] for job in jobs])
+        self.assertEqual(
+            {"labelSelector": "app.kubernetes.io/component=build", "resourceVersion": "0", "limit": 500},
+            session.calls[0][2]["params"],
+        )
+
+class KubeApiClientPagingTest(KubeApiClientTestCase):
+
+    def test_list_pods_follows_continue_tokens_lazily(self):
+        self.environ["KUBE_LIST_PAGE_SIZE"] = "2"
+        session = FakeSession(
+            [
+                FakeResponse(
+                    200,
+                    {"items": [{"metadata": {"name": "p1"}}, {"metadata": {"name": "p2"}}], "metadata": {"continue": "next"}},
+                ),
+                FakeResponse(200, {"items": [{"metadata": {"name": "p3"}}], "metadata": {}}),
+            ]
+        )
+
+        pods = self.client(session).list_pods(label_selector="job-name=build-1")
+
+        self.assertEqual(1, len(session.calls))
+        self.assertEqual("p1", next(pods)["metadata"]["name"])
+        self.assertEqual(["p2", "p3"], [pod["metadata"]["name"] for pod in pods])
+        self.assertEqual(2, len(session.calls))
+        self.assertEqual({"labelSelector": "job-name=build-1", "limit": 2, "continue": "next"}, session.calls[1][2]["params"])
+
+    def test_first_page_failure_returns_none(self):
+        session = FakeSession([FakeResponse(500)])
+
+        self.assertIsNone(self.client(session).list_whisk_users("pool=available"))
+
+
+
+class KubeApiClientCacheTest(KubeApiClientTestCase):
+
+    def test_registry_secret_is_cached_until_deleted(self):
+        secret = {"metadata": {"name": "registry-pull-secret"}, "data": {}}
+        session = FakeSession([FakeResponse(200, secret), FakeResponse(200), FakeResponse(404)])
+        client = self.client(session)
+        client._config_cache.clear()
+
+        self.assertEqual(secret, client.get_secret("registry-pull-secret"))
+        self.assertEqual(secret, client.get_secret("registry-pull-secret"))
+        self.assertEqual(1, len(session.calls))
+
+        self.assertTrue(client.delete_secret("registry-pull-secret"))
+        self.assertIsNone(client.get_secret("registry-pull-secret"))
+        self.assertEqual(3, len(session.calls))
+
+
+class KubeApiClientProjectionTest(KubeApiClientTestCase):
+
+    def test_get_job_status_lists_the_jobs_as_metadata(self):
+        partial = {
+            "kind": "PartialObjectMetadataList",
+            "items": [
+                {"metadata": {"name": "build-1", "annotations": {BUILD_COMPLETED_AT_ANNOTATION: "2026-01-01T10:02:30Z"}}},
+                {"metadata": {"name": "build-2"}},
+            ],
+        }
+        session = FakeSession([FakeResponse(200, partial)])
+
+        jobs = list(self.client(session).get_job_status(label_selector="app.kubernetes.io/component=build"))
+
+        self.assertEqual(ACCEPT_PARTIAL_METADATA, session.calls[0][2]["headers"]["Accept"])
+        self.assertEqual("2026-01-01T10:02:30Z", jobs[0]["status"]["completionTime"])
+        self.assertEqual([{"type": "Complete", "status": "True"}], jobs[0]["status"]["conditions"])
+        self.assertIsNone(jobs[1]["status"]["completionTime"])
+
+    def test_get_job_status_accepts_full_jobs(self):
+        job = {
+            "metadata": {"name": "build-1"},
+            "spec": {"template": {"spec": {"containers": []}}},
+            "status": {"completionTime": "2026-01-01T10:02:30Z"},
+        }
+        session = FakeSession([FakeResponse(200, {"kind": "JobList", "items": [job]})])
+
+        jobs = list(self.client(session).get_job_status())
+
+        self.assertEqual([{"metadata": {"name": "build-1"}, "status": {"completionTime": "2026-01-01T10:02:30Z"}}], jobs)
+
+    def test_label_job_merges_the_labels(self):
+        session = FakeSession([FakeResponse(200)])
+
+        self.assertTrue(self.client(session).label_job("build-1", {"team": "devel"}))
+
+        method, url, kwargs = session.calls[0]
+        self.assertEqual("PATCH", method)
+        self.assertTrue(url.endswith("/apis/batch/v1/namespaces/nuvolaris/jobs/build-1"))
+        self.assertEqual({"metadata": {"labels": {"team": "devel"}}}, json.loads(kwargs["data"]))
+
+    def test_label_job_merges_the_annotations(self):
+        session = FakeSession([FakeResponse(200)])
+
+        self.assertTrue(self.client(session).label_job("build-1", {"team": "devel"}, annotations={"note": "x"}))
+
+        patch = json.loads(session.calls[0][2]["data"])
+        self.assertEqual({"labels": {"team": "devel"}, "annotations": {"note": "x"}}, patch["metadata"])
+
+
+class KubeApiClientDeleteTest(KubeApiClientTestCase):
+
+    def test_delete_jobs_uses_a_single_deletecollection(self):
+        deleted = {"kind": "PartialObjectMetadataList", "items": [{"metadata": {"name": "b1"}}, {"metadata": {"name": "b2"}}]}
+        session = FakeSession([FakeResponse(200, deleted)])
+
+        count = self.client(session).delete_jobs(
+            label_selector="app.kubernetes.io/component=build",
+            field_selector="status.successful=1",
+        )
+
+        self.assertEqual(2, count)
+        method, url, kwargs = session.calls[0]
+        self.assertEqual(("DELETE", "https://10.0.0.1:443/apis/batch/v1/namespaces/nuvolaris/jobs"), (method, url))
+        self.assertEqual(
+            {
+                "labelSelector": "app.kubernetes.io/component=build",
+                "fieldSelector": "status.successful=1",
+                "propagationPolicy": "Background",
+            },
+            kwargs["params"],
+        )
+
+    def test_delete_jobs_failure_returns_none(self):
+        session = FakeSession([FakeResponse(403)])
+
+        self.assertIsNone(self.client(session).delete_jobs(label_selector="app.kubernetes.io/component=build"))
+
+    def test_set_owner_reference_merges_the_owner_into_the_metadata(self):
+        session = FakeSession([FakeResponse(200)])
+        owner = {"apiVersion": "batch/v1", "kind": "Job", "name": "build-1", "uid": "1234"}
+
+        self.assertTrue(self.client(session).set_owner_reference("configmaps", "cm-1", owner))
+
+        method, url, kwargs = session.calls[0]
+        self.assertEqual(("PATCH", "https://10.0.0.1:443/api/v1/namespaces/nuvolaris/configmaps/cm-1"), (method, url))
+        self.assertEqual("application/merge-patch+json", kwargs["headers"]["Content-Type"])
+        self.assertEqual({"metadata": {"ownerReferences": [owner]}}, json.loads(kwargs["data"]))
+
+    def test_delete_job_removes_the_pods_in_background(self):
+        session = FakeSession([FakeResponse(200)])
+
+        self.assertTrue(self.client(session).delete_job("build-1"))
+        self.assertEqual({"propagationPolicy": "Background"}, session.calls[0][2]["params"])
+
+
+class KubeApiClientWatchTest(KubeApiClientTestCase):
+
+    def test_get_pod_by_job_name_watches_the_job_pods(self):
+        session = FakeSession([FakeWatchResponse([pod_event("ADDED", "build-devel-1-x7k", "10")])])
+
+        pod_name = self.client(session).get_pod_by_job_name("build-devel-1")
+
+        self.assertEqual("build-devel-1-x7k", pod_name)
+        self.assertTrue(session.calls[0][1].endswith("/api/v1/namespaces/nuvolaris/pods"))
+        params = session.calls[0][2]["params"]
+        self.assertEqual("job-name=build-devel-1", params["labelSelector"])
+        self.assertEqual("true", params["watch"])
+
+    def test_watch_resumes_from_bookmark_and_relists_on_gone(self):
+        session = FakeSession(
+            [
+                FakeWatchResponse(
+                    [
+                        pod_event("ADDED", "pod", "10"),
+                        {"type": "BOOKMARK", "object": {"metadata": {"resourceVersion": "15"}}},
+                    ]
+                ),
+                FakeWatchResponse([{"type": "ERROR", "object": {"code": 410}}]),
+                FakeWatchResponse([pod_event("MODIFIED", "pod", "20")]),
+            ]
+        )
+        events = self.client(session).watch_pods(label_selector="job-name=build", timeout_seconds=30)
+
+        self.assertEqual("ADDED", next(events)[0])
+        self.assertEqual("MODIFIED", next(events)[0])
+        events.close()
+
+        self.assertNotIn("resourceVersion", session.calls[0][2]["params"])
+        self.assertEqual("15", session.calls[1][2]["params"]["resourceVersion"])
+        self.assertNotIn("resourceVersion", session.calls[2][2]["params"])
+
+    def test_watch_can_end_on_gone_for_a_relist(self):
+        session = FakeSession(
+            [
+                FakeWatchResponse([pod_event("ADDED", "pod", "10"), {"type": "ERROR", "object": {"code": 410}}]),
+                FakeWatchResponse([pod_event("ADDED", "other", "20")]),
+            ]
+        )
+        url = "https://10.0.0.1:443/api/v1/namespaces/nuvolaris/pods"
+        events = self.client(session).watch(url, resource_version="5", timeout_seconds=30, restart_on_expired=False)
+
+        self.assertEqual(["pod"], [obj["metadata"]["name"] for _, obj in events])
+        self.assertEqual(1, len(session.calls))
+
+    def test_wait_for_init_container_completion_follows_pod_events(self):
+        session = FakeSession(
+            [
+                FakeWatchResponse(
+                    [
+                        pod_event("ADDED", "pod", "1"),
+                        pod_event("MODIFIED", "pod", "2", {"running": {}}),
+                        pod_event("MODIFIED", "pod", "3", {"terminated": {"exitCode": 0}}),
+                    ]
+                )
+            ]
+        )
+
+        completed = self.client(session).wait_for_init_container_completion(
+            "build-devel-1", "copy-build-context", timeout_seconds=30
+        )
+
+        self.assertTrue(completed)
+        self.assertEqual(1, len(session.calls))
+
+    def test_wait_for_init_container_completion_fails_fast_on_unschedulable_pod(self):
+        unschedulable = pod_event("MODIFIED", "pod", "2")
+        unschedulable["object"]["status"]["conditions"] = [
+            {
+                "type": "PodScheduled",
+                "status": "False",
+                "reason": "Unschedulable",
+                "message": "0/3 nodes available",
+                "lastTransitionTime": "2026-01-01T10:00:00Z",
+            }
+        ]
+        session = FakeSession([FakeWatchResponse([pod_event("ADDED", "pod", "1"), unschedulable])])
+
+        completed = self.client(session).wait_for_init_container_completion(
+            "build-devel-1", "copy-build-context", timeout_seconds=30
+        )
+
+        self.assertFalse(completed)
+        self.assertEqual(1, len(session.calls))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,10 +15,13 @@
 # specific language governing permissions and limitations
 # under the License.
 #
+import threading
 import unittest
 
 import openserverless.common.response_builder as res_builder
 from openserverless import app
+from openserverless.common.flow_store import FlowCipher, InMemoryFlowStore
+from openserverless.impl.auth.device_flow_poller import DeviceFlowPoller
 from openserverless.impl.auth.oidc_device_flow_service import OidcDeviceFlowService
 
 
@@ -72,6 +75,22 @@ class FakeAuthService:
         )
 
 
+class FakePoller:
+
+    def __init__(self):
+        self.tracked = []
+        self.waits = 0
+
+    def track(self, flow_id):
+        self.tracked.append(flow_id)
+
+    def ensure_polling(self, flow_id, flow):
+        pass
+
+    def wait_for_update(self, timeout):
+        self.waits += 1
+
+
 class OidcDeviceFlowServiceTest(unittest.TestCase):
 
     def setUp(self):
@@ -424,5 +443,226 @@ class OidcDeviceFlowServiceTest(unittest.TestCase):
         self.assertNotIn("flow-1", store)
 
 
+    def test_start_tracks_flow_with_background_poller(self):
+        store = {}
+        poller = FakePoller()
+        http_client = FakeHttpClient(
+            [FakeResponse({"device_code": "device-secret", "user_code": "ABCD-EFGH", "expires_in": 600})]
+        )
+        service = OidcDeviceFlowService(
+            environ=self.environ,
+            http_client=http_client,
+            auth_service=FakeAuthService(),
+            store=store,
+            now=lambda: 1000,
+            poller=poller,
+        )
+
+        with app.app_context():
+            response = service.start()
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual([response.json["flow_id"]], poller.tracked)
+        self.assertEqual("pending", store[response.json["flow_id"]]["status"])
+
+    def test_poll_serves_cached_status_without_calling_provider(self):
+        store = {
+            "flow-1": {
+                "device_code": "device-secret",
+                "verifier": "verifier",
+                "expires_at": 2000,
+                "interval": 10,
+                "status": "pending",
+                "message": "slow_down",
+            }
+        }
+        http_client = FakeHttpClient([])
+        service = OidcDeviceFlowService(
+            environ=self.environ,
+            http_client=http_client,
+            auth_service=FakeAuthService(),
+            store=store,
+            now=lambda: 1000,
+            poller=FakePoller(),
+        )
+
+        with app.app_context():
+            response = service.poll("flow-1")
+
+        self.assertEqual(202, response.status_code)
+        self.assertEqual("slow_down", response.json["message"])
+        self.assertEqual(10, response.json["interval"])
+        self.assertEqual([], http_client.calls)
+
+    def test_wait_returns_login_of_authorized_flow(self):
+        cipher = FlowCipher()
+        store = {
+            "flow-1": {
+                "device_code": "device-secret",
+                "verifier": "verifier",
+                "expires_at": 2000,
+                "interval": 5,
+                "status": "authorized",
+                "sealed_token": cipher.seal("oidc-token"),
+                "requested_namespace": "michelem",
+            }
+        }
+        auth_service = FakeAuthService()
+        service = OidcDeviceFlowService(
+            environ=self.environ,
+            http_client=FakeHttpClient([]),
+            auth_service=auth_service,
+            store=store,
+            now=lambda: 1000,
+            poller=FakePoller(),
+            cipher=cipher,
+        )
+
+        with app.app_context():
+            response = service.wait("flow-1", timeout=5)
+
+        self.assertEqual(200, response.status_code)
+        self.assertEqual(
+            [{"access_token": "oidc-token", "expected_namespace": "michelem"}],
+            auth_service.tokens,
+        )
+        self.assertNotIn("flow-1", store)
+
+    def test_wait_returns_pending_after_timeout(self):
+        store = {
+            "flow-1": {
+                "device_code": "device-secret",
+                "verifier": "verifier",
+                "expires_at": 2000,
+                "interval": 5,
+                "status": "pending",
+            }
+        }
+        service = OidcDeviceFlowService(
+            environ=self.environ,
+            http_client=FakeHttpClient([]),
+            auth_service=FakeAuthService(),
+            store=store,
+            now=lambda: 1000,
+            poller=FakePoller(),
+        )
+
+        with app.app_context():
+            response = service.wait("flow-1", timeout=0)
+
+        self.assertEqual(202, response.status_code)
+        self.assertIn("flow-1", store)
+
+    def test_wait_returns_at_once_without_a_free_wait_slot(self):
+        store = {
+            "flow-1": {
+                "device_code": "device-secret",
+                "verifier": "verifier",
+                "expires_at": 2000,
+                "interval": 5,
+                "status": "pending",
+            }
+        }
+        wait_slots = threading.BoundedSemaphore(1)
+        wait_slots.acquire()
+        poller = FakePoller()
+        service = OidcDeviceFlowService(
+            environ=self.environ,
+            http_client=FakeHttpClient([]),
+            auth_service=FakeAuthService(),
+            store=store,
+            now=lambda: 1000,
+            poller=poller,
+            wait_slots=wait_slots,
+        )
+
+        with app.app_context():
+            response = service.wait("flow-1", timeout=5)
+
+        self.assertEqual(202, response.status_code)
+        self.assertEqual(0, poller.waits)
+
+    def test_exchange_slow_down_increases_interval(self):
+        service = OidcDeviceFlowService(
+            environ=self.environ,
+            http_client=FakeHttpClient([FakeResponse({"error": "slow_down"}, 400)]),
+            auth_service=FakeAuthService(),
+            store={},
+            now=lambda: 1000,
+        )
+
+        status, updates = service.exchange_device_code(
+            {"device_code": "device-secret", "verifier": "verifier", "interval": 5}
+        )
+
+        self.assertEqual("pending", status)
+        self.assertEqual(10, updates["interval"])
+
+    def test_background_poller_stores_the_sealed_token_only(self):
+        store = InMemoryFlowStore()
+        store.put(
+            "flow-1",
+            {"device_code": "device-secret", "verifier": "verifier", "expires_at": 2000, "interval": 0, "status": "pending"},
+        )
+        cipher = FlowCipher()
+        service = OidcDeviceFlowService(
+            environ=self.environ,
+            http_client=FakeHttpClient([FakeResponse({"access_token": "oidc-token"})]),
+            auth_service=FakeAuthService(),
+            store=store,
+            now=lambda: 1000,
+            poller=FakePoller(),
+            cipher=cipher,
+        )
+        exchanges = []
+
+        def exchange(flow):
+            exchanges.append(flow)
+            return service.exchange_and_seal(flow)
+
+        poller = DeviceFlowPoller(store, exchange, now=lambda: 1000)
+        poller.track("flow-1")
+        for _ in range(100):
+            if not poller.is_tracking("flow-1"):
+                break
+            poller.wait_for_update(0.05)
+
+        self.assertEqual(1, len(exchanges))
+        flow = store.get("flow-1")
+        self.assertEqual("authorized", flow["status"])
+        self.assertNotIn("access_token", flow)
+        self.assertNotIn("oidc-token", str(flow))
+        self.assertEqual("oidc-token", cipher.unseal(flow["sealed_token"]))
+        # the completed flow lives only until its client reads it
+        self.assertEqual(1060, flow["expires_at"])
+
+    def test_token_sealed_with_another_key_is_not_used(self):
+        store = {
+            "flow-1": {
+                "expires_at": 2000,
+                "interval": 5,
+                "status": "authorized",
+                "sealed_token": FlowCipher().seal("oidc-token"),
+            }
+        }
+        auth_service = FakeAuthService()
+        service = OidcDeviceFlowService(
+            environ=self.environ,
+            http_client=FakeHttpClient([]),
+            auth_service=auth_service,
+            store=store,
+            now=lambda: 1000,
+            poller=FakePoller(),
+            cipher=FlowCipher(),
+        )
+
+        with app.app_context():
+            response = service.wait("flow-1", timeout=5)
+
+        self.assertEqual(401, response.status_code)
+        self.assertEqual([], auth_service.tokens)
+        self.assertNotIn("flow-1", store)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,75 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import unittest
+
+from openserverless.common.rate_limiter import TokenBucket, background_requests, is_background
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def bucket(self, qps, burst, reserve=0.0):
+        self.clock = FakeClock()
+        return TokenBucket(qps, burst, reserve=reserve, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_burst_is_served_then_calls_are_paced_at_qps(self):
+        bucket = self.bucket(qps=10, burst=3)
+
+        waits = [bucket.acquire() for _ in range(5)]
+
+        self.assertEqual([0.0, 0.0, 0.0], waits[:3])
+        self.assertAlmostEqual(0.1, waits[3])
+        self.assertAlmostEqual(0.2, self.clock.now)
+
+    def test_background_calls_leave_the_reserve_to_the_others(self):
+        bucket = self.bucket(qps=1, burst=5, reserve=0.5)
+
+        self.assertEqual(0.0, bucket.acquire(background=True))
+        self.assertEqual(0.0, bucket.acquire(background=True))
+        # 3 tokens left, background needs 1 + 2 reserved
+        self.assertEqual(0.0, bucket.acquire(background=True))
+        self.assertGreater(bucket.acquire(background=True), 0)
+
+        self.clock.now += 0.5
+        self.assertEqual(0.0, bucket.acquire())
+
+    def test_zero_qps_disables_the_limiter(self):
+        bucket = self.bucket(qps=0, burst=1)
+
+        self.assertEqual([0.0] * 10, [bucket.acquire() for _ in range(10)])
+
+    def test_background_requests_marks_the_current_thread(self):
+        self.assertFalse(is_background())
+        with background_requests():
+            self.assertTrue(is_background())
+        self.assertFalse(is_background())
+
+
+if __name__ == "__main__":
+    unittest.main()
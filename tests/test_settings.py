@@ -0,0 +1,108 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import dataclasses
+import os
+import unittest
+
+from cryptography.fernet import Fernet
+
+from openserverless.config.settings import Settings, get_settings, resolve_settings
+from openserverless.error.config_exception import ConfigException
+
+
+class SettingsTest(unittest.TestCase):
+
+    def test_defaults(self):
+        settings = Settings.from_environ({})
+
+        self.assertEqual("preferred_username", settings.oidc_username_claim)
+        self.assertTrue(settings.strict_user_check)
+        self.assertFalse(settings.sso_autoprovision_on_login)
+        self.assertIsNone(settings.oidc_token_url)
+        self.assertEqual(16, settings.listen_threads)
+
+    def test_parses_typed_values(self):
+        settings = Settings.from_environ(
+            {
+                "STRICT_USER_CHECK": "off",
+                "SSO_AUTOPROVISION_ON_LOGIN": "yes",
+                "SSO_AUTOPROVISION_POLL_SECONDS": "0.5",
+                "SSO_NAMESPACE_HASH_LENGTH": "40",
+                "OIDC_CLIENT_SECRET": " secret ",
+                "BUILDKIT_POOL_ADDRESSES": "tcp://buildkitd-0.buildkitd:1234, tcp://buildkitd-1.buildkitd:1234,",
+            }
+        )
+
+        self.assertFalse(settings.strict_user_check)
+        self.assertTrue(settings.sso_autoprovision_on_login)
+        self.assertEqual(0.5, settings.sso_autoprovision_poll_seconds)
+        self.assertEqual(16, settings.sso_namespace_hash_length)
+        self.assertEqual("secret", settings.oidc_client_secret)
+        self.assertEqual(
+            ("tcp://buildkitd-0.buildkitd:1234", "tcp://buildkitd-1.buildkitd:1234"),
+            settings.buildkit_pool_addresses,
+        )
+
+    def test_derives_endpoints_from_issuer(self):
+        settings = Settings.from_environ(
+            {
+                "OIDC_ISSUER_URL": "https://keycloak.test/realms/lab/",
+                "OIDC_AUDIENCE": "admin-api",
+            }
+        )
+
+        self.assertEqual("https://keycloak.test/realms/lab/protocol/openid-connect/token", settings.oidc_token_url)
+        self.assertEqual("admin-api", settings.oidc_client_id)
+
+    def test_rejects_invalid_values(self):
+        for environ in [
+            {"OIDC_CLOCK_LEEWAY_SECONDS": "thirty"},
+            {"SSO_AUTOPROVISION_ASYNC": "maybe"},
+            {"SSO_AUTOPROVISION_POLL_SECONDS": "-1"},
+            {"BUILDKIT_POOL_ADDRESSES": "buildkitd-0.buildkitd:1234"},
+            {"API_REPLICAS": "2"},
+            {"API_REPLICAS": "2", "OIDC_FLOW_STORE": "redis", "OIDC_FLOW_STORE_REDIS_URL": "redis://redis:6379/0"},
+            {"OIDC_FLOW_STORE_KEY": "not-a-key"},
+        ]:
+            with self.assertRaises(ConfigException):
+                Settings.from_environ(environ)
+
+    def test_replicas_share_the_redis_store(self):
+        settings = Settings.from_environ(
+            {
+                "API_REPLICAS": "2",
+                "OIDC_FLOW_STORE": "redis",
+                "OIDC_FLOW_STORE_REDIS_URL": "redis://redis:6379/0",
+                "OIDC_FLOW_STORE_KEY": Fernet.generate_key().decode(),
+            }
+        )
+
+        self.assertEqual(2, settings.api_replicas)
+
+    def test_settings_are_immutable(self):
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            Settings().listen_port = 8080
+
+    def test_os_environ_resolves_to_shared_settings(self):
+        self.assertIs(get_settings(), resolve_settings(os.environ))
+        settings = Settings()
+        self.assertIs(settings, resolve_settings(settings))
+
+
+if __name__ == "__main__":
+    unittest.main()
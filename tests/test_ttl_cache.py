@@ -0,0 +1,71 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import unittest
+
+from openserverless.common.ttl_cache import TTLCache
+
+
+class CountingLoader:
+
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.cache = TTLCache(30, clock=lambda: self.now)
+
+    def test_value_is_loaded_once_until_it_expires(self):
+        loader = CountingLoader({"data": {"registry": "host"}})
+
+        self.cache.get("config", loader)
+        self.cache.get("config", loader)
+        self.assertEqual(1, loader.calls)
+
+        self.now = 31
+        self.cache.get("config", loader)
+        self.assertEqual(2, loader.calls)
+
+    def test_missing_values_are_not_cached(self):
+        loader = CountingLoader(None)
+
+        self.assertIsNone(self.cache.get("config", loader))
+        self.assertIsNone(self.cache.get("config", loader))
+        self.assertEqual(2, loader.calls)
+
+    def test_invalidate_and_copies(self):
+        loader = CountingLoader({"data": {}})
+
+        value = self.cache.get("config", loader)
+        value["data"]["changed"] = True
+        self.assertEqual({"data": {}}, self.cache.get("config", loader))
+
+        self.cache.invalidate("config")
+        self.cache.get("config", loader)
+        self.assertEqual(2, loader.calls)
+
+
+if __name__ == "__main__":
+    unittest.main()
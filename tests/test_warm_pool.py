@@ -0,0 +1,182 @@
+# Licensed to the Apache Software Foundation (ASF) under one
+# or more contributor license agreements.  See the NOTICE file
+# distributed with this work for additional information
+# regarding copyright ownership.  The ASF licenses this file
+# to you under the Apache License, Version 2.0 (the
+# "License"); you may not use this file except in compliance
+# with the License.  You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+#
+import unittest
+from unittest.mock import patch
+
+from openserverless import app
+from openserverless.impl.auth.auth_service import AuthService
+from openserverless.impl.auth.warm_pool import (
+    POOL_AVAILABLE,
+    POOL_BOUND,
+    POOL_IDENTITY_LABEL,
+    POOL_LABEL,
+    WarmNamespacePool,
+    sso_identity,
+)
+
+
+class FakePoolKubeClient:
+
+    def __init__(self, users=None, conflicts=None):
+        self.users = {user["metadata"]["name"]: user for user in users or []}
+        self.conflicts = set(conflicts or [])
+        self.created = []
+
+    def _matches(self, user, label_selector):
+        labels = user["metadata"].get("labels", {})
+        for term in label_selector.split(","):
+            key, value = term.split("=")
+            if labels.get(key) != value:
+                return False
+        return True
+
+    def list_whisk_users(self, label_selector=None):
+        return [user for user in self.users.values() if self._matches(user, label_selector)]
+
+    def create_whisk_user(self, whisk_user):
+        if whisk_user["metadata"]["name"] in self.users:
+            # 409 Conflict
+            return False
+        self.created.append(whisk_user)
+        self.users[whisk_user["metadata"]["name"]] = whisk_user
+        return True
+
+    def update_whisk_user(self, whisk_user):
+        name = whisk_user["metadata"]["name"]
+        if name in self.conflicts:
+            return False
+        self.users[name] = whisk_user
+        return True
+
+    def get_whisk_user(self, username, cached=True):
+        return self.users.get(username)
+
+
+class FakeCouchDB:
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find_doc(self, db_name, selector):
+        login = selector.split('"$eq": "')[1].split('"')[0]
+        return {"docs": [doc for doc in self.docs if doc["login"] == login]}
+
+
+def pooled(name, state=POOL_AVAILABLE):
+    return {
+        "metadata": {"name": name, "labels": {POOL_LABEL: state}},
+        "spec": {"email": f"{name}@pool.invalid"},
+    }
+
+
+class WarmNamespacePoolTest(unittest.TestCase):
+
+    def test_fill_creates_missing_namespaces(self):
+        kube_client = FakePoolKubeClient([pooled("wsready")])
+        pool = WarmNamespacePool(
+            kube_client,
+            lambda name: {"metadata": {"name": name}, "spec": {}},
+            size=3,
+        )
+
+        self.assertEqual(2, pool.fill())
+        self.assertEqual(3, len(kube_client.list_whisk_users(f"{POOL_LABEL}={POOL_AVAILABLE}")))
+
+    def test_fill_picks_the_lowest_free_names(self):
+        kube_client = FakePoolKubeClient([pooled("ws0", POOL_BOUND), pooled("ws2")])
+        pool = WarmNamespacePool(kube_client, lambda name: {"metadata": {"name": name}, "spec": {}}, size=3)
+
+        self.assertEqual(2, pool.fill())
+        self.assertEqual(["ws1", "ws3"], [user["metadata"]["name"] for user in kube_client.created])
+
+    def test_concurrent_fills_do_not_overshoot_the_pool(self):
+        kube_client = FakePoolKubeClient()
+        other = WarmNamespacePool(kube_client, lambda name: {"metadata": {"name": name}, "spec": {}}, size=2)
+        create = kube_client.create_whisk_user
+
+        def create_after_the_other_replica(whisk_user):
+            # the other replica refills between our listing and our creates
+            kube_client.create_whisk_user = create
+            other.fill()
+            return create(whisk_user)
+
+        kube_client.create_whisk_user = create_after_the_other_replica
+        pool = WarmNamespacePool(kube_client, lambda name: {"metadata": {"name": name}, "spec": {}}, size=2)
+
+        self.assertEqual(0, pool.fill())
+        self.assertEqual(2, len(kube_client.list_whisk_users(f"{POOL_LABEL}={POOL_AVAILABLE}")))
+
+    def test_claim_skips_entries_claimed_concurrently(self):
+        kube_client = FakePoolKubeClient([pooled("wstaken"), pooled("wsfree")], conflicts=["wstaken"])
+        pool = WarmNamespacePool(kube_client, None, size=0)
+
+        whisk_user = pool.claim("identity", lambda user: user["spec"].update(email="a@b.test"))
+
+        self.assertEqual("wsfree", whisk_user["metadata"]["name"])
+        self.assertEqual(POOL_BOUND, whisk_user["metadata"]["labels"][POOL_LABEL])
+        self.assertEqual("identity", pool.find_bound("identity")["metadata"]["labels"][POOL_IDENTITY_LABEL])
+        self.assertEqual("a@b.test", kube_client.users["wsfree"]["spec"]["email"])
+
+    def test_claim_returns_none_when_pool_is_empty(self):
+        pool = WarmNamespacePool(FakePoolKubeClient(), None, size=0)
+
+        self.assertIsNone(pool.claim("identity", lambda user: None))
+
+
+class AuthServiceWarmPoolTest(unittest.TestCase):
+
+    claims = {
+        "iss": "http://issuer.test",
+        "sub": "keycloak-subject",
+        "preferred_username": "ssouser",
+        "email": "sso.user@example.test",
+    }
+
+    def service(self, kube_client, docs):
+        return AuthService(
+            environ={
+                "OIDC_USERNAME_CLAIM": "preferred_username",
+                "SSO_AUTOPROVISION_ON_LOGIN": "true",
+            },
+            couch_db=FakeCouchDB(docs),
+            kube_client=kube_client,
+            warm_pool=WarmNamespacePool(kube_client, None, size=0),
+        )
+
+    @patch("openserverless.impl.auth.auth_service.OidcTokenValidator")
+    def test_first_login_binds_a_warm_namespace(self, validator_class):
+        validator_class.return_value.validate.return_value = self.claims
+        kube_client = FakePoolKubeClient([pooled("wsready")])
+        docs = [{"login": "wsready", "email": "x", "env": [{"key": "AUTH", "value": "uuid:key"}]}]
+
+        with app.app_context():
+            first = self.service(kube_client, docs).login_oidc("token")
+            second = self.service(kube_client, docs).login_oidc("token")
+
+        self.assertEqual(200, first.status_code)
+        self.assertEqual("wsready", first.json["NAMESPACE"])
+        self.assertEqual("wsready", second.json["NAMESPACE"])
+        self.assertEqual([], kube_client.created)
+        bound = kube_client.users["wsready"]
+        self.assertEqual(sso_identity(self.claims), bound["metadata"]["labels"][POOL_IDENTITY_LABEL])
+        self.assertEqual("sso.user@example.test", bound["spec"]["email"])
+        self.assertEqual("ssouser", bound["metadata"]["annotations"]["openserverless.apache.org/sso-username"])
+
+
+if __name__ == "__main__":
+    unittest.main()